@@ -0,0 +1,143 @@
+from functools import partial
+from typing import NamedTuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.functional import SimpleLazyObject
+
+from .models import Department, DepartmentUserProfile
+from .utils import bump_cache_version, cache_version
+
+DIRECTORY_VERSION_KEY = "directory:version"
+
+
+class Access(NamedTuple):
+    """What a user may see: their department (as id, name, code) and professor profile."""
+
+    department_id: int = None
+    department_name: str = ""
+    department_code: str = ""
+    profile_id: int = None
+
+    @property
+    def department(self):
+        if self.department_id is None:
+            return None
+        # Built from the cached fields; anything else loads on first access.
+        return Department.from_db(
+            None, ["id", "name", "code"], [self.department_id, self.department_name, self.department_code]
+        )
+
+
+NO_ACCESS = Access()
+
+
+def _access_key(user_id):
+    return f"access:{user_id}"
+
+
+def _load_access(user):
+    if user.role == "DA":
+        row = Department.objects.filter(department_admin=user).values_list("id", "name", "code").first()
+        return Access(*row) if row else NO_ACCESS
+    if user.role == "DU":
+        row = (
+            DepartmentUserProfile.objects.filter(user=user)
+            .values_list("department_id", "department__name", "department__code", "id")
+            .first()
+        )
+        return Access(*row) if row else NO_ACCESS
+    return NO_ACCESS
+
+
+def get_access(user):
+    """The cached ``Access`` of ``user``; a query only on the first request after a change."""
+    if not user.is_authenticated:
+        return NO_ACCESS
+    key = _access_key(user.pk)
+    access = cache.get(key)
+    if access is None:
+        access = _load_access(user)
+        cache.set(key, tuple(access), settings.ACCESS_CACHE_TIMEOUT)
+        return access
+    return Access(*access)
+
+
+def can_read(user, access, professor_id, department_id):
+    """
+    Whether ``user``, with ``access``, may read the files of a professor in
+    ``department_id``: their own, or any they review as superadmin or as
+    the department's admin.
+    """
+    return user.pk == professor_id or user.is_superuser or (
+        user.role == "DA" and department_id is not None and department_id == access.department_id
+    )
+
+
+async def aget_access(user):
+    return await sync_to_async(get_access)(user)
+
+
+def forget_access(*user_ids):
+    """
+    Drop the cached access of ``user_ids``, now and again on commit, so a
+    request that cached the old rows in between is not served afterwards.
+    """
+    keys = [_access_key(pk) for pk in user_ids if pk is not None]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def directory_version():
+    """
+    Version of the people and departments pages show next to submissions:
+    names, usernames and who is in which department.
+    """
+    return cache_version(DIRECTORY_VERSION_KEY)
+
+
+def bump_directory_version():
+    bump_cache_version(DIRECTORY_VERSION_KEY)
+
+
+async def aaccess(request):
+    if not hasattr(request, "_acached_access"):
+        request._acached_access = await aget_access(await request.auser())
+    return request._acached_access
+
+
+class AccessMiddleware:
+    """
+    Exposes the user's ``Access`` as ``request.access`` and their department
+    as ``request.department``, a ``Department`` with its id, name and code
+    loaded, or None. Both resolve on first use from a per-user cache entry, so
+    permission checks and department scoping cost no queries. Async code
+    awaits ``request.aaccess()`` instead. Must come after
+    ``AuthenticationMiddleware``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        self.attach(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        self.attach(request)
+        return await self.get_response(request)
+
+    def attach(self, request):
+        request.access = SimpleLazyObject(lambda: get_access(request.user))
+        request.department = SimpleLazyObject(lambda: request.access.department)
+        request.aaccess = partial(aaccess, request)
@@ -8,7 +8,9 @@ from .models import (
     WorkCategory,
     ProfessorWorkSubmission,
     Requirement,
-    FileSubmission
+    FileSubmission,
+    UploadSession,
+    Job,
 )
 
 admin.site.register(DepartmentAdminProfile)
@@ -20,3 +22,10 @@ admin.site.register(WorkCategory)
 admin.site.register(ProfessorWorkSubmission)
 admin.site.register(Requirement)
 admin.site.register(FileSubmission)
+admin.site.register(UploadSession)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "task", "status", "attempts", "run_at", "started_at", "finished_at")
+    list_filter = ("status", "task")
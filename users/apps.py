@@ -6,4 +6,6 @@ class UsersConfig(AppConfig):
     name = "users"
 
     def ready(self) -> None:
+        import users.checks
         import users.signals
+        import users.tasks
@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from .models import FileSubmission, ProfessorWorkSubmission
+from .previews import discard_preview
+from .storage import proof_file_storage
+from .utils import academic_year, academic_year_bounds
+
+ARCHIVE_BATCH_SIZE = 5000
+
+# Submissions in these states never change again.
+FINAL_STATUSES = ("SA", "DN")
+
+ARCHIVE_TABLE = f"{ProfessorWorkSubmission._meta.db_table}_archive"
+
+
+def is_partitioned(using):
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [ARCHIVE_TABLE])
+        return cursor.fetchone() is not None
+
+
+def ensure_archive_partition(year, using):
+    start, end = academic_year_bounds(year)
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {ARCHIVE_TABLE}_{year} PARTITION OF {ARCHIVE_TABLE} "
+            "FOR VALUES FROM (%s) TO (%s)",
+            [start, end],
+        )
+
+
+def archive_submissions(before_year=None, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Archive the finalized submissions of academic years before
+    ``before_year`` (default: the current one), in batches so no transaction
+    holds many rows at once. Returns how many rows moved. Submissions still
+    under review stay active however old they are.
+    """
+    cutoff, _ = academic_year_bounds(before_year or academic_year())
+    finalized = ProfessorWorkSubmission.objects.active().filter(status__in=FINAL_STATUSES, created_at__lt=cutoff)
+
+    using = finalized.db
+    if is_partitioned(using):
+        oldest = finalized.aggregate(oldest=Min("created_at"))["oldest"]
+        if oldest is not None:
+            for year in range(academic_year(oldest), academic_year(cutoff)):
+                ensure_archive_partition(year, using)
+
+    moved = 0
+    while True:
+        with transaction.atomic(using=using):
+            ids = list(finalized.values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                return moved
+            # On PostgreSQL this moves each row into its year's partition.
+            moved += finalized.filter(pk__in=ids).update(archived=True)
+
+
+def freeze_proof_files():
+    """
+    Move to cold storage the proof files used only by submissions finalized
+    more than ``COLD_STORAGE_AFTER_DAYS`` ago, so the hot disk holds only the
+    current review cycle. Returns how many blobs moved.
+    """
+    cutoff = timezone.now() - timedelta(days=settings.COLD_STORAGE_AFTER_DAYS)
+    settled = Q(work_submission__status__in=FINAL_STATUSES, work_submission__updated_at__lt=cutoff)
+    # Blobs are shared by content, and a blob still in review stays hot.
+    names = (
+        FileSubmission.objects.filter(settled)
+        .exclude(proof_file__in=FileSubmission.objects.exclude(settled).values("proof_file"))
+        .values_list("proof_file", flat=True)
+        .distinct()
+    )
+    frozen = 0
+    for name in names.iterator():
+        if proof_file_storage.is_hot(name):
+            discard_preview(name)
+            proof_file_storage.freeze(name)
+            frozen += 1
+    return frozen
@@ -0,0 +1,109 @@
+"""
+Static assets: a manifest storage that also writes gzip and brotli copies of
+every hashed file at ``collectstatic`` time, and a view that serves the best
+copy the client accepts. Hashed names change with their content, so they are
+served as immutable.
+"""
+import gzip
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .querybudget import query_budget
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".map", ".json", ".svg", ".txt", ".html", ".xml", ".ico", ".ttf", ".eot", ".otf"}
+
+# Variants in order of preference, with the Accept-Encoding token for each.
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def stored_name(self, name):
+        # Until collectstatic has written a manifest (development, tests),
+        # pages link the source names.
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if not dry_run:
+            for name in set(self.hashed_files.values()):
+                self.compress(name)
+
+    def compress(self, name):
+        """Write the variants of ``name`` that come out smaller. A hashed name's variants never go stale."""
+        if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+            return
+        path = self.path(name)
+        data = None
+        for encoding, suffix in ENCODINGS:
+            if (encoding == "br" and brotli is None) or os.path.exists(path + suffix):
+                continue
+            if data is None:
+                with open(path, "rb") as file:
+                    data = file.read()
+            compressed = _compress(data, encoding)
+            if len(compressed) < len(data) * 0.95:
+                with open(path + suffix, "wb") as file:
+                    file.write(compressed)
+
+
+def _accepted_encodings(request):
+    return {token.split(";")[0].strip() for token in request.headers.get("Accept-Encoding", "").split(",")}
+
+
+@query_budget(0)
+def serve_static(request, path):
+    """Serves collected static files, picking a precompressed copy when the client accepts one."""
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except ValueError:
+        raise Http404("Static file not found.")
+    if not os.path.isfile(full_path):
+        raise Http404("Static file not found.")
+
+    stat = os.stat(full_path)
+    if not was_modified_since(request.headers.get("If-Modified-Since"), stat.st_mtime):
+        return HttpResponseNotModified()
+
+    content_type, _ = mimetypes.guess_type(full_path)
+    accepted = _accepted_encodings(request)
+    served, encoding = full_path, None
+    for candidate, suffix in ENCODINGS:
+        if candidate in accepted and os.path.isfile(full_path + suffix):
+            served, encoding = full_path + suffix, candidate
+            break
+
+    response = FileResponse(
+        open(served, "rb"),
+        content_type=content_type or "application/octet-stream",
+        filename=os.path.basename(full_path),
+    )
+    if encoding:
+        response["Content-Encoding"] = encoding
+    patch_vary_headers(response, ["Accept-Encoding"])
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    if path in staticfiles_storage.hashed_files.values():
+        response["Cache-Control"] = f"public, max-age={settings.STATIC_CACHE_SECONDS}, immutable"
+    else:
+        response["Cache-Control"] = "public, max-age=0, must-revalidate"
+    return response
@@ -0,0 +1,111 @@
+"""
+Async versions of the submission listings and the ZIP download, routed in
+place of their ``views`` counterparts when ``ASYNC_VIEWS`` is on (see
+``vm1030.settings.asgi``). They must not touch the ORM lazily, so every
+relation the templates read is loaded up front.
+"""
+import os
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import PermissionDenied
+from django.db.models import F
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404, render
+from django.utils.text import slugify
+
+from .access import can_read
+from .bundles import cached_bundle, stream_and_cache_bundle
+from .conditional import conditional_page, department_approved_etag, my_submissions_etag, processing_etag
+from .models import ProfessorWorkSubmission
+from .pagination import akeyset_paginate
+from .querybudget import query_budget
+from .routers import replica_reads
+from .utils import aiter_in_thread, read_file_chunks
+
+
+async def _render_page(request, template_name, queryset):
+    request.user = await request.auser()
+    page = await akeyset_paginate(queryset.for_listing(), request)
+    context = {'submissions': page.object_list, 'page': page}
+    return await sync_to_async(render)(request, template_name, context)
+
+
+@query_budget(6)
+@replica_reads
+@conditional_page(processing_etag)
+async def list_processing_submissions(request):
+    return await _render_page(
+        request,
+        'users/processing_submissions_list.html',
+        ProfessorWorkSubmission.objects.active().filter(status="PR").prefetch_related("file_submissions"),
+    )
+
+
+@query_budget(5)
+@replica_reads
+@conditional_page(department_approved_etag)
+async def department_approved_submissions(request):
+    return await _render_page(
+        request,
+        'users/department_approved_submissions.html',
+        ProfessorWorkSubmission.objects.active().filter(status="DA"),
+    )
+
+
+@query_budget(4)
+@replica_reads
+async def all_submissions_list(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    return await _render_page(
+        request,
+        'users/all_submissions_list.html',
+        ProfessorWorkSubmission.objects.all(),
+    )
+
+
+@query_budget(6)
+@replica_reads
+@conditional_page(my_submissions_etag)
+async def my_submissions_list(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        raise Http404("No UniversityUser matches the given query.")
+    return await _render_page(
+        request,
+        'users/my_submissions_list.html',
+        ProfessorWorkSubmission.objects.filter(professor=user),
+    )
+
+
+@query_budget(5)
+async def download_submission(request, pk):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    submission = await aget_object_or_404(
+        ProfessorWorkSubmission.objects.select_related('professor').annotate(
+            department_id=F('professor__regular_user_profile__department_id')
+        ),
+        pk=pk,
+    )
+    if not can_read(user, await request.aaccess(), submission.professor_id, submission.department_id):
+        raise PermissionDenied
+    file_submissions = [f async for f in submission.file_submissions.all()]
+
+    bundle = cached_bundle(submission.pk, file_submissions)
+    if bundle is not None:
+        response = StreamingHttpResponse(
+            aiter_in_thread(read_file_chunks(bundle)), content_type='application/zip'
+        )
+        response['Content-Length'] = os.path.getsize(bundle)
+    else:
+        response = StreamingHttpResponse(
+            aiter_in_thread(stream_and_cache_bundle(submission.pk, file_submissions)),
+            content_type='application/zip',
+        )
+    zip_filename = f"{slugify(submission)}-files.zip"
+    response['Content-Disposition'] = f'attachment; filename="{zip_filename}"'
+    return response
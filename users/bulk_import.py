@@ -0,0 +1,165 @@
+import csv
+import io
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from .forms import ProfessorImportRowForm
+from .models import Department, DepartmentUserProfile, UniversityUser
+
+IMPORT_BATCH_SIZE = 500
+
+# Queries each batch of rows costs: a username and a phone number lookup, and
+# the user and profile inserts.
+QUERIES_PER_BATCH = 4
+
+# Below this many passwords a process pool costs more than it saves.
+POOL_THRESHOLD = 64
+
+
+class ProfessorImportError(Exception):
+    """Raised with every invalid row when an import is rejected. Nothing is written."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f"{len(errors)} invalid row(s)")
+
+
+def read_rows(file, name=""):
+    """
+    Rows of an uploaded or opened import file, as dicts. JSON is recognised
+    by a ``.json`` name or a leading ``[``; anything else is read as CSV.
+    """
+    data = file.read()
+    if isinstance(data, bytes):
+        data = data.decode("utf-8-sig")
+    if name.lower().endswith(".json") or data.lstrip().startswith("["):
+        rows = json.loads(data)
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ProfessorImportError([(0, "JSON imports must be a list of objects.")])
+        return rows
+    reader = csv.DictReader(io.StringIO(data))
+    try:
+        return list(reader)
+    except csv.Error as exc:
+        raise ProfessorImportError([(reader.line_num, f"CSV: {exc}")])
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _existing(field, values, batch_size):
+    existing = set()
+    for chunk in _chunks(sorted(values), batch_size):
+        existing.update(
+            UniversityUser.objects.filter(**{f"{field}__in": chunk}).values_list(field, flat=True)
+        )
+    return existing
+
+
+def validate_rows(rows, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Clean every row and check it against the file and the database.
+
+    Returns the cleaned rows with ``department`` resolved to a department id,
+    or raises ``ProfessorImportError`` listing every problem. Uniqueness and
+    departments are checked with a handful of set lookups instead of one
+    query per row.
+    """
+    errors = []
+    cleaned = []
+    for line, row in enumerate(rows, start=1):
+        form = ProfessorImportRowForm(row)
+        if form.is_valid():
+            cleaned.append((line, form.cleaned_data))
+        else:
+            for field, messages in form.errors.items():
+                errors.extend((line, f"{field}: {message}") for message in messages)
+
+    departments = dict(
+        Department.objects.filter(code__in={data["department"] for _, data in cleaned}).values_list(
+            "code", "id"
+        )
+    )
+    taken = {
+        field: _existing(field, {data[field] for _, data in cleaned}, batch_size)
+        for field in ("username", "phone_number")
+    }
+    seen = {"username": set(), "phone_number": set()}
+    for line, data in cleaned:
+        if data["department"] not in departments:
+            errors.append((line, f"department: unknown department code {data['department']!r}."))
+        else:
+            data["department"] = departments[data["department"]]
+        for field in seen:
+            if data[field] in taken[field]:
+                errors.append((line, f"{field}: {data[field]!r} already exists."))
+            elif data[field] in seen[field]:
+                errors.append((line, f"{field}: {data[field]!r} appears more than once in the file."))
+            seen[field].add(data[field])
+
+    if errors:
+        raise ProfessorImportError(sorted(errors))
+    return [data for _, data in cleaned]
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    ``make_password`` for every password. PBKDF2 is CPU bound, so large
+    imports spread it over a process pool of ``workers`` processes, the CPU
+    count by default, instead of hashing one at a time. The pool lives only
+    as long as the import, so web workers are not left holding idle
+    processes. ``workers=1`` hashes in this process.
+    """
+    if workers == 1 or len(passwords) < POOL_THRESHOLD:
+        return [make_password(password) for password in passwords]
+    workers = workers or os.cpu_count()
+    # Spawned, like the job workers: forked processes would share the
+    # parent's database connections.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=django.setup) as pool:
+        return list(pool.map(make_password, passwords, chunksize=max(len(passwords) // (workers * 4), 1)))
+
+
+def import_professors(rows, batch_size=IMPORT_BATCH_SIZE, workers=None):
+    """
+    Create a department user and profile for every row, all or nothing.
+
+    Users and profiles are inserted with ``bulk_create`` in batches inside
+    one transaction. ``bulk_create`` sends no ``post_save``, so the profiles
+    are built here rather than by ``signals.create_profile``. Returns the
+    number of professors created.
+    """
+    cleaned = validate_rows(rows, batch_size)
+    hashes = hash_passwords([data["password"] for data in cleaned], workers)
+
+    with transaction.atomic():
+        for batch in _chunks(list(zip(cleaned, hashes)), batch_size):
+            users = UniversityUser.objects.bulk_create(
+                UniversityUser(
+                    username=data["username"],
+                    password=password,
+                    first_name=data["first_name"],
+                    last_name=data["last_name"],
+                    phone_number=data["phone_number"],
+                    role="DU",
+                )
+                for data, password in batch
+            )
+            DepartmentUserProfile.objects.bulk_create(
+                DepartmentUserProfile(
+                    user=user,
+                    department_id=data["department"],
+                    birthdate=data["birthdate"],
+                    base_salary=data["base_salary"],
+                )
+                for user, (data, _) in zip(users, batch)
+            )
+    return len(cleaned)
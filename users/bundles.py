@@ -0,0 +1,68 @@
+import glob
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+
+from .utils import evict_least_recently_used, mark_used
+from .zipstream import stream_proof_files_zip
+
+
+def bundle_key(submission_id, file_submissions):
+    digest = hashlib.sha256()
+    for file_submission in sorted(file_submissions, key=lambda f: f.pk):
+        digest.update(f"{file_submission.pk}:{file_submission.updated_at.isoformat()};".encode())
+    return f"{submission_id}-{digest.hexdigest()[:32]}"
+
+
+def bundle_path(key):
+    return os.path.join(settings.SUBMISSION_BUNDLE_ROOT, f"{key}.zip")
+
+
+def cached_bundle(submission_id, file_submissions):
+    """Return the path of the cached bundle for this exact set of files, or None."""
+    path = bundle_path(bundle_key(submission_id, file_submissions))
+    return path if mark_used(path) else None
+
+
+def stream_and_cache_bundle(submission_id, file_submissions):
+    """
+    Stream the ZIP for ``file_submissions`` and tee it into the bundle cache.
+    The bundle only becomes visible once the archive is complete, so an
+    aborted download never leaves a truncated file behind.
+    """
+    path = bundle_path(bundle_key(submission_id, file_submissions))
+    os.makedirs(settings.SUBMISSION_BUNDLE_ROOT, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=settings.SUBMISSION_BUNDLE_ROOT, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            for chunk in stream_proof_files_zip(file_submissions):
+                tmp.write(chunk)
+                yield chunk
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    evict_bundles(keep=path)
+
+
+def build_bundle(submission):
+    file_submissions = list(submission.file_submissions.all())
+    if cached_bundle(submission.pk, file_submissions) is None:
+        for _ in stream_and_cache_bundle(submission.pk, file_submissions):
+            pass
+
+
+def invalidate_bundles(submission_id):
+    for path in glob.glob(os.path.join(settings.SUBMISSION_BUNDLE_ROOT, f"{submission_id}-*.zip")):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def evict_bundles(keep=None):
+    """Delete least recently used bundles until the cache fits its disk budget."""
+    paths = glob.glob(os.path.join(settings.SUBMISSION_BUNDLE_ROOT, "*.zip"))
+    evict_least_recently_used(paths, settings.SUBMISSION_BUNDLE_MAX_BYTES, keep)
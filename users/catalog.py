@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import WorkCategory
+from .utils import bump_cache_version, cache_version
+
+CATALOG_VERSION_KEY = "catalog:version"
+
+
+def catalog_version():
+    """Current catalog version; see ``utils.cache_version``."""
+    return cache_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    """Invalidate every cached catalog entry and fragment."""
+    bump_cache_version(CATALOG_VERSION_KEY)
+
+
+def get_catalog():
+    """All work categories with their requirements prefetched, and the version they belong to."""
+    version = catalog_version()
+    key = f"catalog:categories:{version}"
+    categories = cache.get(key)
+    if categories is None:
+        categories = list(WorkCategory.objects.prefetch_related("requirements"))
+        cache.set(key, categories, settings.CATALOG_CACHE_TIMEOUT)
+    return version, categories
+
+
+def get_catalog_category(pk):
+    version, categories = get_catalog()
+    for category in categories:
+        if category.pk == pk:
+            return version, category
+    return version, None
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS
+from django.core.checks import Error, Tags, register
+
+# Backends whose entries only the process that wrote them can see.
+PROCESS_LOCAL_CACHES = {"django.core.cache.backends.locmem.LocMemCache"}
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    The default cache holds the catalog and directory versions and the
+    per-user access entries every worker reads, so a bump or a dropped
+    entry has to reach all of them through it.
+    """
+    backend = settings.CACHES.get(DEFAULT_CACHE_ALIAS, {}).get("BACKEND")
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Error(
+            "The default cache is local to each process.",
+            hint=(
+                "Catalog changes and revoked department rights are only seen by the worker that made them. "
+                "Point CACHES at a cache every worker shares, such as Redis or memcached."
+            ),
+            obj=backend,
+            id="users.E001",
+        )
+    ]
@@ -0,0 +1,110 @@
+"""
+Conditional GET for pages reviewers keep refreshing. A page's ETag is
+derived from a cheap validator of the data it shows, and a request whose
+``If-None-Match`` still matches gets a 304 before the view runs.
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from .access import directory_version
+from .catalog import catalog_version
+from .models import ProfessorWorkSubmission
+
+
+def _etag(request, *parts):
+    # Pages show the user and carry CSRF tokens, so a login or a new CSRF
+    # cookie must not revalidate a page rendered for the old ones.
+    user = request.user
+    parts = (user.pk, request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""), request.get_full_path(), *parts)
+    return '"%s"' % hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def queryset_etag(queryset, request):
+    """
+    Validator of a listing: its row count and latest ``updated_at``, plus
+    the catalog and directory versions for the category, requirement,
+    professor and department names rendered with each row. The versions
+    are read from the shared default cache, so a bump made by any worker
+    moves the ETag in all of them. Every change to
+    the submissions themselves either moves a row in or out of the filter or
+    touches ``updated_at``; with an index on the filter columns and
+    ``updated_at`` this is an index-only query.
+    """
+    stats = queryset.order_by().aggregate(count=Count("*"), latest=Max("updated_at"))
+    return _etag(request, stats["count"], stats["latest"], catalog_version(), directory_version())
+
+
+def processing_etag(request):
+    return queryset_etag(ProfessorWorkSubmission.objects.active().filter(status="PR"), request)
+
+
+def department_approved_etag(request):
+    return queryset_etag(ProfessorWorkSubmission.objects.active().filter(status="DA"), request)
+
+
+def my_submissions_etag(request):
+    return queryset_etag(ProfessorWorkSubmission.objects.filter(professor_id=request.user.pk), request)
+
+
+def catalog_etag(request, *args, **kwargs):
+    # The catalog version moves on every category or requirement change.
+    return _etag(request, catalog_version())
+
+
+def _not_modified(request, etag):
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response.headers.setdefault("ETag", etag)
+    return response
+
+
+def conditional_page(etag_func):
+    """
+    Answer GET and HEAD requests with 304 when ``etag_func(request, *args,
+    **kwargs)`` matches ``If-None-Match``, without calling the view. Other
+    responses carry the ETag and ask browsers to revalidate every time.
+    Async views compute the ETag in a thread, with the user already loaded.
+    """
+
+    def decorator(view):
+        def finish(response, etag):
+            if response.status_code == 200:
+                response.headers.setdefault("ETag", etag)
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+        if iscoroutinefunction(view):
+
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                if request.method not in ("GET", "HEAD"):
+                    return await view(request, *args, **kwargs)
+                # Resolve the user once: request.user and auser() cache apart,
+                # so the ETag would otherwise load it a second time.
+                request.user = await request.auser()
+                etag = await sync_to_async(etag_func)(request, *args, **kwargs)
+                not_modified = _not_modified(request, etag)
+                if not_modified is not None:
+                    return not_modified
+                return finish(await view(request, *args, **kwargs), etag)
+
+        else:
+
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                if request.method not in ("GET", "HEAD"):
+                    return view(request, *args, **kwargs)
+                etag = etag_func(request, *args, **kwargs)
+                not_modified = _not_modified(request, etag)
+                if not_modified is not None:
+                    return not_modified
+                return finish(view(request, *args, **kwargs), etag)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,130 @@
+"""
+Single-file downloads. The view checks who may read the file; the bytes go
+out through the web server (``X-Accel-Redirect`` for nginx, ``X-Sendfile``
+for Apache and lighttpd) when ``SENDFILE_BACKEND`` is set, and otherwise
+through a ``FileResponse`` that the WSGI server can hand to ``sendfile()``.
+Both paths honour single byte ranges, so large scans can resume.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header, size):
+    """
+    The ``(start, end)`` inclusive byte range of a single-range ``Range``
+    header, None to send the whole file, or ``ValueError`` when the range
+    lies past the end. Multiple ranges are answered with the whole file.
+    """
+    match = RANGE_RE.match(header.replace(" ", ""))
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        # A suffix range: the last ``last`` bytes.
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start > end:
+        if start >= size:
+            raise ValueError(header)
+        return None
+    return start, end
+
+
+class FileRange:
+    """
+    A file object limited to ``length`` bytes from its current position.
+    ``fileno`` lets WSGI servers ``sendfile()`` it; they stop at the
+    response's Content-Length.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+        self.name = file.name
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def seekable(self):
+        return False
+
+    def close(self):
+        self.file.close()
+
+
+def _accel_url(path):
+    for root, location in settings.SENDFILE_LOCATIONS.items():
+        root = os.path.join(os.path.abspath(root), "")
+        if path.startswith(root):
+            return location + quote(path[len(root) :])
+    return None
+
+
+def sendfile(request, path, filename, etag):
+    """Serve the file at ``path`` as an attachment named ``filename``, versioned by ``etag``."""
+    stat = os.stat(path)
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        return not_modified
+
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(stat.st_mtime),
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private",
+    }
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    path = os.path.abspath(path)
+    backend = settings.SENDFILE_BACKEND
+    # The server answers Range and conditional requests itself.
+    if backend == "x-sendfile":
+        headers["X-Sendfile"] = path
+    elif backend == "x-accel-redirect":
+        url = _accel_url(path)
+        if url is not None:
+            headers["X-Accel-Redirect"] = url
+    if "X-Sendfile" in headers or "X-Accel-Redirect" in headers:
+        headers["Content-Disposition"] = content_disposition_header(True, filename)
+        return HttpResponse(content_type=content_type, headers=headers)
+
+    byte_range = None
+    if request.headers.get("If-Range", etag) == etag:
+        try:
+            byte_range = parse_range(request.headers.get("Range", ""), stat.st_size)
+        except ValueError:
+            return HttpResponse(status=416, headers={"Content-Range": f"bytes */{stat.st_size}"})
+
+    file = open(path, "rb")
+    options = {"as_attachment": True, "filename": filename, "content_type": content_type, "headers": headers}
+    if byte_range is None:
+        return FileResponse(file, **options)
+    start, end = byte_range
+    file.seek(start)
+    response = FileResponse(FileRange(file, end - start + 1), status=206, **options)
+    response["Content-Length"] = end - start + 1
+    response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+    return response
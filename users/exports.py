@@ -0,0 +1,107 @@
+import csv
+
+from django.utils import timezone
+
+from .models import ProfessorWorkSubmission
+from .utils import window_bounds
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_COLUMNS = (
+    "id",
+    "created_at",
+    "updated_at",
+    "professor",
+    "username",
+    "department",
+    "work_category",
+    "requirements",
+    "status",
+    "submission_description",
+    "action_description",
+)
+
+# Spreadsheet apps evaluate text cells starting with these as formulas, so
+# a name like "=HYPERLINK(...)" would run when the export is opened.
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def spreadsheet_safe(value):
+    """``value``, with text that would start a formula quoted so it stays text."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def submission_rows(start, end, chunk_size=EXPORT_CHUNK_SIZE, using=None):
+    """
+    Yield one export row per submission created in the inclusive date window.
+    ``iterator()`` reads through a server-side cursor on PostgreSQL and
+    prefetches requirements per chunk, so only ``chunk_size`` submissions are
+    in memory at a time. ``using`` fixes the database up front, for rows that
+    are read after the view has returned.
+    """
+    start_at, end_at = window_bounds(start, end)
+    submissions = (
+        ProfessorWorkSubmission.objects.db_manager(using).for_listing()
+        .filter(created_at__gte=start_at, created_at__lt=end_at)
+        .order_by("created_at", "id")
+    )
+    for submission in submissions.iterator(chunk_size=chunk_size):
+        professor = submission.professor
+        profile = getattr(professor, "regular_user_profile", None)
+        yield (
+            submission.pk,
+            timezone.localtime(submission.created_at).isoformat(),
+            timezone.localtime(submission.updated_at).isoformat(),
+            *map(
+                spreadsheet_safe,
+                (
+                    f"{professor.first_name} {professor.last_name}",
+                    professor.username,
+                    profile.department.name if profile else "",
+                    submission.work_category.name if submission.work_category else "",
+                    "; ".join(requirement.name or "" for requirement in submission.requirements.all()),
+                    submission.get_status_display(),
+                    submission.submission_description or "",
+                    submission.action_description or "",
+                ),
+            ),
+        )
+
+
+class _Echo:
+    """File-like object whose ``write`` hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def write_csv(rows, file):
+    writer = csv.writer(file)
+    writer.writerow(EXPORT_COLUMNS)
+    writer.writerows(rows)
+
+
+def write_xlsx(rows, file):
+    """
+    Write ``rows`` as an XLSX workbook in openpyxl's write-only mode, which
+    streams rows to disk instead of keeping the sheet in memory. openpyxl
+    stores any text starting with "=" as a formula, so cells are made safe
+    here too.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Submissions")
+    sheet.append(EXPORT_COLUMNS)
+    for row in rows:
+        sheet.append([spreadsheet_safe(value) for value in row])
+    workbook.save(file)
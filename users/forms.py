@@ -1,4 +1,5 @@
 from django import forms
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.forms.models import inlineformset_factory
 
 from .models import UniversityUser, Department, WorkCategory, Requirement
@@ -55,4 +56,20 @@ class WorkCategoryEditForm(forms.ModelForm):
 RequirementEditFormset = inlineformset_factory(
     WorkCategory, 
     Requirement, 
-    fields=['name', 'description', 'max_percentage_increase'], extra=6)
\ No newline at end of file
+    fields=['name', 'description', 'max_percentage_increase'], extra=6)
+
+class ProfessorImportRowForm(forms.Form):
+    """One row of a bulk professor import. ``department`` is the department code."""
+
+    username = forms.CharField(max_length=150, validators=[UnicodeUsernameValidator()])
+    password = forms.CharField()
+    first_name = forms.CharField(max_length=150)
+    last_name = forms.CharField(max_length=150)
+    phone_number = forms.CharField(max_length=12)
+    department = forms.CharField(max_length=150)
+    birthdate = forms.DateField(required=False)
+    base_salary = forms.DecimalField(max_digits=10, decimal_places=2, required=False)
+
+
+class ProfessorImportForm(forms.Form):
+    file = forms.FileField(help_text="CSV with a header row, or a JSON list of objects.")
@@ -0,0 +1,296 @@
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connections, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Job
+from .uploads import purge_stale_sessions
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+PRUNE_INTERVAL = 3600
+
+
+def task(name, max_attempts=5):
+    """Register a function as the job task ``name``. Its payload is passed as keyword arguments."""
+
+    def register(func):
+        TASKS[name] = (func, max_attempts)
+        return func
+
+    return register
+
+
+def enqueue(name, run_at=None, **payload):
+    """
+    Queue ``name`` to run with ``payload``. The job row is written in the
+    caller's transaction, so it only becomes visible if that commits.
+    """
+    if name not in TASKS:
+        raise ValueError(f"Unknown task {name!r}.")
+    return Job.objects.create(
+        task=name,
+        payload=payload,
+        max_attempts=TASKS[name][1],
+        run_at=run_at or timezone.now(),
+    )
+
+
+def _stale(now):
+    # Running jobs whose worker stopped sending heartbeats.
+    return Q(status="RU", heartbeat_at__lt=now - timedelta(seconds=settings.JOB_TIMEOUT_SECONDS))
+
+
+def _due(now):
+    # Stale jobs are picked up again after the timeout, while they have
+    # attempts left.
+    return Q(status="QU", run_at__lte=now) | (_stale(now) & Q(attempts__lt=F("max_attempts")))
+
+
+def fail_exhausted_jobs(now):
+    """
+    Fail stale jobs that have used up their attempts, as ``finish_job``
+    fails jobs that keep raising: one that keeps killing its worker would
+    otherwise be reclaimed forever.
+    """
+    failed = Job.objects.filter(_stale(now), attempts__gte=F("max_attempts")).update(
+        status="FA", finished_at=now, last_error="The worker running this job stopped responding."
+    )
+    if failed:
+        logger.error("%d job(s) failed for good: their workers stopped responding on every attempt.", failed)
+    return failed
+
+
+def claim_jobs(worker, limit):
+    """
+    Claim up to ``limit`` due jobs for ``worker``. ``SKIP LOCKED`` lets
+    concurrent workers pass over each other's rows instead of queueing on
+    them; the claim token makes the claim safe on SQLite too, which has no
+    row locks.
+    """
+    now = timezone.now()
+    token = f"{worker}:{uuid.uuid4().hex[:12]}"
+    fail_exhausted_jobs(now)
+    with transaction.atomic():
+        ids = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(_due(now))
+            .order_by("run_at", "id")
+            .values_list("pk", flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        Job.objects.filter(_due(now), pk__in=ids).update(
+            status="RU", claimed_by=token, started_at=now, heartbeat_at=now, attempts=F("attempts") + 1
+        )
+    return list(Job.objects.filter(claimed_by=token, status="RU"))
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter, so failed jobs don't retry in lockstep."""
+    delay = min(settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.JOB_RETRY_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.5, 1.5))
+
+
+def finish_job(job, error=None):
+    """Record the outcome of a claimed job: done, queued for a retry, or failed."""
+    now = timezone.now()
+    if error is None:
+        changes = {"status": "DO", "finished_at": now, "last_error": ""}
+    elif job.attempts >= job.max_attempts:
+        changes = {"status": "FA", "finished_at": now, "last_error": error}
+        logger.error("Job %s failed for good after %d attempts:\n%s", job, job.attempts, error)
+    else:
+        changes = {"status": "QU", "run_at": now + retry_delay(job.attempts), "last_error": error}
+    # A job reclaimed as stale belongs to its new claimer now.
+    Job.objects.filter(pk=job.pk, claimed_by=job.claimed_by).update(**changes)
+
+
+def execute(name, payload):
+    """Run one task. Returns None on success, or the traceback."""
+    try:
+        func, _ = TASKS[name]
+    except KeyError:
+        return traceback.format_exc()
+    return _call(func, payload)
+
+
+def _call(func, payload):
+    try:
+        func(**payload)
+        return None
+    except Exception:
+        return traceback.format_exc()
+
+
+def _execute_in_pool(func, payload):
+    # Pool processes keep their connections between jobs, as request
+    # handlers do between requests.
+    close_old_connections()
+    try:
+        return _call(func, payload)
+    finally:
+        close_old_connections()
+
+
+def prune_jobs():
+    cutoff = timezone.now() - timedelta(days=settings.JOB_RETENTION_DAYS)
+    Job.objects.filter(status="DO", finished_at__lt=cutoff).delete()
+
+
+def queue_stats(sample_size=1000):
+    """Queue depth per task and status, and wait/run time percentiles of recent jobs."""
+    now = timezone.now()
+    depth = {}
+    for name, status, count in Job.objects.values_list("task", "status").annotate(count=Count("id")).order_by():
+        depth.setdefault(name, {"QU": 0, "RU": 0, "DO": 0, "FA": 0})[status] = count
+    oldest_due = (
+        Job.objects.filter(status="QU", run_at__lte=now).order_by("run_at").values_list("run_at", flat=True).first()
+    )
+    recent = Job.objects.filter(status="DO").order_by("-finished_at").values_list("run_at", "started_at", "finished_at")[
+        :sample_size
+    ]
+    waits = sorted((started - run_at).total_seconds() for run_at, started, _ in recent)
+    runs = sorted((finished - started).total_seconds() for _, started, finished in recent)
+
+    def percentiles(values):
+        if not values:
+            return None
+        pick = lambda p: values[min(int(p / 100 * len(values)), len(values) - 1)]
+        return {"p50": pick(50), "p95": pick(95), "max": values[-1]}
+
+    return {
+        "depth": dict(sorted(depth.items())),
+        "oldest_due_seconds": (now - oldest_due).total_seconds() if oldest_due else None,
+        "wait": percentiles(waits),
+        "run": percentiles(runs),
+        "sample_size": len(recent),
+    }
+
+
+class Worker:
+    """
+    Claims jobs and runs them in a pool of ``processes`` processes, or inline
+    when ``processes`` is 0. The parent does all the bookkeeping; pool
+    processes only run task code.
+    """
+
+    def __init__(self, processes=None, poll_seconds=None):
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.processes = os.cpu_count() if processes is None else processes
+        self.poll_seconds = settings.JOB_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self.stopping = False
+        self.last_prune = 0
+
+    def stop(self, *args):
+        self.stopping = True
+
+    def heartbeat(self):
+        """Mark this worker's running jobs as alive, so no other worker reclaims them."""
+        return Job.objects.filter(status="RU", claimed_by__startswith=f"{self.name}:").update(
+            heartbeat_at=timezone.now()
+        )
+
+    def _beat(self, stopped):
+        # Several beats fit in one timeout, so a missed one or a slow
+        # database doesn't get live jobs reclaimed.
+        try:
+            while not stopped.wait(settings.JOB_TIMEOUT_SECONDS / 4):
+                close_old_connections()
+                try:
+                    self.heartbeat()
+                except DatabaseError:
+                    logger.exception("Job heartbeat failed.")
+        finally:
+            connections.close_all()
+
+    def _prune(self):
+        if time.monotonic() - self.last_prune > PRUNE_INTERVAL:
+            prune_jobs()
+            purge_stale_sessions()
+            self.last_prune = time.monotonic()
+
+    def run_inline(self, burst=False):
+        while not self.stopping:
+            self._prune()
+            jobs = claim_jobs(self.name, 1)
+            if not jobs:
+                if burst:
+                    return
+                time.sleep(self.poll_seconds)
+                continue
+            finish_job(jobs[0], execute(jobs[0].task, jobs[0].payload))
+
+    def run(self, burst=False):
+        """Work until stopped, or until the queue is empty when ``burst`` is set."""
+        stopped = threading.Event()
+        beat = threading.Thread(target=self._beat, args=(stopped,), name="job-heartbeat", daemon=True)
+        beat.start()
+        try:
+            if self.processes == 0:
+                return self.run_inline(burst)
+            return self._run_processes(burst)
+        finally:
+            stopped.set()
+            beat.join()
+
+    def _run_processes(self, burst):
+        # Spawned rather than forked: a forked process would inherit, and on
+        # closing tear down, the parent's database connections.
+        context = multiprocessing.get_context("spawn")
+        while not self.stopping:
+            with ProcessPoolExecutor(self.processes, mp_context=context, initializer=django.setup) as pool:
+                if self._run_pool(pool, burst):
+                    return
+
+    def _run_pool(self, pool, burst):
+        running = {}
+        while not (self.stopping and not running):
+            self._prune()
+            if not self.stopping and len(running) < self.processes:
+                for job in claim_jobs(self.name, self.processes - len(running)):
+                    if job.task not in TASKS:
+                        finish_job(job, f"Unknown task {job.task!r}.")
+                        continue
+                    # Tasks are pickled by reference, so the pool process
+                    # imports the task's module itself.
+                    running[pool.submit(_execute_in_pool, TASKS[job.task][0], job.payload)] = job
+            if not running:
+                if burst:
+                    return True
+                time.sleep(self.poll_seconds)
+                continue
+
+            done, _ = wait(running, timeout=self.poll_seconds, return_when=FIRST_COMPLETED)
+            broken = False
+            for future in done:
+                job = running.pop(future)
+                try:
+                    error = future.result()
+                except BrokenProcessPool:
+                    error = "The worker process running this job died."
+                    broken = True
+                finish_job(job, error)
+            if broken:
+                # Every job left in a broken pool is lost; give them back and
+                # start a fresh pool.
+                for job in running.values():
+                    finish_job(job, "The worker process pool broke.")
+                return False
+        return True
@@ -0,0 +1,560 @@
+import io
+import itertools
+import math
+import random
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from http.cookies import SimpleCookie
+from typing import NamedTuple, Optional
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.sessions.models import Session
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.models import Count, Max
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from .catalog import bump_catalog_version
+from .models import (
+    Department,
+    DepartmentUserProfile,
+    FileSubmission,
+    Job,
+    ProfessorWorkSubmission,
+    Requirement,
+    SubmissionCounter,
+    UniversityUser,
+    UploadChunk,
+    UploadSession,
+    WorkCategory,
+)
+from .search import refresh_search_vectors
+from .storage import proof_file_storage
+from .uploads import allocate_part, part_path
+
+LOAD_PASSWORD = "load-test"
+
+# Share of seeded submissions per status, roughly what a term looks like.
+STATUS_WEIGHTS = {"PR": 40, "DA": 20, "SA": 30, "DN": 10}
+
+PROOF_EXTENSIONS = (".pdf", ".jpg", ".docx")
+
+LAST_NAMES = ("Valiyev", "Karimov", "Rashidov", "Yusupova", "Tursunov", "Aliyeva", "Nazarov", "Ergasheva")
+FIRST_NAMES = ("Ali", "Olim", "Dilnoza", "Jasur", "Malika", "Sardor", "Nodira", "Bekzod")
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def _phone_number(prefix, n):
+    # Twelve characters, unique per prefix, clear of the numbers people type in.
+    return f"9{zlib.crc32(prefix.encode()) % 10**4:04d}{n:07d}"
+
+
+def _file_size(rng, mean):
+    # Scans and photos are skewed: most are small, a few are huge.
+    return max(1024, int(rng.lognormvariate(math.log(mean) - 0.5, 1.0)))
+
+
+def seed_dataset(
+    prefix="load",
+    departments=5,
+    professors_per_department=20,
+    categories=6,
+    requirements_per_category=4,
+    submissions_per_professor=5,
+    mean_file_size=128 * 1024,
+    seed=0,
+):
+    """
+    Create a benchmark dataset whose usernames and department codes start with
+    ``prefix``: a superadmin, departments with professors and profiles, work
+    categories with requirements, submissions spread over the past year, and
+    random proof files of lognormal sizes in the proof file storage.
+
+    Rows go in with ``bulk_create``, so the counters, search vectors and
+    catalog version are brought up to date at the end. Returns row counts.
+    """
+    rng = random.Random(seed)
+    if Department.objects.filter(code__startswith=f"{prefix}-").exists():
+        raise ValueError(f"A dataset with the prefix {prefix!r} already exists.")
+
+    password = make_password(LOAD_PASSWORD)
+    now = timezone.now()
+    with transaction.atomic():
+        UniversityUser.objects.create_superuser(
+            f"{prefix}-admin", password=LOAD_PASSWORD, phone_number=_phone_number(prefix, 0), role="SA"
+        )
+        department_rows = Department.objects.bulk_create(
+            Department(name=f"{prefix} department {d}", code=f"{prefix}-{d}") for d in range(departments)
+        )
+        professors = UniversityUser.objects.bulk_create(
+            UniversityUser(
+                username=f"{prefix}-prof-{d}-{p}",
+                password=password,
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                phone_number=_phone_number(prefix, 1 + d * professors_per_department + p),
+                role="DU",
+            )
+            for d in range(departments)
+            for p in range(professors_per_department)
+        )
+        DepartmentUserProfile.objects.bulk_create(
+            DepartmentUserProfile(
+                user=professor,
+                department=department_rows[i // professors_per_department],
+                base_salary=rng.randrange(800, 3000),
+            )
+            for i, professor in enumerate(professors)
+        )
+        category_rows = WorkCategory.objects.bulk_create(
+            WorkCategory(name=f"{prefix} category {c}", max_percentage=rng.choice((10, 20, 30)))
+            for c in range(categories)
+        )
+        requirement_rows = Requirement.objects.bulk_create(
+            Requirement(
+                work_category=category,
+                name=f"{category.name} requirement {r}",
+                description=f"Proof for requirement {r}",
+                max_percentage_increase=rng.choice((2, 5, 10)),
+            )
+            for category in category_rows
+            for r in range(requirements_per_category)
+        )
+        requirements_by_category = {}
+        for requirement in requirement_rows:
+            requirements_by_category.setdefault(requirement.work_category_id, []).append(requirement)
+
+        submissions = ProfessorWorkSubmission.objects.bulk_create(
+            ProfessorWorkSubmission(
+                professor=professor,
+                work_category=rng.choice(category_rows),
+                status=rng.choices(list(STATUS_WEIGHTS), weights=STATUS_WEIGHTS.values())[0],
+                submission_description=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} hisoboti",
+            )
+            for professor in professors
+            for _ in range(submissions_per_professor)
+        )
+        for submission in submissions:
+            submission.created_at = now - timedelta(seconds=rng.randrange(365 * 24 * 3600))
+        ProfessorWorkSubmission.objects.bulk_update(submissions, ["created_at"], batch_size=500)
+
+        links = []
+        file_submissions = []
+        for submission in submissions:
+            chosen = rng.sample(
+                requirements_by_category[submission.work_category_id],
+                rng.randint(1, min(3, requirements_per_category)),
+            )
+            for requirement in chosen:
+                links.append(
+                    ProfessorWorkSubmission.requirements.through(
+                        professorworksubmission=submission, requirement=requirement
+                    )
+                )
+                ext = rng.choice(PROOF_EXTENSIONS)
+                data = rng.randbytes(_file_size(rng, mean_file_size))
+                file_submissions.append(
+                    FileSubmission(
+                        proof_file=proof_file_storage.save(f"proof{ext}", ContentFile(data)),
+                        original_filename=f"{requirement.pk}{ext}",
+                        requirement=requirement,
+                        work_submission=submission,
+                    )
+                )
+        ProfessorWorkSubmission.requirements.through.objects.bulk_create(links, batch_size=500)
+        FileSubmission.objects.bulk_create(file_submissions, batch_size=500)
+
+    SubmissionCounter.rebuild()
+    refresh_search_vectors(ProfessorWorkSubmission.objects.filter(professor__username__startswith=f"{prefix}-"))
+    bump_catalog_version()
+    return {
+        "departments": len(department_rows),
+        "professors": len(professors),
+        "work_categories": len(category_rows),
+        "requirements": len(requirement_rows),
+        "submissions": len(submissions),
+        "proof_files": len(file_submissions),
+    }
+
+
+class BenchmarkRequest(NamedTuple):
+    method: str
+    path: str
+    body: bytes = b""
+    content_type: Optional[str] = None
+    # "admin", "professor", a raw session key, or None for anonymous.
+    session: Optional[str] = "admin"
+
+
+def _multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, data) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n".encode()
+            + data
+            + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def _form(fields):
+    return urlencode(fields, doseq=True).encode(), "application/x-www-form-urlencoded"
+
+
+class BenchmarkFixture:
+    """
+    The seeded rows, sessions and pre-built uploads the scenarios draw from.
+    Everything that touches the database happens here, before the clock runs.
+    The transition scenarios need submissions in PR and DA; ``restore`` puts
+    the seeded statuses back once the run is over and deletes every row the
+    run added, so repeated runs measure the same data.
+    """
+
+    def __init__(self, base_url, prefix, requests):
+        self.base_url = base_url
+        self.admin = UniversityUser.objects.get(username=f"{prefix}-admin")
+        submissions = ProfessorWorkSubmission.objects.filter(professor__username__startswith=f"{prefix}-prof-")
+        busiest = (
+            submissions.values_list("professor", flat=True)
+            .annotate(count=Count("id"))
+            .order_by("-count", "professor")
+            .first()
+        )
+        if busiest is None:
+            raise ValueError(f"No seeded submissions with the prefix {prefix!r}; run seed_load first.")
+        self.professor = UniversityUser.objects.select_related("regular_user_profile").get(pk=busiest)
+        self.department_id = self.professor.regular_user_profile.department_id
+        own = list(submissions.filter(professor=self.professor).select_related("work_category"))
+        self.own_submission = own[0]
+        self.requirement = Requirement.objects.filter(work_category=self.own_submission.work_category).first()
+        self.category_id = self.own_submission.work_category_id
+        # What exists before the fixture and the run add to it.
+        self.last_ids = {
+            model: model.objects.aggregate(last=Max("pk"))["last"] or 0
+            for model in (ProfessorWorkSubmission, FileSubmission, Job)
+        }
+        self.seeded_uploads = set(UploadSession.objects.filter(professor=self.professor).values_list("pk", flat=True))
+        self.last_names = list(submissions.values_list("professor__last_name", flat=True).distinct())
+
+        ids = list(submissions.order_by("pk").values_list("pk", flat=True))
+        self.downloads = list(
+            FileSubmission.objects.filter(work_submission__in=ids).values_list("work_submission", flat=True).distinct()
+        )
+        scan = self._scan()
+        self.preview = scan.preview_url
+        self.file_download = reverse("users:download_file", args=[scan.pk])
+        self.processing, self.approved = ids[: len(ids) // 2], ids[len(ids) // 2 :]
+        self.sessions = {"admin": self._session(self.admin), "professor": self._session(self.professor)}
+        self.logout_sessions = [self._session(self.admin) for _ in range(requests)]
+        self.chunk = random.Random(0).randbytes(UPLOAD_CHUNK_SIZE)
+        self.open_uploads = [self._upload_session(complete=False) for _ in range(min(requests, 50))]
+        self.complete_uploads = [self._upload_session(complete=True) for _ in range(requests)]
+        self.csrf_token = self._csrf_token()
+
+        self.seeded_statuses = {}
+        for pk, status in submissions.values_list("pk", "status"):
+            self.seeded_statuses.setdefault(status, []).append(pk)
+        with transaction.atomic():
+            ProfessorWorkSubmission.objects.filter(pk__in=self.processing).update(status="PR")
+            ProfessorWorkSubmission.objects.filter(pk__in=self.approved).update(status="DA")
+        SubmissionCounter.rebuild()
+
+    def restore(self):
+        """
+        Put the seeded submissions back in the statuses they had before the
+        run, and delete the scan, upload sessions, submissions, jobs and
+        sessions the fixture and the run created.
+        """
+        with transaction.atomic():
+            for status, ids in self.seeded_statuses.items():
+                ProfessorWorkSubmission.objects.filter(pk__in=ids).update(status=status)
+            UploadSession.objects.filter(professor=self.professor).exclude(pk__in=self.seeded_uploads).delete()
+            FileSubmission.objects.filter(
+                pk__gt=self.last_ids[FileSubmission], work_submission__professor=self.professor
+            ).delete()
+            ProfessorWorkSubmission.objects.filter(
+                pk__gt=self.last_ids[ProfessorWorkSubmission], professor=self.professor
+            ).delete()
+            Job.objects.filter(pk__gt=self.last_ids[Job]).delete()
+            Session.objects.filter(session_key__in=[*self.sessions.values(), *self.logout_sessions]).delete()
+        SubmissionCounter.rebuild()
+
+    def _session(self, user):
+        client = Client()
+        client.force_login(user)
+        return client.cookies[settings.SESSION_COOKIE_NAME].value
+
+    def _scan(self):
+        # Seeded proofs are random bytes, so previews get one real image.
+        image = io.BytesIO()
+        Image.effect_noise((1600, 1200), 64).convert("RGB").save(image, "PNG")
+        return FileSubmission.objects.create(
+            proof_file=ContentFile(image.getvalue(), name="scan.png"),
+            original_filename="scan.png",
+            requirement=self.requirement,
+            work_submission=self.own_submission,
+        )
+
+    def _upload_session(self, complete):
+        session = UploadSession.objects.create(
+            professor=self.professor,
+            work_submission=self.own_submission,
+            requirement=self.requirement,
+            filename="scan.pdf",
+            size=UPLOAD_CHUNK_SIZE,
+        )
+        allocate_part(session)
+        if complete:
+            with open(part_path(session), "r+b") as part:
+                part.write(self.chunk)
+            UploadChunk.objects.create(session=session, offset=0, length=UPLOAD_CHUNK_SIZE)
+        return session.pk
+
+    def _csrf_token(self):
+        status, headers = _send(_connect(self.base_url), "GET", reverse("users:login"), b"", {})
+        cookies = SimpleCookie()
+        for name, value in headers:
+            if name.lower() == "set-cookie":
+                cookies.load(value)
+        if settings.CSRF_COOKIE_NAME not in cookies:
+            raise ValueError(f"{self.base_url} answered the login page with {status} and no CSRF cookie.")
+        return cookies[settings.CSRF_COOKIE_NAME].value
+
+    def headers(self, request):
+        cookies = [f"{settings.CSRF_COOKIE_NAME}={self.csrf_token}"]
+        session = self.sessions.get(request.session, request.session)
+        if session:
+            cookies.append(f"{settings.SESSION_COOKIE_NAME}={session}")
+        headers = {"Cookie": "; ".join(cookies), "X-CSRFToken": self.csrf_token}
+        if request.content_type:
+            headers["Content-Type"] = request.content_type
+        return headers
+
+
+def _get(name, *args, session="admin", query=""):
+    path = reverse(f"users:{name}", args=args)
+    return lambda fx, i: BenchmarkRequest("GET", path + query, session=session)
+
+
+def _transition(name, pool):
+    def build(fx, i):
+        ids = getattr(fx, pool)
+        return BenchmarkRequest("POST", reverse(f"users:{name}", args=[ids[i % len(ids)]]))
+
+    return build
+
+
+def _bulk_transition(fx, i):
+    start = (i * 10) % len(fx.processing)
+    body, content_type = _form({"transition": "approve", "ids": fx.processing[start : start + 10]})
+    return BenchmarkRequest("POST", reverse("users:bulk_transition"), body, content_type)
+
+
+def _login(fx, i):
+    body, content_type = _form(
+        {"username": fx.admin.username, "password": LOAD_PASSWORD, "csrfmiddlewaretoken": fx.csrf_token}
+    )
+    return BenchmarkRequest("POST", reverse("users:login"), body, content_type, session=None)
+
+
+def _logout(fx, i):
+    return BenchmarkRequest("POST", reverse("users:logout"), session=fx.logout_sessions[i % len(fx.logout_sessions)])
+
+
+def _process_submission(fx, i):
+    body, content_type = _multipart(
+        {"category_id": fx.category_id},
+        {f"requirement_{fx.requirement.pk}": (f"bench-{i}.pdf", fx.chunk[:-8] + i.to_bytes(8, "big"))},
+    )
+    return BenchmarkRequest("POST", reverse("users:process_submission"), body, content_type, "professor")
+
+
+def _create_upload_session(fx, i):
+    body, content_type = _form(
+        {
+            "submission_id": fx.own_submission.pk,
+            "requirement_id": fx.requirement.pk,
+            "filename": "scan.pdf",
+            "size": UPLOAD_CHUNK_SIZE,
+        }
+    )
+    return BenchmarkRequest("POST", reverse("users:create_upload_session"), body, content_type, "professor")
+
+
+def _upload_chunk(fx, i):
+    session_id = fx.open_uploads[i % len(fx.open_uploads)]
+    path = reverse("users:upload_session", args=[session_id]) + "?offset=0"
+    return BenchmarkRequest("PUT", path, fx.chunk, "application/octet-stream", "professor")
+
+
+def _finalize_upload(fx, i):
+    session_id = fx.complete_uploads[i % len(fx.complete_uploads)]
+    return BenchmarkRequest("POST", reverse("users:finalize_upload_session", args=[session_id]), session="professor")
+
+
+def _download(fx, i):
+    return BenchmarkRequest("GET", reverse("users:download_submission", args=[fx.downloads[i % len(fx.downloads)]]))
+
+
+def _search(fx, i):
+    query = urlencode({"q": fx.last_names[i % len(fx.last_names)]})
+    return BenchmarkRequest("GET", reverse("users:submission_search") + "?" + query)
+
+
+def _category(name):
+    return lambda fx, i: BenchmarkRequest("GET", reverse(f"users:{name}", args=[fx.category_id]))
+
+
+# One request builder per URL name in users/urls.py. Builders get the fixture
+# and the request's index within its route and must not touch the database.
+SCENARIOS = {
+    "create_department": _get("create_department"),
+    "create_department_user": _get("create_department_user"),
+    "import_department_users": _get("import_department_users"),
+    "department_list": _get("department_list"),
+    "create_work_category": _get("create_work_category"),
+    "work_categories": _get("work_categories"),
+    "workcategory_detail": _category("workcategory_detail"),
+    "workcategory_edit": _category("workcategory_edit"),
+    "work_submission": _get("work_submission", session="professor"),
+    "process_submission": _process_submission,
+    "create_upload_session": _create_upload_session,
+    "upload_session": _upload_chunk,
+    "finalize_upload_session": _finalize_upload,
+    "list_processing_submissions": _get("list_processing_submissions"),
+    "download_submission": _download,
+    "download_file": lambda fx, i: BenchmarkRequest("GET", fx.file_download),
+    "preview_file": lambda fx, i: BenchmarkRequest("GET", fx.preview),
+    "approve_submission": _transition("approve_submission", "processing"),
+    "decline_submission": _transition("decline_submission", "processing"),
+    "approved_submissions": _get("approved_submissions"),
+    "approve_submission_da": _transition("approve_submission_da", "approved"),
+    "decline_submission_da": _transition("decline_submission_da", "approved"),
+    "bulk_transition": _bulk_transition,
+    "submission_search": _search,
+    "export_submissions": _get("export_submissions"),
+    "payroll_export": _get("payroll_export"),
+    "job_queue": _get("job_queue"),
+    "all_submissions_list": _get("all_submissions_list"),
+    "my_submissions_list": _get("my_submissions_list", session="professor"),
+    "admin_dashboard": _get("admin_dashboard"),
+    "department_admin_dashboard": lambda fx, i: BenchmarkRequest(
+        "GET", reverse("users:department_admin_dashboard", args=[fx.department_id])
+    ),
+    "login": _login,
+    "logout": _logout,
+}
+
+
+def _connect(base_url):
+    parts = urlsplit(base_url)
+    connection_class = HTTPSConnection if parts.scheme == "https" else HTTPConnection
+    return connection_class(parts.hostname, parts.port, timeout=60)
+
+
+def _send(conn, method, path, body, headers):
+    conn.request(method, path, body=body, headers=headers)
+    response = conn.getresponse()
+    response.read()
+    return response.status, response.getheaders()
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    return sorted_values[max(math.ceil(p / 100 * len(sorted_values)) - 1, 0)]
+
+
+def run_route(fixture, build, requests, concurrency):
+    """
+    Send ``requests`` requests built by ``build`` from ``concurrency``
+    threads, each on its own keep-alive connection, and summarise them.
+    """
+    counter = itertools.count()
+    latencies = []
+    statuses = Counter()
+    lock = threading.Lock()
+
+    def worker():
+        conn = _connect(fixture.base_url)
+        while (i := next(counter)) < requests:
+            request = build(fixture, i)
+            headers = fixture.headers(request)
+            start = time.perf_counter()
+            try:
+                status, _ = _send(conn, request.method, request.path, request.body, headers)
+            except (OSError, HTTPException):
+                conn.close()
+                conn = _connect(fixture.base_url)
+                status = 0
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] += 1
+        conn.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    ms = lambda seconds: None if seconds is None else round(seconds * 1000, 2)
+    return {
+        "requests": requests,
+        "errors": sum(count for status, count in statuses.items() if not 200 <= status < 400),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "throughput_rps": round(requests / wall, 2) if wall else None,
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+    }
+
+
+def run_benchmark(base_url, prefix="load", requests=100, concurrency=8, routes=None):
+    """
+    Benchmark every route in ``SCENARIOS`` (or just ``routes``) against a
+    running server that shares this process's database and media settings.
+    Returns a JSON-serialisable report.
+    """
+    names = routes or list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        raise ValueError(f"Unknown routes: {', '.join(sorted(unknown))}")
+
+    fixture = BenchmarkFixture(base_url, prefix, requests)
+    report = {
+        "base_url": base_url,
+        "database": connection.vendor,
+        "concurrency": concurrency,
+        "requests_per_route": requests,
+        "started_at": timezone.now().isoformat(),
+        "routes": {},
+    }
+    try:
+        for name in names:
+            report["routes"][name] = run_route(fixture, SCENARIOS[name], requests, concurrency)
+    finally:
+        fixture.restore()
+    return report
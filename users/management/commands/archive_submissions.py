@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from users.archive import archive_submissions
+
+
+class Command(BaseCommand):
+    help = "Move finalized submissions of past academic years out of the active partition."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--before-year",
+            type=int,
+            help="Archive academic years that start before this year. Defaults to the current academic year.",
+        )
+
+    def handle(self, *args, **options):
+        moved = archive_submissions(options["before_year"])
+        self.stdout.write(f"Archived {moved} submissions.")
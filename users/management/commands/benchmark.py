@@ -0,0 +1,46 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.loadtest import SCENARIOS, run_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every route against a running server that uses this database, "
+        "and report throughput and p50/p95/p99 latency as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--prefix", default="load", help="Prefix the dataset was seeded with.")
+        parser.add_argument("--requests", type=int, default=100, help="Requests per route.")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--route", action="append", choices=sorted(SCENARIOS), help="Limit to these routes.")
+        parser.add_argument("--output", help="File to write the JSON report to. Defaults to stdout.")
+
+    def handle(self, *args, **options):
+        try:
+            report = run_benchmark(
+                options["base_url"],
+                prefix=options["prefix"],
+                requests=options["requests"],
+                concurrency=options["concurrency"],
+                routes=options["route"],
+            )
+        except (OSError, ValueError) as exc:
+            raise CommandError(exc)
+
+        for name, result in report["routes"].items():
+            self.stderr.write(
+                f"{name:32} {result['throughput_rps']:>9} req/s  p50 {result['p50_ms']:>8} ms  "
+                f"p95 {result['p95_ms']:>8} ms  p99 {result['p99_ms']:>8} ms  errors {result['errors']}"
+            )
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(report, file, indent=2, sort_keys=True)
+                file.write("\n")
+        else:
+            json.dump(report, sys.stdout, indent=2, sort_keys=True)
+            sys.stdout.write("\n")
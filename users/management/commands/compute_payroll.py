@@ -0,0 +1,36 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.payroll import compute_salary_increases, write_payroll_csv
+from users.routers import use_replica
+from users.utils import parse_window
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute every professor's salary increase from Super Approved "
+        "submissions in a date window and write the payroll CSV."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="First day of the window (YYYY-MM-DD). Defaults to 1 January.")
+        parser.add_argument("--end", help="Last day of the window (YYYY-MM-DD). Defaults to today.")
+        parser.add_argument("--output", help="CSV file to write. Defaults to stdout.")
+
+    def handle(self, *args, **options):
+        try:
+            start, end = parse_window(options["start"], options["end"])
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        with use_replica():
+            rows = compute_salary_increases(start, end)
+        if options["output"]:
+            with open(options["output"], "w", newline="") as file:
+                write_payroll_csv(rows, file)
+            self.stderr.write(
+                self.style.SUCCESS(f"Wrote {len(rows)} professors to {options['output']}.")
+            )
+        else:
+            write_payroll_csv(rows, sys.stdout)
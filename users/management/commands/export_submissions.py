@@ -0,0 +1,37 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.exports import submission_rows, write_csv, write_xlsx
+from users.routers import use_replica
+from users.utils import parse_window
+
+
+class Command(BaseCommand):
+    help = "Export submissions created in a date window as CSV or XLSX, streaming rows from the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="First day of the window (YYYY-MM-DD). Defaults to 1 January.")
+        parser.add_argument("--end", help="Last day of the window (YYYY-MM-DD). Defaults to today.")
+        parser.add_argument("--format", choices=("csv", "xlsx"), default="csv")
+        parser.add_argument("--output", help="File to write. Defaults to stdout for CSV.")
+
+    def handle(self, *args, **options):
+        try:
+            start, end = parse_window(options["start"], options["end"])
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        if options["format"] == "xlsx" and not options["output"]:
+            raise CommandError("XLSX exports need --output.")
+
+        with use_replica():
+            rows = submission_rows(start, end)
+            if options["format"] == "xlsx":
+                with open(options["output"], "wb") as file:
+                    write_xlsx(rows, file)
+            elif options["output"]:
+                with open(options["output"], "w", newline="") as file:
+                    write_csv(rows, file)
+            else:
+                write_csv(rows, sys.stdout)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from users.archive import freeze_proof_files
+
+
+class Command(BaseCommand):
+    help = "Compress the proof files of long-finalized submissions into cold storage."
+
+    def handle(self, *args, **options):
+        frozen = freeze_proof_files()
+        self.stdout.write(f"Froze {frozen} proof files.")
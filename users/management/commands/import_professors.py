@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.bulk_import import IMPORT_BATCH_SIZE, ProfessorImportError, import_professors, read_rows
+
+
+class Command(BaseCommand):
+    help = "Create department users and their profiles from a CSV or JSON file, all or nothing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV with a header row, or a JSON list of objects.")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument(
+            "--workers", type=int, help="Processes used to hash passwords. Defaults to the CPU count."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["path"], encoding="utf-8-sig") as file:
+                rows = read_rows(file, options["path"])
+            created = import_professors(rows, options["batch_size"], options["workers"])
+        except ProfessorImportError as exc:
+            for line, message in exc.errors:
+                self.stderr.write(f"row {line}: {message}" if line else message)
+            raise CommandError(f"Import rejected: {exc}.")
+        except (OSError, ValueError) as exc:
+            raise CommandError(exc)
+        self.stdout.write(self.style.SUCCESS(f"Imported {created} professors."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from users.uploads import purge_stale_sessions
+
+
+class Command(BaseCommand):
+    help = "Delete abandoned resumable upload sessions and their part files."
+
+    def handle(self, *args, **options):
+        purged = purge_stale_sessions()
+        self.stdout.write(f"Deleted {purged} upload sessions.")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from users.models import SubmissionCounter
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the dashboard submission counters from the submission table. "
+        "Run it while nobody is submitting or reviewing."
+    )
+
+    def handle(self, *args, **options):
+        SubmissionCounter.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {SubmissionCounter.objects.count()} counters.")
+        )
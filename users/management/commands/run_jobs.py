@@ -0,0 +1,26 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from users.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs in a pool of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            help="Worker processes. Defaults to the CPU count; 0 runs jobs in this process.",
+        )
+        parser.add_argument("--poll", type=float, help="Seconds to wait between polls of an empty queue.")
+        parser.add_argument("--burst", action="store_true", help="Exit once the queue is empty.")
+
+    def handle(self, *args, **options):
+        worker = Worker(processes=options["processes"], poll_seconds=options["poll"])
+        # Finish the jobs in flight before exiting.
+        signal.signal(signal.SIGTERM, worker.stop)
+        signal.signal(signal.SIGINT, worker.stop)
+        self.stdout.write(f"Worker {worker.name} running with {worker.processes} processes.")
+        worker.run(burst=options["burst"])
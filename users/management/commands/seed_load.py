@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.loadtest import LOAD_PASSWORD, seed_dataset
+
+
+class Command(BaseCommand):
+    help = "Seed a benchmark dataset: departments, professors, work categories, submissions and proof files."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prefix", default="load", help="Prefix of every seeded username and department code.")
+        parser.add_argument("--departments", type=int, default=5)
+        parser.add_argument("--professors-per-department", type=int, default=20)
+        parser.add_argument("--categories", type=int, default=6)
+        parser.add_argument("--requirements-per-category", type=int, default=4)
+        parser.add_argument("--submissions-per-professor", type=int, default=5)
+        parser.add_argument(
+            "--mean-file-size", type=int, default=128 * 1024, help="Mean proof file size in bytes."
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed, for repeatable datasets.")
+
+    def handle(self, *args, **options):
+        try:
+            counts = seed_dataset(
+                prefix=options["prefix"],
+                departments=options["departments"],
+                professors_per_department=options["professors_per_department"],
+                categories=options["categories"],
+                requirements_per_category=options["requirements_per_category"],
+                submissions_per_professor=options["submissions_per_professor"],
+                mean_file_size=options["mean_file_size"],
+                seed=options["seed"],
+            )
+        except ValueError as exc:
+            raise CommandError(exc)
+        for name, count in counts.items():
+            self.stdout.write(f"{name}: {count}")
+        self.stdout.write(
+            self.style.SUCCESS(f"Seeded. Log in as {options['prefix']}-admin with the password {LOAD_PASSWORD!r}.")
+        )
@@ -0,0 +1,93 @@
+# Generated by Django 5.0.4 on 2026-10-18 14:14
+
+import django.db.models.deletion
+import users.utils
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Requirement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, max_length=1000, null=True)),
+                ('description', models.TextField(blank=True, max_length=2000, null=True)),
+                ('max_percentage_increase', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WorkCategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=1000, unique=True)),
+                ('description', models.TextField(blank=True)),
+                ('max_percentage', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RemoveField(
+            model_name='superadminprofile',
+            name='phone_number',
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='code',
+            field=models.CharField(default='', max_length=150, unique=True),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='universityuser',
+            name='phone_number',
+            field=models.CharField(default='', max_length=12, unique=True),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='DepartmentUserProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('birthdate', models.DateField(blank=True, null=True)),
+                ('base_salary', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='members', to='users.department')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='regular_user_profile', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProfessorWorkSubmission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('submission_description', models.TextField(blank=True, null=True)),
+                ('action_description', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('PR', 'Processing'), ('DA', 'Department Approved'), ('SA', 'Super Approved'), ('DN', 'Denied')], default='PR', max_length=2)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('professor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='requirement_fulfillments', to=settings.AUTH_USER_MODEL)),
+                ('requirements', models.ManyToManyField(related_name='fulfillments', to='users.requirement')),
+                ('work_category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='users.workcategory')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FileSubmission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('proof_file', models.FileField(upload_to=users.utils.submission_file_path)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('work_submission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='file_submissions', to='users.professorworksubmission')),
+                ('requirement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.requirement')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='requirement',
+            name='work_category',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='requirements', to='users.workcategory'),
+        ),
+        migrations.DeleteModel(
+            name='RegularUserProfile',
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.4 on 2026-10-18 14:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_requirement_workcategory_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='professorworksubmission',
+            index=models.Index(fields=['created_at', 'id'], name='submission_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='professorworksubmission',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='submission_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='professorworksubmission',
+            index=models.Index(fields=['professor', 'created_at', 'id'], name='submission_prof_created_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.4 on 2026-10-18 14:18
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_submission_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255)),
+                ('size', models.PositiveBigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('professor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL)),
+                ('requirement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.requirement')),
+                ('work_submission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='users.professorworksubmission')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UploadChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('offset', models.PositiveBigIntegerField()),
+                ('length', models.PositiveIntegerField()),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='users.uploadsession')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='uploadchunk',
+            constraint=models.UniqueConstraint(fields=('session', 'offset'), name='unique_upload_chunk_offset'),
+        ),
+    ]
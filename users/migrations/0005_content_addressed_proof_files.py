@@ -0,0 +1,35 @@
+# Generated by Django 5.0.4 on 2026-10-18 14:19
+
+import os
+
+import users.storage
+import users.utils
+from django.db import migrations, models
+
+
+def backfill_original_filename(apps, schema_editor):
+    FileSubmission = apps.get_model("users", "FileSubmission")
+    for file_submission in FileSubmission.objects.filter(original_filename="").iterator():
+        file_submission.original_filename = os.path.basename(file_submission.proof_file.name)
+        file_submission.save(update_fields=["original_filename"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_upload_sessions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='filesubmission',
+            name='original_filename',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='filesubmission',
+            name='proof_file',
+            field=models.FileField(db_index=True, storage=users.storage.ContentAddressedStorage(), upload_to=users.utils.submission_file_path),
+        ),
+        migrations.RunPython(backfill_original_filename, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.0.4 on 2026-10-18 14:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def count_existing_submissions(apps, schema_editor):
+    ProfessorWorkSubmission = apps.get_model("users", "ProfessorWorkSubmission")
+    SubmissionCounter = apps.get_model("users", "SubmissionCounter")
+    rows = (
+        ProfessorWorkSubmission.objects.filter(
+            professor__regular_user_profile__isnull=False, work_category__isnull=False
+        )
+        .values_list("professor__regular_user_profile__department_id", "work_category_id", "status")
+        .annotate(count=models.Count("id"))
+        .order_by()
+    )
+    counts = {}
+    for department_id, work_category_id, status, count in rows:
+        counts[department_id, work_category_id, status] = count
+    # Every status of every pair gets a row, as SubmissionCounter.rebuild()
+    # creates them: transitions only UPDATE the rows that already exist.
+    SubmissionCounter.objects.bulk_create(
+        SubmissionCounter(
+            department_id=department_id,
+            work_category_id=work_category_id,
+            status=code,
+            count=counts.get((department_id, work_category_id, code), 0),
+        )
+        for department_id, work_category_id in {key[:2] for key in counts}
+        for code, _ in ProfessorWorkSubmission._meta.get_field("status").choices
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_content_addressed_proof_files'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PR', 'Processing'), ('DA', 'Department Approved'), ('SA', 'Super Approved'), ('DN', 'Denied')], max_length=2)),
+                ('count', models.IntegerField(default=0)),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submission_counters', to='users.department')),
+                ('work_category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submission_counters', to='users.workcategory')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='submissioncounter',
+            constraint=models.UniqueConstraint(fields=('department', 'work_category', 'status'), name='unique_submission_counter'),
+        ),
+        migrations.RunPython(count_existing_submissions, migrations.RunPython.noop),
+    ]
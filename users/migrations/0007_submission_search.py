@@ -0,0 +1,60 @@
+# Generated by Django 5.0.4 on 2026-10-18 14:31
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+class PostgresAddIndex(migrations.AddIndex):
+    """``AddIndex`` for GIN indexes, which only PostgreSQL can build."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+def fill_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    ProfessorWorkSubmission = apps.get_model("users", "ProfessorWorkSubmission")
+    ProfessorWorkSubmission.objects.using(schema_editor.connection.alias).update(
+        search_vector=SearchVector("submission_description", weight="A", config="simple")
+        + SearchVector("action_description", weight="B", config="simple")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0006_submission_counters'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='professorworksubmission',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_search_vectors, migrations.RunPython.noop, elidable=True),
+        PostgresAddIndex(
+            model_name='professorworksubmission',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='submission_search_idx'),
+        ),
+        PostgresAddIndex(
+            model_name='universityuser',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('first_name'), name='gin_trgm_ops'), name='user_first_name_trgm'),
+        ),
+        PostgresAddIndex(
+            model_name='universityuser',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('last_name'), name='gin_trgm_ops'), name='user_last_name_trgm'),
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 5.0.4 on 2026-10-18 14:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+TABLE = "users_professorworksubmission"
+
+
+def _rebuild(schema_editor, partitioned):
+    """
+    Copy the submissions table into a new one, list-partitioned on
+    ``archived`` or plain, keeping every index and outgoing foreign key.
+    Archived rows get one range partition per academic year, created by
+    users.archive before rows move into it.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    execute = schema_editor.execute
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s",
+            [TABLE],
+        )
+        indexes = [definition for name, definition in cursor.fetchall() if name != f"{TABLE}_pkey"]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+            [TABLE],
+        )
+        foreign_keys = cursor.fetchall()
+
+    execute(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_old")
+    if partitioned:
+        execute(f"CREATE TABLE {TABLE} (LIKE {TABLE}_old INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY LIST (archived)")
+        execute(f"CREATE TABLE {TABLE}_active PARTITION OF {TABLE} FOR VALUES IN (false)")
+        execute(f"CREATE TABLE {TABLE}_archive PARTITION OF {TABLE} FOR VALUES IN (true) PARTITION BY RANGE (created_at)")
+    else:
+        execute(f"CREATE TABLE {TABLE} (LIKE {TABLE}_old INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    # The id default, if any, points at the old table's sequence.
+    execute(f"ALTER TABLE {TABLE} ALTER COLUMN id DROP DEFAULT")
+    execute(f"INSERT INTO {TABLE} SELECT * FROM {TABLE}_old")
+    execute(f"DROP TABLE {TABLE}_old CASCADE")
+
+    if partitioned:
+        # Partitioned tables only take identity columns from PostgreSQL 17,
+        # and their primary key must include the partition keys.
+        execute(f"CREATE SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id")
+        execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{TABLE}_id_seq')")
+        execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id, archived, created_at)")
+    else:
+        execute(f"ALTER TABLE {TABLE} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY")
+        execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id)")
+    execute(f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {TABLE}")
+    for definition in indexes:
+        execute(definition.replace(" ON ONLY ", " ON "))
+    for name, definition in foreign_keys:
+        execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}")
+
+
+def partition_submissions(apps, schema_editor):
+    _rebuild(schema_editor, partitioned=True)
+
+
+def unpartition_submissions(apps, schema_editor):
+    _rebuild(schema_editor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_job_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='professorworksubmission',
+            name='archived',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='filesubmission',
+            name='work_submission',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='file_submissions', to='users.professorworksubmission'),
+        ),
+        migrations.AlterField(
+            model_name='professorworksubmission',
+            name='requirements',
+            field=models.ManyToManyField(db_constraint=False, related_name='fulfillments', to='users.requirement'),
+        ),
+        migrations.AlterField(
+            model_name='uploadsession',
+            name='work_submission',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='users.professorworksubmission'),
+        ),
+        migrations.RunPython(partition_submissions, unpartition_submissions),
+    ]
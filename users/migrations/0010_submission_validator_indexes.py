@@ -0,0 +1,21 @@
+# Generated by Django 5.0.4 on 2026-10-18 14:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_submission_archive'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='professorworksubmission',
+            index=models.Index(fields=['archived', 'status', 'updated_at'], name='submission_status_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='professorworksubmission',
+            index=models.Index(fields=['professor', 'updated_at'], name='submission_prof_updated_idx'),
+        ),
+    ]
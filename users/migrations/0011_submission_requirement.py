@@ -0,0 +1,50 @@
+# Generated by Django 5.0.4 on 2026-10-18 16:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def drop_orphaned_links(apps, schema_editor):
+    # Without the constraint, rows removed outside the ORM could leave links behind.
+    SubmissionRequirement = apps.get_model('users', 'SubmissionRequirement')
+    Requirement = apps.get_model('users', 'Requirement')
+    SubmissionRequirement.objects.exclude(requirement__in=Requirement.objects.all()).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_submission_validator_indexes'),
+    ]
+
+    operations = [
+        # Take over the implicit through table as it is, then put the
+        # foreign key to requirements back in the database.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='SubmissionRequirement',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('professorworksubmission', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='users.professorworksubmission')),
+                        ('requirement', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='users.requirement')),
+                    ],
+                    options={
+                        'db_table': 'users_professorworksubmission_requirements',
+                        'unique_together': {('professorworksubmission', 'requirement')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='professorworksubmission',
+                    name='requirements',
+                    field=models.ManyToManyField(related_name='fulfillments', through='users.SubmissionRequirement', to='users.requirement'),
+                ),
+            ],
+        ),
+        migrations.RunPython(drop_orphaned_links, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='submissionrequirement',
+            name='requirement',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.requirement'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.4 on 2026-10-18 17:05
+
+from django.db import migrations, models
+
+
+def start_heartbeats(apps, schema_editor):
+    # Jobs running during the upgrade keep their old timeout.
+    Job = apps.get_model('users', 'Job')
+    Job.objects.filter(status='RU').update(heartbeat_at=models.F('started_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_submission_requirement'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(start_heartbeats, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,19 @@
+import os
+import uuid
+from collections import Counter
+
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.core.files.storage import FileSystemStorage
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Upper
+from django.urls import reverse
 from django.utils import timezone
 
+from .previews import can_preview, preview_version
+from .storage import proof_file_storage
 from .utils import generate_unique_filename, submission_file_path
 
 
@@ -17,6 +27,13 @@ class UniversityUser(AbstractUser):
     role = models.CharField(max_length=2, choices=ROLES, db_index=True)
     phone_number = models.CharField(max_length=12, unique=True)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # icontains compares UPPER(column), so index the same expression.
+            GinIndex(OpClass(Upper("first_name"), name="gin_trgm_ops"), name="user_first_name_trgm"),
+            GinIndex(OpClass(Upper("last_name"), name="gin_trgm_ops"), name="user_last_name_trgm"),
+        ]
+
 
 class SuperAdminProfile(models.Model):
     user = models.OneToOneField(
@@ -55,6 +72,13 @@ class Department(models.Model):
     def __str__(self):
         return self.name + self.code
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets post_save forget the cached access of a replaced admin.
+        instance._loaded_admin_id = instance.__dict__.get("department_admin_id")
+        return instance
+
 
 class DepartmentUserProfile(models.Model):
     user = models.OneToOneField(
@@ -73,6 +97,19 @@ class DepartmentUserProfile(models.Model):
     def __str__(self) -> str:
         return f"{self.user.first_name} {self.user.last_name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets post_save move the professor's submission counts along.
+        instance._loaded_department_id = instance.__dict__.get("department_id")
+        return instance
+
+    def save(self, *args, **kwargs):
+        # post_save moves the submission counts within the same transaction;
+        # inside an outer one, without the cost of a savepoint.
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
 
 class WorkCategory(models.Model):
     name = models.CharField(max_length=1000, unique=True)
@@ -95,6 +132,20 @@ class Requirement(models.Model):
         return self.name
 
 
+class ProfessorWorkSubmissionQuerySet(models.QuerySet):
+    def for_listing(self):
+        """Load everything the submission tables render, in a fixed number of queries."""
+        return (
+            self.select_related("professor__regular_user_profile__department", "work_category")
+            .prefetch_related("requirements")
+            .defer("search_vector")
+        )
+
+    def active(self):
+        """Skip archived rows, which on PostgreSQL prunes the query to the active partition."""
+        return self.filter(archived=False)
+
+
 class ProfessorWorkSubmission(models.Model):
     STATUS_CHOICES = (
         ("PR", "Processing"),
@@ -102,28 +153,337 @@ class ProfessorWorkSubmission(models.Model):
         ("SA", "Super Approved"),
         ("DN", "Denied"),
     )
+    TRANSITIONS = {
+        "approve": ("PR", "DA"),
+        "decline": ("PR", "DN"),
+        "approve_da": ("DA", "SA"),
+        "decline_da": ("DA", "PR"),
+    }
     professor = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
         related_name="requirement_fulfillments",
     )
     work_category = models.ForeignKey(WorkCategory, on_delete=models.CASCADE, null=True, blank=True)
-    requirements = models.ManyToManyField(Requirement, related_name="fulfillments")
+    requirements = models.ManyToManyField(Requirement, related_name="fulfillments", through="SubmissionRequirement")
     submission_description = models.TextField(blank=True, null=True)
     action_description = models.TextField(blank=True, null=True)
     status = models.CharField(max_length=2, choices=STATUS_CHOICES, default="PR")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by users.search on PostgreSQL, left empty elsewhere.
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Set by users.archive on finalized submissions of past academic years.
+    # On PostgreSQL the table is partitioned on it (see migration 0009).
+    archived = models.BooleanField(default=False, editable=False)
+
+    objects = ProfessorWorkSubmissionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="submission_created_idx"),
+            models.Index(
+                fields=["status", "created_at", "id"],
+                name="submission_status_created_idx",
+            ),
+            models.Index(
+                fields=["professor", "created_at", "id"],
+                name="submission_prof_created_idx",
+            ),
+            # Cover the validators of users.conditional.
+            models.Index(fields=["archived", "status", "updated_at"], name="submission_status_updated_idx"),
+            models.Index(fields=["professor", "updated_at"], name="submission_prof_updated_idx"),
+            GinIndex(fields=["search_vector"], name="submission_search_idx"),
+        ]
 
     def __str__(self):
         return (
             f"{self.professor.first_name} {self.professor.last_name}"
         )
-    
+
+    @classmethod
+    def transition(cls, ids, from_status, to_status, department_id=None):
+        """
+        Move every submission in ``ids`` that is still in ``from_status`` to
+        ``to_status`` and return the ids that actually moved, only those of
+        professors in ``department_id`` when given. The rows are locked
+        before the conditional UPDATE so concurrent reviewers never both
+        report the same submission as moved.
+        """
+        candidates = cls.objects.active().filter(pk__in=ids, status=from_status)
+        if department_id is not None:
+            candidates = candidates.filter(professor__regular_user_profile__department_id=department_id)
+        with transaction.atomic():
+            rows = list(
+                candidates.select_for_update(of=("self",))
+                .values_list(
+                    "pk", "professor__regular_user_profile__department_id", "work_category_id"
+                )
+            )
+            moved = [pk for pk, _, _ in rows]
+            if moved:
+                cls.objects.active().filter(pk__in=moved, status=from_status).update(
+                    status=to_status, updated_at=timezone.now()
+                )
+                SubmissionCounter.record_transition(
+                    [(department_id, category_id) for _, department_id, category_id in rows],
+                    from_status,
+                    to_status,
+                )
+        return moved
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets post_save notice status changes made through save().
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
+
+class SubmissionRequirement(models.Model):
+    """
+    Link between a submission and a requirement it fulfills. Table, columns
+    and field names are those Django gave the implicit through table.
+    """
+
+    # The partitioned submissions table has no unique key on id alone, so
+    # this foreign key is enforced by Django only.
+    professorworksubmission = models.ForeignKey(
+        ProfessorWorkSubmission, on_delete=models.CASCADE, db_constraint=False
+    )
+    requirement = models.ForeignKey(Requirement, on_delete=models.CASCADE)
+
+    class Meta:
+        db_table = "users_professorworksubmission_requirements"
+        unique_together = [("professorworksubmission", "requirement")]
+
+
+class SubmissionCounter(models.Model):
+    """
+    Number of submissions per (department, work category, status), kept up to
+    date in the same transaction as every create, delete and status change so
+    the dashboards never have to COUNT(*) the submission table. Submissions
+    whose professor has no department are not counted.
+    """
+
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name="submission_counters")
+    work_category = models.ForeignKey(WorkCategory, on_delete=models.CASCADE, related_name="submission_counters")
+    status = models.CharField(max_length=2, choices=ProfessorWorkSubmission.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["department", "work_category", "status"],
+                name="unique_submission_counter",
+            ),
+        ]
+
+    @classmethod
+    def bump(cls, department_id, work_category_id, status, delta):
+        if department_id is None or work_category_id is None or not delta:
+            return
+        key = {"department_id": department_id, "work_category_id": work_category_id, "status": status}
+        if cls.objects.filter(**key).update(count=models.F("count") + delta):
+            return
+        # First submission for this department and category: create the rows
+        # for every status at once so later transitions only ever UPDATE.
+        cls.objects.bulk_create(
+            [
+                cls(department_id=department_id, work_category_id=work_category_id, status=code)
+                for code, _ in ProfessorWorkSubmission.STATUS_CHOICES
+            ],
+            ignore_conflicts=True,
+        )
+        cls.objects.filter(**key).update(count=models.F("count") + delta)
+
+    @staticmethod
+    def department_of(submission):
+        return (
+            DepartmentUserProfile.objects.filter(user_id=submission.professor_id)
+            .values_list("department_id", flat=True)
+            .first()
+        )
+
+    @classmethod
+    def record(cls, submission, status, delta):
+        cls.bump(cls.department_of(submission), submission.work_category_id, status, delta)
+
+    @classmethod
+    def move_professor(cls, professor_id, from_department_id, to_department_id):
+        """Move the counts of a professor's submissions to the department they moved to."""
+        rows = (
+            ProfessorWorkSubmission.objects.filter(professor_id=professor_id, work_category__isnull=False)
+            .values_list("work_category_id", "status")
+            .annotate(count=models.Count("id"))
+            .order_by()
+        )
+        with transaction.atomic():
+            for work_category_id, status, count in rows:
+                cls.bump(from_department_id, work_category_id, status, -count)
+                cls.bump(to_department_id, work_category_id, status, count)
+
+    @classmethod
+    def record_transition(cls, keys, from_status, to_status):
+        """
+        Move one count per ``(department_id, work_category_id)`` in ``keys``,
+        in a single UPDATE however many departments and categories the batch
+        spans. Rows are normally created a whole key at a time, but counters
+        backfilled before that may lack some statuses: any (key, status)
+        without a row falls back to ``bump``.
+        """
+        moved = {
+            key: count for key, count in Counter(keys).items() if None not in key
+        }
+        if not moved:
+            return
+        whens, matches = [], models.Q()
+        for (department_id, work_category_id), count in moved.items():
+            key = {"department_id": department_id, "work_category_id": work_category_id}
+            whens.append(models.When(**key, status=from_status, then=models.Value(-count)))
+            whens.append(models.When(**key, status=to_status, then=models.Value(count)))
+            matches |= models.Q(**key)
+        updated = cls.objects.filter(matches, status__in=(from_status, to_status)).update(
+            count=models.F("count") + models.Case(*whens, default=models.Value(0))
+        )
+        if updated == 2 * len(moved):
+            return
+        existing = set(
+            cls.objects.filter(matches, status__in=(from_status, to_status)).values_list(
+                "department_id", "work_category_id", "status"
+            )
+        )
+        for (department_id, work_category_id), count in moved.items():
+            for status, delta in ((from_status, -count), (to_status, count)):
+                if (department_id, work_category_id, status) not in existing:
+                    cls.bump(department_id, work_category_id, status, delta)
+
+    @classmethod
+    def totals(cls, department=None):
+        counters = cls.objects.all()
+        if department is not None:
+            counters = counters.filter(department=department)
+        by_status = dict(
+            counters.values_list("status").annotate(total=models.Sum("count")).order_by()
+        )
+        return {
+            "pending": by_status.get("PR", 0) + by_status.get("DA", 0),
+            "department_approved": by_status.get("DA", 0),
+            "approved": by_status.get("SA", 0),
+            "denied": by_status.get("DN", 0),
+        }
+
+    @classmethod
+    def rebuild(cls):
+        """Recount everything from the submission table."""
+        rows = (
+            ProfessorWorkSubmission.objects.filter(
+                professor__regular_user_profile__isnull=False, work_category__isnull=False
+            )
+            .values_list("professor__regular_user_profile__department_id", "work_category_id", "status")
+            .annotate(count=models.Count("id"))
+            .order_by()
+        )
+        counts = {}
+        for department_id, work_category_id, status, count in rows:
+            counts[department_id, work_category_id, status] = count
+        keys = {key[:2] for key in counts}
+        with transaction.atomic():
+            cls.objects.all().delete()
+            # Every status gets a row, as bump() creates them, so transitions
+            # into an empty status stay a single UPDATE.
+            cls.objects.bulk_create(
+                cls(
+                    department_id=department_id,
+                    work_category_id=work_category_id,
+                    status=code,
+                    count=counts.get((department_id, work_category_id, code), 0),
+                )
+                for department_id, work_category_id in keys
+                for code, _ in ProfessorWorkSubmission.STATUS_CHOICES
+            )
+
 
 class FileSubmission(models.Model):
-    proof_file = models.FileField(upload_to=submission_file_path)
+    proof_file = models.FileField(
+        upload_to=submission_file_path, storage=proof_file_storage, db_index=True
+    )
+    original_filename = models.CharField(max_length=255, blank=True)
     requirement = models.ForeignKey(Requirement, on_delete=models.CASCADE)
-    work_submission = models.ForeignKey(ProfessorWorkSubmission, on_delete=models.CASCADE, related_name='file_submissions')
+    work_submission = models.ForeignKey(
+        ProfessorWorkSubmission, on_delete=models.CASCADE, related_name='file_submissions', db_constraint=False
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def display_name(self):
+        return self.original_filename or os.path.basename(self.proof_file.name)
+
+    @property
+    def preview_url(self):
+        """Versioned by content, so the browser may cache it for good."""
+        name = self.proof_file.name
+        if not can_preview(name):
+            return None
+        return f"{reverse('users:preview_file', args=[self.pk])}?v={preview_version(name)}"
+
+
+class UploadSession(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    professor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="upload_sessions",
+    )
+    work_submission = models.ForeignKey(
+        ProfessorWorkSubmission, on_delete=models.CASCADE, related_name='upload_sessions', db_constraint=False
+    )
+    requirement = models.ForeignKey(Requirement, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class UploadChunk(models.Model):
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name='chunks')
+    offset = models.PositiveBigIntegerField()
+    length = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["session", "offset"], name="unique_upload_chunk_offset"
+            ),
+        ]
+
+
+class Job(models.Model):
+    """A unit of background work, claimed and run by ``manage.py run_jobs``."""
+
+    STATUS_CHOICES = (
+        ("QU", "Queued"),
+        ("RU", "Running"),
+        ("DO", "Done"),
+        ("FA", "Failed"),
+    )
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=2, choices=STATUS_CHOICES, default="QU")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    claimed_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_at", "id"], name="job_claim_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.get_status_display()})"
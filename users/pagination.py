@@ -0,0 +1,128 @@
+import binascii
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from django.db.models import Q
+
+SUBMISSIONS_PAGE_SIZE = 50
+
+
+class KeysetPage(NamedTuple):
+    object_list: list
+    next_cursor: Optional[str]
+    previous_cursor: Optional[str]
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class NumberedPage(NamedTuple):
+    object_list: list
+    number: int
+    has_next: bool
+
+    @property
+    def has_previous(self):
+        return self.number > 1
+
+    @property
+    def next_page_number(self):
+        return self.number + 1
+
+    @property
+    def previous_page_number(self):
+        return self.number - 1
+
+
+def encode_cursor(obj):
+    raw = f"{obj.created_at.isoformat()}|{obj.pk}"
+    return urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        created_at, pk = urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        return None
+
+
+def _keyset_slice(queryset, request, page_size):
+    after = decode_cursor(request.GET.get("after"))
+    before = decode_cursor(request.GET.get("before"))
+
+    if before is not None:
+        created_at, pk = before
+        queryset = queryset.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+        ).order_by("created_at", "id")
+    else:
+        queryset = queryset.order_by("-created_at", "-id")
+        if after is not None:
+            created_at, pk = after
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+            )
+    return queryset[: page_size + 1], after, before
+
+
+def _keyset_page(rows, after, before, page_size):
+    if before is not None:
+        has_previous = len(rows) > page_size
+        rows = rows[:page_size][::-1]
+        has_next = True
+    else:
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        has_previous = after is not None
+
+    return KeysetPage(
+        object_list=rows,
+        next_cursor=encode_cursor(rows[-1]) if rows and has_next else None,
+        previous_cursor=encode_cursor(rows[0]) if rows and has_previous else None,
+    )
+
+
+def keyset_paginate(queryset, request, page_size=SUBMISSIONS_PAGE_SIZE):
+    """
+    Paginate ``queryset`` newest first on ``(created_at, id)``.
+
+    The cursor is the key of the last (``after``) or first (``before``) row of
+    the page the user came from, so every page is a single index range scan
+    no matter how deep it is.
+    """
+    queryset, after, before = _keyset_slice(queryset, request, page_size)
+    return _keyset_page(list(queryset), after, before, page_size)
+
+
+async def akeyset_paginate(queryset, request, page_size=SUBMISSIONS_PAGE_SIZE):
+    """Async version of ``keyset_paginate`` for the ASGI views."""
+    queryset, after, before = _keyset_slice(queryset, request, page_size)
+    return _keyset_page([row async for row in queryset], after, before, page_size)
+
+
+def numbered_paginate(queryset, request, page_size=SUBMISSIONS_PAGE_SIZE):
+    """
+    Paginate ``queryset`` in its own order by ``?page=``, for orderings such
+    as search rank that have no stable key to seek on. One extra row stands in
+    for the ``COUNT(*)`` a ``Paginator`` would run.
+    """
+    try:
+        number = max(int(request.GET.get("page", 1)), 1)
+    except ValueError:
+        number = 1
+    offset = (number - 1) * page_size
+    rows = list(queryset[offset : offset + page_size + 1])
+    return NumberedPage(
+        object_list=rows[:page_size],
+        number=number,
+        has_next=len(rows) > page_size,
+    )
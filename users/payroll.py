@@ -0,0 +1,107 @@
+import csv
+from collections import defaultdict
+from decimal import Decimal
+from typing import NamedTuple, Optional
+
+from django.db.models import Sum
+
+from .exports import spreadsheet_safe
+from .models import ProfessorWorkSubmission
+from .utils import window_bounds
+
+CENT = Decimal("0.01")
+
+PAYROLL_COLUMNS = (
+    "professor_id",
+    "username",
+    "first_name",
+    "last_name",
+    "department",
+    "base_salary",
+    "increase_percentage",
+    "increase_amount",
+    "new_salary",
+)
+
+
+class PayrollRow(NamedTuple):
+    professor_id: int
+    username: str
+    first_name: str
+    last_name: str
+    department: Optional[str]
+    base_salary: Optional[Decimal]
+    increase_percentage: int
+    increase_amount: Optional[Decimal]
+    new_salary: Optional[Decimal]
+
+
+def compute_salary_increases(start, end):
+    """
+    Salary increase of every professor with Super Approved submissions created
+    between ``start`` and ``end`` (inclusive dates).
+
+    One grouped query sums ``Requirement.max_percentage_increase`` per
+    professor and work category. A single pass over those rows then caps each
+    category at ``WorkCategory.max_percentage`` and applies the total to the
+    professor's ``base_salary``.
+    """
+    start_at, end_at = window_bounds(start, end)
+    prefix = "professorworksubmission__professor__"
+    grouped = (
+        ProfessorWorkSubmission.requirements.through.objects.filter(
+            professorworksubmission__status="SA",
+            professorworksubmission__created_at__gte=start_at,
+            professorworksubmission__created_at__lt=end_at,
+        )
+        .values_list(
+            "professorworksubmission__professor_id",
+            prefix + "username",
+            prefix + "first_name",
+            prefix + "last_name",
+            prefix + "regular_user_profile__department__name",
+            prefix + "regular_user_profile__base_salary",
+            "requirement__work_category_id",
+            "requirement__work_category__max_percentage",
+        )
+        .annotate(percentage=Sum("requirement__max_percentage_increase"))
+        .order_by()
+    )
+
+    professors = {}
+    percentages = defaultdict(int)
+    for professor_id, *details, _category_id, category_cap, percentage in grouped.iterator():
+        professors[professor_id] = details
+        percentages[professor_id] += min(percentage, category_cap)
+
+    rows = []
+    for professor_id in sorted(professors):
+        username, first_name, last_name, department, base_salary = professors[professor_id]
+        percentage = percentages[professor_id]
+        if base_salary is None:
+            amount = new_salary = None
+        else:
+            amount = (base_salary * percentage / 100).quantize(CENT)
+            new_salary = base_salary + amount
+        rows.append(
+            PayrollRow(
+                professor_id,
+                username,
+                first_name,
+                last_name,
+                department,
+                base_salary,
+                percentage,
+                amount,
+                new_salary,
+            )
+        )
+    return rows
+
+
+def write_payroll_csv(rows, file):
+    """Names come from users and the file is opened in a spreadsheet, so text cells are made formula-safe."""
+    writer = csv.writer(file)
+    writer.writerow(PAYROLL_COLUMNS)
+    for row in rows:
+        writer.writerow(["" if value is None else spreadsheet_safe(value) for value in row])
@@ -0,0 +1,104 @@
+import os
+import tempfile
+
+import pypdfium2
+from django.conf import settings
+from PIL import Image, ImageOps
+
+from .storage import proof_file_storage
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".tif", ".tiff"}
+
+PREVIEW_SUFFIX = ".preview.jpg"
+
+
+def can_preview(name):
+    ext = os.path.splitext(name)[1].lower()
+    return ext == ".pdf" or ext in IMAGE_EXTENSIONS
+
+
+def preview_version(name):
+    """
+    Blobs are named by the SHA-256 of their bytes, so the name is the version.
+    Files saved before content addressing keep their ``submissions/<pk>/``
+    upload name, which a replaced file can reuse, so their version comes
+    from the file's size and modification time.
+    """
+    if name.startswith("blobs/"):
+        return os.path.splitext(os.path.basename(name))[0]
+    for path in (proof_file_storage.path(name), proof_file_storage.cold_path(name)):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+    return ""
+
+
+def preview_path(name):
+    """
+    The preview sits next to its blob; a changed file is a new blob with a
+    new preview. Legacy files carry their version in the preview's name.
+    """
+    stem = os.path.splitext(name)[0]
+    if not name.startswith("blobs/"):
+        stem = f"{stem}.{preview_version(name)}"
+    return proof_file_storage.path(stem + PREVIEW_SUFFIX)
+
+
+def _first_page(path, size):
+    pdf = pypdfium2.PdfDocument(path)
+    try:
+        page = pdf[0]
+        scale = size / max(page.get_size())
+        return page.render(scale=min(scale, 4)).to_pil()
+    finally:
+        pdf.close()
+
+
+def _render(path, size):
+    if path.lower().endswith(".pdf"):
+        return _first_page(path, size)
+    with Image.open(path) as image:
+        image.draft("RGB", (size, size))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+        return image
+
+
+def build_preview(name):
+    """
+    Render the preview of the blob ``name`` unless it already exists, and
+    return its path, or None for files that have no preview. Like bundles,
+    the file only appears once complete.
+    """
+    if not can_preview(name):
+        return None
+    path = preview_path(name)
+    if os.path.exists(path):
+        return path
+
+    size = settings.PREVIEW_MAX_SIZE
+    try:
+        image = _render(proof_file_storage.local_path(name), size)
+    except (OSError, Image.DecompressionBombError, pypdfium2.PdfiumError):
+        # Unreadable or hostile files get no preview; reviewers download them.
+        return None
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            image.save(tmp, "JPEG", quality=settings.PREVIEW_QUALITY, optimize=True)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+
+def discard_preview(name):
+    try:
+        os.unlink(preview_path(name))
+    except FileNotFoundError:
+        pass
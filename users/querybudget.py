@@ -0,0 +1,153 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def budgets_enforced():
+    """
+    Whether going over budget is an error rather than a warning, as set by
+    QUERY_BUDGET_ENFORCE. The view has already run by then, and may have
+    committed its writes, so only the test settings turn it on.
+    """
+    return settings.QUERY_BUDGET_ENFORCE
+
+
+def query_budget(max_queries):
+    """
+    Declare the most queries a view may run per request, session and auth
+    lookups included. Works on view functions and class-based views alike.
+    """
+
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+
+    return decorator
+
+
+def extend_query_budget(request, queries):
+    """
+    Allow the current request ``queries`` more than its view's budget, for
+    work that grows with the input, such as one write per submitted form.
+    """
+    if getattr(request, "query_budget", None) is not None:
+        request.query_budget += queries
+
+
+def get_query_budget(view_func):
+    budget = getattr(view_func, "query_budget", None)
+    if budget is None:
+        budget = getattr(getattr(view_func, "view_class", None), "query_budget", None)
+    return budget
+
+
+class QueryRecorder:
+    """``execute_wrapper`` that counts queries and the time spent in them."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+# The recorder of the request being served. Context variables follow the
+# request into the threads ``sync_to_async`` runs the ORM in, where the
+# connections are not the ones the middleware sees.
+_recorder = ContextVar("query_recorder", default=None)
+
+
+def _record(execute, sql, params, many, context):
+    recorder = _recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection):
+    """Let ``record_queries`` see the queries of ``connection``; called as each connection opens."""
+    if _record not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record)
+
+
+@contextmanager
+def record_queries():
+    """Count the queries run inside the block, in this thread or any it hands work to."""
+    for connection in connections.all(initialized_only=True):
+        install_query_recorder(connection)
+    recorder = QueryRecorder()
+    token = _recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _recorder.reset(token)
+
+
+class QueryBudgetMiddleware:
+    """
+    Records the query count and SQL time of every request, reports them in a
+    ``Server-Timing`` header and logs a warning when a view goes over the
+    budget it declared with ``@query_budget``, or raises when budgets are
+    enforced. Under DEBUG the overrun is also flagged in a
+    ``Query-Budget-Exceeded`` header.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with record_queries() as recorder:
+            response = self.get_response(request)
+        return self.report(request, response, recorder)
+
+    async def __acall__(self, request):
+        with record_queries() as recorder:
+            response = await self.get_response(request)
+        return self.report(request, response, recorder)
+
+    def report(self, request, response, recorder):
+        response["Server-Timing"] = (
+            f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries"'
+        )
+        budget = getattr(request, "query_budget", None)
+        if budget is not None and recorder.count > budget:
+            message = "%s %s ran %d queries (%.1f ms), over its budget of %d." % (
+                request.method,
+                request.path,
+                recorder.count,
+                recorder.duration * 1000,
+                budget,
+            )
+            if budgets_enforced():
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+            if settings.DEBUG:
+                response["Query-Budget-Exceeded"] = f"{recorder.count}/{budget}"
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = get_query_budget(view_func)
@@ -0,0 +1,185 @@
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+# Set on responses to requests that wrote, for REPLICA_STICKY_SECONDS.
+PIN_COOKIE = "pin_primary"
+
+
+@dataclass
+class RoutingState:
+    replica_reads: bool = False
+    pinned: bool = False
+    wrote: bool = False
+    # The replica this request reads from, chosen on its first replica read
+    # so every read sees the same point of replication.
+    replica: Optional[str] = None
+    replica_chosen: bool = False
+
+
+_routing = ContextVar("replica_routing", default=None)
+
+_down_until = {}
+_down_lock = threading.Lock()
+
+
+def _mirrors_primary(alias):
+    """
+    Whether ``alias`` is a test mirror pointed at its primary's database, as
+    the test runner sets up replicas with ``TEST["MIRROR"]``. Its connection
+    cannot see rows a ``TestCase`` has not committed, so reads stay on the
+    primary.
+    """
+    replica = connections[alias].settings_dict
+    mirror = replica["TEST"].get("MIRROR")
+    if not mirror:
+        return False
+    primary = connections[mirror].settings_dict
+    return all(replica[key] == primary[key] for key in ("NAME", "HOST", "PORT"))
+
+
+def _healthy_replica():
+    """
+    A connected replica from ``settings.DATABASE_REPLICAS``, or None. A
+    replica that refuses connections is skipped for REPLICA_RETRY_SECONDS.
+    """
+    now = time.monotonic()
+    replicas = [
+        alias
+        for alias in settings.DATABASE_REPLICAS
+        if _down_until.get(alias, 0) <= now and not _mirrors_primary(alias)
+    ]
+    random.shuffle(replicas)
+    for alias in replicas:
+        try:
+            connections[alias].ensure_connection()
+            return alias
+        except DatabaseError:
+            logger.warning("Replica %s is unavailable, reading from the primary.", alias, exc_info=True)
+            with _down_lock:
+                _down_until[alias] = now + settings.REPLICA_RETRY_SECONDS
+    return None
+
+
+@contextmanager
+def use_replica():
+    """Let reads inside the block go to a replica, unless the request is pinned to the primary."""
+    state = _routing.get()
+    if state is None:
+        token = _routing.set(RoutingState(replica_reads=True))
+        try:
+            yield
+        finally:
+            _routing.reset(token)
+        return
+    previous, state.replica_reads = state.replica_reads, True
+    try:
+        yield
+    finally:
+        state.replica_reads = previous
+
+
+def replica_reads(view):
+    """View decorator for ``use_replica``, for sync and async views."""
+    if iscoroutinefunction(view):
+
+        @wraps(view)
+        async def wrapper(*args, **kwargs):
+            with use_replica():
+                return await view(*args, **kwargs)
+
+    else:
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            with use_replica():
+                return view(*args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    """
+    Reads made under ``use_replica`` go to a healthy replica, the same one for
+    the whole request or ``use_replica`` block; everything else,
+    and every read after a write in the same request or within the sticky
+    window, goes to the primary. Migrations run on the primary only.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state is None or not state.replica_reads or state.pinned or state.wrote:
+            return None
+        if not state.replica_chosen:
+            state.replica, state.replica_chosen = _healthy_replica(), True
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Tracks whether a request wrote to the primary. If it did, the client gets
+    a cookie that keeps its reads on the primary for REPLICA_STICKY_SECONDS,
+    so a professor always sees the submission they just made.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState(pinned=PIN_COOKIE in request.COOKIES)
+        token = _routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.pin(state, response)
+
+    async def __acall__(self, request):
+        # sync_to_async runs the ORM in a copy of this context, which holds
+        # the same state object, so writes made there are seen here.
+        state = RoutingState(pinned=PIN_COOKIE in request.COOKIES)
+        token = _routing.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.pin(state, response)
+
+    def pin(self, state, response):
+        if state.wrote and settings.DATABASE_REPLICAS and settings.REPLICA_STICKY_SECONDS:
+            response.set_cookie(
+                PIN_COOKIE, "1", max_age=settings.REPLICA_STICKY_SECONDS, httponly=True, samesite="Lax"
+            )
+        return response
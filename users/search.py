@@ -0,0 +1,86 @@
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramWordSimilarity,
+)
+from django.db import connections
+from django.db.models import F, Q
+
+from .models import UniversityUser, WorkCategory
+
+# Descriptions are written in Uzbek, which PostgreSQL has no stemmer for.
+SEARCH_CONFIG = "simple"
+
+SEARCH_FIELDS = ("submission_description", "action_description")
+
+MAX_SEARCH_TERMS = 8
+
+
+def submission_search_vector():
+    return SearchVector("submission_description", weight="A", config=SEARCH_CONFIG) + SearchVector(
+        "action_description", weight="B", config=SEARCH_CONFIG
+    )
+
+
+def supports_full_text(db):
+    return connections[db].vendor == "postgresql"
+
+
+def refresh_search_vectors(queryset):
+    """Recompute ``search_vector`` for every row of ``queryset`` in one UPDATE."""
+    if supports_full_text(queryset.db):
+        queryset.update(search_vector=submission_search_vector())
+
+
+def _name_filter(term):
+    # Names live in small tables: resolve them first so the submissions are
+    # reached through the professor and work category foreign key indexes.
+    professors = UniversityUser.objects.filter(
+        Q(first_name__icontains=term)
+        | Q(last_name__icontains=term)
+        | Q(regular_user_profile__department__name__icontains=term)
+    )
+    categories = WorkCategory.objects.filter(name__icontains=term)
+    return Q(professor__in=professors) | Q(work_category__in=categories)
+
+
+def search_submissions(queryset, text):
+    """
+    Filter ``queryset`` to the submissions matching ``text`` and order them by
+    relevance.
+
+    Every word has to match a professor's name, their department or the work
+    category, unless the descriptions match the whole text. On PostgreSQL the
+    descriptions go through the ``search_vector`` GIN index and names through
+    the trigram indexes, and matches are ranked by text rank plus the
+    similarity of the professor's name. Other databases fall back to unranked
+    ``icontains`` matching, newest first.
+    """
+    terms = text.split()[:MAX_SEARCH_TERMS]
+    if not terms:
+        return queryset.none()
+
+    if not supports_full_text(queryset.db):
+        condition = Q()
+        for term in terms:
+            term_condition = _name_filter(term)
+            for field in SEARCH_FIELDS:
+                term_condition |= Q(**{f"{field}__icontains": term})
+            condition &= term_condition
+        return queryset.filter(condition).order_by("-created_at", "-id")
+
+    names = Q()
+    for term in terms:
+        names &= _name_filter(term)
+    text = " ".join(terms)
+    query = SearchQuery(text, search_type="websearch", config=SEARCH_CONFIG)
+    return (
+        queryset.filter(Q(search_vector=query) | names)
+        .annotate(
+            rank=SearchRank(F("search_vector"), query)
+            + TrigramWordSimilarity(text, "professor__first_name")
+            + TrigramWordSimilarity(text, "professor__last_name")
+        )
+        .order_by("-rank", "-created_at", "-id")
+    )
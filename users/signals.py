@@ -1,14 +1,37 @@
-from django.db.models.signals import post_save
+from django.db.models import QuerySet
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 
+from .access import bump_directory_version, forget_access
+from .bundles import invalidate_bundles
+from .catalog import bump_catalog_version
+from .previews import discard_preview
+from .querybudget import install_query_recorder
+from .search import SEARCH_FIELDS, refresh_search_vectors
+from .storage import lock_blobs
+from .uploads import discard_part
 from .models import (
+    FileSubmission,
+    ProfessorWorkSubmission,
+    SubmissionCounter,
     UniversityUser,
+    UploadSession,
     SuperAdminProfile,
     DepartmentAdminProfile,
+    Department,
+    DepartmentUserProfile,
+    Requirement,
+    WorkCategory,
 )
 
 
+# User fields the submission listings show; logins only save last_login.
+DIRECTORY_FIELDS = {"first_name", "last_name", "username"}
+
+
 @receiver(post_save, sender=UniversityUser)
 def create_profile(sender, instance, created, **kwargs):
     if created:
@@ -19,3 +42,134 @@ def create_profile(sender, instance, created, **kwargs):
                 DepartmentAdminProfile.objects.create(user=instance)
         except IntegrityError:
             print("Error creating profile: Potential data integrity issue.")
+
+
+@receiver(post_save, sender=FileSubmission)
+@receiver(post_delete, sender=FileSubmission)
+def invalidate_submission_bundles(sender, instance, **kwargs):
+    invalidate_bundles(instance.work_submission_id)
+
+
+@receiver(post_save, sender=FileSubmission)
+def touch_submission(sender, instance, **kwargs):
+    # Listings revalidate on updated_at (users.conditional) and show the files.
+    ProfessorWorkSubmission.objects.filter(pk=instance.work_submission_id).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=UploadSession)
+def discard_upload_part(sender, instance, **kwargs):
+    discard_part(instance)
+
+
+@receiver(post_delete, sender=FileSubmission)
+def release_proof_blob(sender, instance, **kwargs):
+    name = instance.proof_file.name
+    if not name:
+        return
+
+    def delete_if_unreferenced():
+        # Under the lock, a transaction reusing the blob has either committed
+        # its row, which the check sees, or not saved it yet, and will write
+        # the blob again.
+        with transaction.atomic():
+            lock_blobs()
+            if not FileSubmission.objects.filter(proof_file=name).exists():
+                # The preview first: a legacy file's preview is named after it.
+                discard_preview(name)
+                instance.proof_file.storage.delete(name)
+
+    transaction.on_commit(delete_if_unreferenced)
+
+
+@receiver(post_save, sender=ProfessorWorkSubmission)
+def count_submission_save(sender, instance, created, **kwargs):
+    loaded_status = getattr(instance, "_loaded_status", None)
+    if created:
+        SubmissionCounter.record(instance, instance.status, 1)
+    elif loaded_status is not None and loaded_status != instance.status:
+        SubmissionCounter.record(instance, loaded_status, -1)
+        SubmissionCounter.record(instance, instance.status, 1)
+    instance._loaded_status = instance.status
+
+
+@receiver(post_save, sender=ProfessorWorkSubmission)
+def refresh_submission_search_vector(sender, instance, update_fields, **kwargs):
+    if update_fields is None or not update_fields.isdisjoint(SEARCH_FIELDS):
+        refresh_search_vectors(ProfessorWorkSubmission.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=DepartmentUserProfile)
+def count_profile_move(sender, instance, created, **kwargs):
+    loaded_department_id = getattr(instance, "_loaded_department_id", None)
+    if not created and loaded_department_id is not None and loaded_department_id != instance.department_id:
+        SubmissionCounter.move_professor(instance.user_id, loaded_department_id, instance.department_id)
+    instance._loaded_department_id = instance.department_id
+
+
+@receiver(pre_delete, sender=ProfessorWorkSubmission)
+def remember_counted_department(sender, instance, **kwargs):
+    # Deleting the professor deletes their profile before their submissions,
+    # so look the department up while it is still there.
+    instance._counted_department_id = SubmissionCounter.department_of(instance)
+
+
+@receiver(post_delete, sender=ProfessorWorkSubmission)
+def count_submission_delete(sender, instance, origin, **kwargs):
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model is WorkCategory:
+        # The category's counter rows are deleted with it.
+        return
+    SubmissionCounter.bump(
+        instance._counted_department_id,
+        instance.work_category_id,
+        getattr(instance, "_loaded_status", instance.status),
+        -1,
+    )
+
+
+@receiver(post_save, sender=WorkCategory)
+@receiver(post_delete, sender=WorkCategory)
+@receiver(post_save, sender=Requirement)
+@receiver(post_delete, sender=Requirement)
+def invalidate_catalog(sender, **kwargs):
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=UniversityUser)
+def forget_role_access(sender, instance, update_fields, **kwargs):
+    if update_fields is None or "role" in update_fields:
+        forget_access(instance.pk)
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def forget_department_access(sender, instance, **kwargs):
+    # Members cache the department's name and code too.
+    members = DepartmentUserProfile.objects.filter(department_id=instance.pk).values_list("user_id", flat=True)
+    forget_access(instance.department_admin_id, getattr(instance, "_loaded_admin_id", None), *members)
+    instance._loaded_admin_id = instance.department_admin_id
+
+
+@receiver(post_save, sender=DepartmentUserProfile)
+@receiver(post_delete, sender=DepartmentUserProfile)
+def forget_profile_access(sender, instance, **kwargs):
+    forget_access(instance.user_id)
+
+
+@receiver(post_save, sender=UniversityUser)
+def invalidate_directory_names(sender, instance, update_fields, **kwargs):
+    if update_fields is None or not DIRECTORY_FIELDS.isdisjoint(update_fields):
+        bump_directory_version()
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+@receiver(post_save, sender=DepartmentUserProfile)
+@receiver(post_delete, sender=DepartmentUserProfile)
+def invalidate_directory(sender, **kwargs):
+    bump_directory_version()
+
+
+@receiver(connection_created)
+def record_connection_queries(sender, connection, **kwargs):
+    install_query_recorder(connection)
@@ -0,0 +1,190 @@
+import hashlib
+import os
+import tempfile
+
+import zstandard
+from django.conf import settings
+from django.core.files import File
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db import connection
+from django.utils._os import safe_join
+
+from .utils import evict_least_recently_used, mark_used
+
+HASH_READ_SIZE = 64 * 1024
+
+COLD_SUFFIX = ".zst"
+
+# Largest zstd frame header, which records the decompressed size.
+ZSTD_FRAME_HEADER_SIZE = 18
+
+
+# One advisory lock keeps blob reuse and blob deletion apart: transactions
+# that save proof files hold it shared until they commit, deleting a blob
+# takes it exclusively.
+BLOB_LOCK_KEY = 0x626C6F62
+
+
+def _blob_lock(function):
+    # Advisory locks are PostgreSQL's; other backends, used in development, skip them.
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT {function}(%s)", [BLOB_LOCK_KEY])
+
+
+def hold_blobs():
+    """Keep the blobs this transaction saves or reuses from being deleted before it commits."""
+    _blob_lock("pg_advisory_xact_lock_shared")
+
+
+def lock_blobs():
+    """Wait until no transaction may still reference a blob it reused, then keep new ones out until commit."""
+    _blob_lock("pg_advisory_xact_lock")
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores every file once, under the SHA-256 of its bytes.
+
+    The name produced by ``upload_to`` only contributes its extension; the
+    returned name is ``blobs/<ab>/<cd>/<digest><ext>``, so identical uploads
+    collapse onto one blob. Callers keep the original filename themselves,
+    and save inside a transaction that called ``hold_blobs()`` and creates
+    the row referencing the blob.
+
+    Blobs can be frozen: compressed with zstd into ``COLD_STORAGE_ROOT`` and
+    dropped from the hot disk. Reading a frozen blob goes through a
+    decompressed copy in ``COLD_CACHE_ROOT``, so callers never see the tiers.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is decided by the content in _save(), and an existing
+        # blob with that name already holds the same bytes.
+        return name
+
+    def blob_name(self, digest, name):
+        ext = os.path.splitext(name)[1].lower()[:10]
+        return f"blobs/{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        if hasattr(content, "temporary_file_path"):
+            tmp_path = content.temporary_file_path()
+            with open(tmp_path, "rb") as source:
+                for chunk in iter(lambda: source.read(HASH_READ_SIZE), b""):
+                    digest.update(chunk)
+            owns_tmp = False
+        else:
+            os.makedirs(self.location, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.location, suffix=".upload")
+            with os.fdopen(fd, "wb") as tmp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    tmp.write(chunk)
+            owns_tmp = True
+
+        blob_name = self.blob_name(digest.hexdigest(), name)
+        full_path = self.path(blob_name)
+        if self.exists(blob_name):
+            # A frozen blob is reused where it is, and only marked as used.
+            if not self.is_hot(blob_name):
+                mark_used(self.cold_path(blob_name))
+            if owns_tmp:
+                os.unlink(tmp_path)
+            return blob_name
+
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        if owns_tmp:
+            os.replace(tmp_path, full_path)
+        else:
+            file_move_safe(tmp_path, full_path, allow_overwrite=True)
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+        return blob_name
+
+    def cold_path(self, name):
+        return safe_join(settings.COLD_STORAGE_ROOT, name + COLD_SUFFIX)
+
+    def cache_path(self, name):
+        return safe_join(settings.COLD_CACHE_ROOT, name)
+
+    def is_hot(self, name):
+        return os.path.exists(self.path(name))
+
+    def exists(self, name):
+        return self.is_hot(name) or os.path.exists(self.cold_path(name))
+
+    def local_path(self, name):
+        """A path ``name`` can be read from: the hot blob, or a thawed copy of the frozen one."""
+        path = self.path(name)
+        if os.path.exists(path):
+            return path
+        return self._thaw(name)
+
+    def _open(self, name, mode="rb"):
+        if set(mode) & set("wa+"):
+            return super()._open(name, mode)
+        return File(open(self.local_path(name), mode))
+
+    def size(self, name):
+        if self.is_hot(name):
+            return super().size(name)
+        with open(self.cold_path(name), "rb") as cold:
+            return zstandard.frame_content_size(cold.read(ZSTD_FRAME_HEADER_SIZE))
+
+    def delete(self, name):
+        super().delete(name)
+        for path in (self.cold_path(name), self.cache_path(name)):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def freeze(self, name):
+        """Move the hot blob ``name`` to cold storage. The hot copy goes once the cold one is on disk."""
+        path = self.path(name)
+        cold_path = self.cold_path(name)
+        os.makedirs(os.path.dirname(cold_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cold_path), suffix=".part")
+        try:
+            with open(path, "rb") as source, os.fdopen(fd, "wb") as tmp:
+                compressor = zstandard.ZstdCompressor(level=settings.COLD_STORAGE_LEVEL, write_checksum=True)
+                compressor.copy_stream(source, tmp, size=os.path.getsize(path))
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            os.replace(tmp_path, cold_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        os.unlink(path)
+
+    def _thaw(self, name):
+        cached = self.cache_path(name)
+        if mark_used(cached):
+            return cached
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cached), suffix=".part")
+        try:
+            with open(self.cold_path(name), "rb") as source, os.fdopen(fd, "wb") as tmp:
+                zstandard.ZstdDecompressor().copy_stream(source, tmp)
+            os.replace(tmp_path, cached)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        evict_thawed_blobs(keep=cached)
+        return cached
+
+
+def evict_thawed_blobs(keep=None):
+    """Delete least recently read thawed blobs until the cache fits ``COLD_CACHE_MAX_BYTES``."""
+    paths = [
+        os.path.join(directory, filename)
+        for directory, _, filenames in os.walk(settings.COLD_CACHE_ROOT)
+        for filename in filenames
+        if not filename.endswith(".part")
+    ]
+    evict_least_recently_used(paths, settings.COLD_CACHE_MAX_BYTES, keep)
+
+
+proof_file_storage = ContentAddressedStorage()
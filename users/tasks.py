@@ -0,0 +1,20 @@
+from .bundles import build_bundle
+from .jobs import task
+from .models import FileSubmission, ProfessorWorkSubmission
+from .previews import build_preview
+
+
+@task("build_bundle")
+def build_submission_bundle(submission_id):
+    """Pre-build the ZIP reviewers download, so the first download is a cache hit."""
+    submission = ProfessorWorkSubmission.objects.filter(pk=submission_id).first()
+    if submission is not None:
+        build_bundle(submission)
+
+
+@task("build_previews")
+def build_submission_previews(submission_id):
+    """Render the reviewer previews of every file in a submission."""
+    names = FileSubmission.objects.filter(work_submission_id=submission_id).values_list("proof_file", flat=True)
+    for name in set(names):
+        build_preview(name)
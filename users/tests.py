@@ -1,3 +1,2261 @@
-from django.test import TestCase
+import csv
+import gzip
+import importlib.util
+import io
+import os
+import random
+import re
+import shutil
+import struct
+import tempfile
+import threading
+import types
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from unittest import skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+import openpyxl
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.apps import apps as django_apps
+from django.conf import global_settings, settings
+from django.contrib.auth.hashers import check_password
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, OperationalError, connection, connections, transaction
+from django.db.models import Sum
+from django.http import HttpResponse
+from django.test import (
+    LiveServerTestCase,
+    RequestFactory,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.templatetags.static import static
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, get_resolver, include, path, resolve, reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import bulk_import, jobs, previews, routers
+from . import urls as users_urls
+from .access import AccessMiddleware
+from .archive import archive_submissions, freeze_proof_files
+from .bundles import build_bundle, cached_bundle, evict_bundles
+from .bulk_import import ProfessorImportError, hash_passwords, import_professors, read_rows
+from .checks import check_shared_cache
+from .exports import EXPORT_COLUMNS, submission_rows, write_xlsx
+from .loadtest import SCENARIOS, run_benchmark, seed_dataset
+from .models import (
+    Department,
+    DepartmentUserProfile,
+    FileSubmission,
+    Job,
+    ProfessorWorkSubmission,
+    Requirement,
+    SubmissionCounter,
+    SubmissionRequirement,
+    UniversityUser,
+    UploadSession,
+    WorkCategory,
+)
+from .pagination import keyset_paginate, numbered_paginate
+from .payroll import compute_salary_increases, write_payroll_csv
+from .querybudget import QueryBudgetExceeded, QueryBudgetMiddleware, get_query_budget
+from .search import search_submissions
+from .storage import evict_thawed_blobs, hold_blobs
+from .utils import academic_year, academic_year_bounds
+from .zipstream import stream_proof_files_zip
+
+SCRATCH_DIR = tempfile.mkdtemp()
+
+# Views that are not ours and carry no budget.
+UNBUDGETED_URLS = {"logout"}
+
+
+@override_settings(
+    MEDIA_ROOT=f"{SCRATCH_DIR}/media",
+    SUBMISSION_BUNDLE_ROOT=f"{SCRATCH_DIR}/bundles",
+    CHUNKED_UPLOAD_ROOT=f"{SCRATCH_DIR}/uploads",
+)
+class QueryBudgetTests(TestCase):
+    """
+    Every URL in users/urls.py declares a query budget. Each test seeds a
+    small and a larger dataset and checks that the view stays within its
+    budget, and that the count does not grow with the data.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = UniversityUser.objects.create_superuser(
+            "admin", password="pass", phone_number="100", role="SA"
+        )
+        # Submissions are spread over several departments and categories, so
+        # per-key work such as the dashboard counters shows up in the counts.
+        departments = [
+            Department.objects.create(name=name, code=name[:3].upper())
+            for name in ("Physics", "Chemistry", "Biology")
+        ]
+        cls.professors = []
+        for i, department in enumerate(departments):
+            professor = UniversityUser.objects.create_user(
+                "prof" if i == 0 else f"prof{i}", password="pass", phone_number=f"20{i}", role="DU"
+            )
+            DepartmentUserProfile.objects.create(user=professor, department=department)
+            cls.professors.append(professor)
+        cls.categories = [
+            WorkCategory.objects.create(name=name, max_percentage=30)
+            for name in ("Research", "Teaching", "Outreach")
+        ]
+        cls.department, cls.professor, cls.category = departments[0], cls.professors[0], cls.categories[0]
+        cls.requirements = [
+            Requirement.objects.create(
+                work_category=cls.category, name=f"Paper {i}", max_percentage_increase=10
+            )
+            for i in range(3)
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+        self.seeded = 0
+
+    def seed(self, count, status="PR"):
+        for i in range(count):
+            n = self.seeded + i
+            submission = ProfessorWorkSubmission.objects.create(
+                professor=self.professors[n % 3], work_category=self.categories[n // 3 % 3], status=status
+            )
+            submission.requirements.set(self.requirements)
+            FileSubmission.objects.create(
+                proof_file=ContentFile(f"proof {self.seeded + i}".encode(), name="proof.pdf"),
+                original_filename="proof.pdf",
+                requirement=self.requirements[0],
+                work_submission=submission,
+            )
+            WorkCategory.objects.create(name=f"Category {self.seeded + i}").requirements.create(
+                name="Extra", max_percentage_increase=5
+            )
+            Department.objects.create(name=f"Department {self.seeded + i}", code=f"D{self.seeded + i}")
+        self.seeded += count
+        return submission
+
+    def count_queries(self, method, url, data=None, **extra):
+        budget = get_query_budget(resolve(url.split("?")[0]).func)
+        self.assertIsNotNone(budget, f"{url} has no query budget")
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data, **extra)
+            if response.streaming:
+                b"".join(response.streaming_content)
+        self.assertLess(response.status_code, 400, url)
+        # Views that scale their budget with the input raise it on the request.
+        self.assertLessEqual(
+            len(queries),
+            response.wsgi_request.query_budget,
+            "\n".join(query["sql"] for query in queries),
+        )
+        return len(queries)
+
+    def assertConstantQueries(self, method, url_for, data_for=None, status="PR"):
+        counts = []
+        for count in (1, 10):
+            submission = self.seed(count, status=status)
+            data = data_for(submission) if data_for else None
+            counts.append(self.count_queries(method, url_for(submission), data))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_every_url_has_a_budget(self):
+        for pattern in get_resolver("users.urls").url_patterns:
+            if isinstance(pattern, URLPattern) and pattern.name not in UNBUDGETED_URLS:
+                self.assertIsNotNone(get_query_budget(pattern.callback), pattern.name)
+
+    def test_listings(self):
+        for name in (
+            "users:list_processing_submissions",
+            "users:approved_submissions",
+            "users:all_submissions_list",
+            "users:my_submissions_list",
+        ):
+            with self.subTest(name):
+                status = "DA" if name == "users:approved_submissions" else "PR"
+                self.client.force_login(self.professor if "my_" in name else self.admin)
+                self.assertConstantQueries("get", lambda s: reverse(name), status=status)
+
+    def test_catalog_and_admin_pages(self):
+        for name in (
+            "users:create_department",
+            "users:create_department_user",
+            "users:department_list",
+            "users:create_work_category",
+            "users:work_categories",
+            "users:work_submission",
+            "users:admin_dashboard",
+            "users:job_queue",
+            "users:login",
+        ):
+            with self.subTest(name):
+                self.assertConstantQueries("get", lambda s: reverse(name))
+
+    def test_catalog_and_admin_posts(self):
+        def formset(prefix, requirements=(), new=1):
+            data = {
+                f"{prefix}-TOTAL_FORMS": len(requirements) + new,
+                f"{prefix}-INITIAL_FORMS": len(requirements),
+            }
+            for i, requirement in enumerate(requirements):
+                data[f"{prefix}-{i}-id"] = requirement.pk
+                data[f"{prefix}-{i}-name"] = requirement.name
+                data[f"{prefix}-{i}-max_percentage_increase"] = requirement.max_percentage_increase
+            for i in range(len(requirements), len(requirements) + new):
+                data[f"{prefix}-{i}-name"] = f"Requirement {self.seeded}-{i}"
+                data[f"{prefix}-{i}-max_percentage_increase"] = 5
+            return data
+
+        posts = {
+            "users:create_department": lambda s: {
+                "username": f"head{self.seeded}",
+                "password": "secret",
+                "first_name": "Ali",
+                "last_name": "Valiyev",
+                "phone_number": f"300{self.seeded}",
+                "department_name": f"Optics {self.seeded}",
+                "department_code": f"OPT{self.seeded}",
+            },
+            "users:create_department_user": lambda s: {
+                "username": f"staff{self.seeded}",
+                "password": "secret",
+                "first_name": "Ali",
+                "last_name": "Valiyev",
+                "phone_number": f"400{self.seeded}",
+                "department": self.department.pk,
+                "birthdate": "1980-01-01",
+            },
+            "users:create_work_category": lambda s: {
+                "name": f"Mentoring {self.seeded}",
+                "max_percentage": 10,
+                **formset("requirements", new=4),
+            },
+        }
+        for name, data_for in posts.items():
+            with self.subTest(name):
+                self.assertConstantQueries("post", lambda s: reverse(name), data_for)
+        with self.subTest("users:workcategory_edit"):
+            self.assertConstantQueries(
+                "post",
+                lambda s: reverse("users:workcategory_edit", args=[self.category.pk]),
+                lambda s: {
+                    "name": self.category.name,
+                    "max_percentage": 30,
+                    **formset("requirements", self.requirements, new=4),
+                },
+            )
+
+    def test_middleware_counts_queries_of_async_views(self):
+        async def view(request):
+            await WorkCategory.objects.acount()
+            await Department.objects.acount()
+            return HttpResponse()
+
+        middleware = QueryBudgetMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        request = RequestFactory().get("/")
+        request.query_budget = 2
+        response = async_to_sync(middleware)(request)
+        self.assertIn('desc="2 queries"', response["Server-Timing"])
+
+        request.query_budget = 1
+        with self.assertRaisesMessage(QueryBudgetExceeded, "ran 2 queries"):
+            async_to_sync(middleware)(request)
+        with override_settings(QUERY_BUDGET_ENFORCE=False):
+            with self.assertLogs("users.querybudget", "WARNING") as logs:
+                response = async_to_sync(middleware)(request)
+            self.assertNotIn("Query-Budget-Exceeded", response)
+            with self.settings(DEBUG=True), self.assertLogs("users.querybudget", "WARNING"):
+                response = async_to_sync(middleware)(request)
+            self.assertEqual(response["Query-Budget-Exceeded"], "2/1")
+        self.assertIn("over its budget of 1", logs.output[0])
+
+    def test_detail_pages(self):
+        self.assertConstantQueries(
+            "get", lambda s: reverse("users:workcategory_detail", args=[self.category.pk])
+        )
+        self.assertConstantQueries(
+            "get", lambda s: reverse("users:workcategory_edit", args=[self.category.pk])
+        )
+        self.assertConstantQueries(
+            "get",
+            lambda s: reverse("users:department_admin_dashboard", args=[self.department.pk]),
+        )
+
+    def test_professor_import(self):
+        def data_for(submission):
+            rows = "".join(
+                f"user{self.seeded}-{i},secret,Ali,Valiyev,{self.seeded}{i:03},PHY\n" for i in range(self.seeded)
+            )
+            header = "username,password,first_name,last_name,phone_number,department\n"
+            return {"file": SimpleUploadedFile("staff.csv", (header + rows).encode())}
+
+        self.assertConstantQueries("post", lambda s: reverse("users:import_department_users"), data_for)
+
+    @patch.object(bulk_import, "IMPORT_BATCH_SIZE", 4)
+    def test_professor_import_across_batches(self):
+        header = "username,password,first_name,last_name,phone_number,department\n"
+        for count in (4, 9, 13):
+            rows = "".join(f"staff{count}-{i},secret,Ali,Valiyev,{count}{i:03},PHY\n" for i in range(count))
+            upload = SimpleUploadedFile("staff.csv", (header + rows).encode())
+            with self.subTest(count):
+                self.count_queries("post", reverse("users:import_department_users"), {"file": upload})
+        self.assertEqual(DepartmentUserProfile.objects.filter(user__username__startswith="staff").count(), 26)
+
+    def test_search(self):
+        self.assertConstantQueries(
+            "get", lambda s: reverse("users:submission_search") + "?q=physics research"
+        )
+
+    def test_submission_export(self):
+        self.assertConstantQueries("get", lambda s: reverse("users:export_submissions"))
+
+    def test_payroll_export(self):
+        self.assertConstantQueries("get", lambda s: reverse("users:payroll_export"), status="SA")
+
+    def test_login(self):
+        self.client.logout()
+        self.count_queries("post", reverse("users:login"), {"username": "admin", "password": "pass"})
+
+    def test_download(self):
+        self.assertConstantQueries(
+            "get", lambda s: reverse("users:download_submission", args=[s.pk])
+        )
+
+    def test_file_download(self):
+        self.assertConstantQueries(
+            "get", lambda s: reverse("users:download_file", args=[s.file_submissions.get().pk])
+        )
+
+    def test_preview(self):
+        self.assertConstantQueries(
+            "get",
+            lambda s: FileSubmission.objects.create(
+                proof_file=ContentFile(image_bytes("PNG"), name="scan.png"),
+                requirement=self.requirements[0],
+                work_submission=s,
+            ).preview_url,
+        )
+
+    def test_transitions(self):
+        for name, status in (
+            ("users:approve_submission", "PR"),
+            ("users:decline_submission", "PR"),
+            ("users:approve_submission_da", "DA"),
+            ("users:decline_submission_da", "DA"),
+        ):
+            with self.subTest(name):
+                self.assertConstantQueries(
+                    "post", lambda s: reverse(name, args=[s.pk]), status=status
+                )
+
+    def test_bulk_transition(self):
+        self.assertConstantQueries(
+            "post",
+            lambda s: reverse("users:bulk_transition"),
+            lambda s: {
+                "transition": "approve",
+                "ids": list(ProfessorWorkSubmission.objects.values_list("pk", flat=True)),
+            },
+        )
+
+    def test_process_submission(self):
+        def data_for(submission):
+            data = {"category_id": self.category.pk}
+            for requirement in self.requirements[: 1 + self.seeded % 3]:
+                data[f"requirement_{requirement.pk}"] = SimpleUploadedFile(
+                    f"{requirement.pk}.pdf", b"%d" % self.seeded
+                )
+            return data
+
+        self.client.force_login(self.professor)
+        self.assertConstantQueries("post", lambda s: reverse("users:process_submission"), data_for)
+
+    def test_chunked_upload(self):
+        self.client.force_login(self.professor)
+        submission = self.seed(1)
+        self.count_queries(
+            "post",
+            reverse("users:create_upload_session"),
+            {
+                "submission_id": submission.pk,
+                "requirement_id": self.requirements[1].pk,
+                "filename": "scan.pdf",
+                "size": 4,
+            },
+        )
+        session = UploadSession.objects.get()
+        self.count_queries(
+            "put",
+            reverse("users:upload_session", args=[session.pk]) + "?offset=0",
+            b"scan",
+            content_type="application/octet-stream",
+        )
+        self.count_queries("get", reverse("users:upload_session", args=[session.pk]))
+        self.count_queries("post", reverse("users:finalize_upload_session", args=[session.pk]))
+        self.assertEqual(submission.file_submissions.count(), 2)
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        professor = UniversityUser.objects.create_user("prof", phone_number="200", role="DU")
+        category = WorkCategory.objects.create(name="Research", max_percentage=30)
+        ProfessorWorkSubmission.objects.bulk_create(
+            ProfessorWorkSubmission(professor=professor, work_category=category) for _ in range(8)
+        )
+        # Three pairs share a created_at, so pages split inside a tie.
+        start = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        for i, pk in enumerate(ProfessorWorkSubmission.objects.order_by("pk").values_list("pk", flat=True)):
+            ProfessorWorkSubmission.objects.filter(pk=pk).update(created_at=start + timedelta(minutes=i // 2))
+        cls.newest_first = list(ProfessorWorkSubmission.objects.order_by("-created_at", "-id").values_list("pk", flat=True))
+
+    def page(self, query=""):
+        page = keyset_paginate(ProfessorWorkSubmission.objects.all(), RequestFactory().get("/" + query), page_size=3)
+        return page, [submission.pk for submission in page.object_list]
+
+    def test_walks_forward_and_back_through_ties(self):
+        page, ids = self.page()
+        self.assertFalse(page.has_previous)
+        forward = [ids]
+        while page.has_next:
+            page, ids = self.page(f"?after={page.next_cursor}")
+            self.assertTrue(page.has_previous)
+            forward.append(ids)
+        self.assertEqual([pk for ids in forward for pk in ids], self.newest_first)
+        self.assertEqual([len(ids) for ids in forward], [3, 3, 2])
+
+        backward = [ids]
+        while page.has_previous:
+            page, ids = self.page(f"?before={page.previous_cursor}")
+            self.assertTrue(page.has_next)
+            backward.append(ids)
+        self.assertEqual(backward, forward[::-1])
+
+    def test_bad_cursors_start_from_the_newest(self):
+        for query in ("?after=bm9wZQ==", "?before=%%%", "?after="):
+            with self.subTest(query):
+                self.assertEqual(self.page(query)[1], self.newest_first[:3])
+
+
+@override_settings(MEDIA_ROOT=f"{SCRATCH_DIR}/media")
+class ZipStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        professor = UniversityUser.objects.create_user("prof", phone_number="200", role="DU")
+        category = WorkCategory.objects.create(name="Research", max_percentage=30)
+        requirement = category.requirements.create(name="Paper", max_percentage_increase=10)
+        submission = ProfessorWorkSubmission.objects.create(professor=professor, work_category=category)
+        cls.contents = {"Maqola.pdf": random.Random(0).randbytes(5000), "Izoh.txt": b"izoh " * 2000}
+        cls.files = [
+            FileSubmission.objects.create(
+                proof_file=ContentFile(data, name=name),
+                original_filename=name,
+                requirement=requirement,
+                work_submission=submission,
+            )
+            for name, data in cls.contents.items()
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(f"{SCRATCH_DIR}/media", ignore_errors=True)
+
+    def test_streams_a_valid_archive_in_chunks(self):
+        chunks = list(stream_proof_files_zip(self.files, chunk_size=1024))
+        self.assertGreater(len(chunks), len(self.files))
+        with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+            self.assertIsNone(archive.testzip())
+            for file in self.files:
+                info = archive.getinfo(f"{file.pk}_{file.original_filename}")
+                self.assertEqual(archive.read(info), self.contents[file.original_filename])
+                expected = zipfile.ZIP_STORED if file.original_filename.endswith(".pdf") else zipfile.ZIP_DEFLATED
+                self.assertEqual(info.compress_type, expected)
+
+    def test_entries_are_zip64(self):
+        data = b"".join(stream_proof_files_zip(self.files))
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            offsets = [info.header_offset for info in archive.infolist()]
+        for offset in offsets:
+            # Each local header carries a ZIP64 extra field (id 0x0001), so
+            # entries past 4 GiB need no seeking back.
+            name_length, extra_length = struct.unpack_from("<HH", data, offset + 26)
+            self.assertEqual(data[offset : offset + 4], b"PK\x03\x04")
+            self.assertGreater(extra_length, 0)
+            self.assertEqual(struct.unpack_from("<H", data, offset + 30 + name_length)[0], 1)
+
+
+@override_settings(MEDIA_ROOT=f"{SCRATCH_DIR}/media", SUBMISSION_BUNDLE_ROOT=f"{SCRATCH_DIR}/bundles")
+class BundleCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor = UniversityUser.objects.create_user("prof", phone_number="200", role="DU")
+        category = WorkCategory.objects.create(name="Research", max_percentage=30)
+        cls.requirement = category.requirements.create(name="Paper", max_percentage_increase=10)
+        cls.submissions = [
+            ProfessorWorkSubmission.objects.create(professor=cls.professor, work_category=category) for _ in range(3)
+        ]
+
+    def setUp(self):
+        for submission in self.submissions:
+            self.add_file(submission, b"proof %d" % submission.pk)
+        self.client.force_login(self.professor)
+
+    def tearDown(self):
+        shutil.rmtree(f"{SCRATCH_DIR}/media", ignore_errors=True)
+        shutil.rmtree(f"{SCRATCH_DIR}/bundles", ignore_errors=True)
+
+    def add_file(self, submission, data):
+        return FileSubmission.objects.create(
+            proof_file=ContentFile(data, name="proof.txt"),
+            original_filename="proof.txt",
+            requirement=self.requirement,
+            work_submission=submission,
+        )
+
+    def download(self, submission):
+        response = self.client.get(reverse("users:download_submission", args=[submission.pk]))
+        with zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content))) as archive:
+            return {name: archive.read(name) for name in archive.namelist()}
+
+    def cached(self, submission):
+        return cached_bundle(submission.pk, list(submission.file_submissions.all()))
+
+    def test_second_download_is_served_from_the_cache(self):
+        submission = self.submissions[0]
+        self.assertIsNone(self.cached(submission))
+        first = self.download(submission)
+        self.assertIsNotNone(self.cached(submission))
+        with patch("users.bundles.stream_proof_files_zip") as stream:
+            self.assertEqual(self.download(submission), first)
+        stream.assert_not_called()
+
+    def test_changed_files_drop_the_bundle(self):
+        submission = self.submissions[0]
+        self.download(submission)
+        bundle = self.cached(submission)
+        self.add_file(submission, b"another proof")
+        self.assertFalse(os.path.exists(bundle))
+        self.assertEqual(len(self.download(submission)), 2)
+
+        other = self.submissions[1]
+        self.download(other)
+        submission.file_submissions.first().delete()
+        self.assertIsNotNone(self.cached(other))
+        self.assertEqual(len(self.download(submission)), 1)
+
+    def test_least_recently_used_bundles_are_evicted(self):
+        first, second, third = self.submissions
+        build_bundle(first)
+        size = os.path.getsize(self.cached(first))
+        with override_settings(SUBMISSION_BUNDLE_MAX_BYTES=size * 5 // 2):
+            build_bundle(second)
+            os.utime(self.cached(first), (0, 0))
+            os.utime(self.cached(second), (100, 100))
+            self.assertIsNotNone(self.cached(first))  # the hit makes it the most recent
+            build_bundle(third)
+            self.assertIsNone(self.cached(second))
+            self.assertIsNotNone(self.cached(first))
+            self.assertIsNotNone(self.cached(third))
+
+        with override_settings(SUBMISSION_BUNDLE_MAX_BYTES=0):
+            evict_bundles(keep=self.cached(third))
+            self.assertIsNone(self.cached(first))
+            self.assertIsNotNone(self.cached(third))
+
+
+@override_settings(MEDIA_ROOT=f"{SCRATCH_DIR}/media")
+class ProcessSubmissionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor = UniversityUser.objects.create_user("prof", password="pass", phone_number="200", role="DU")
+        cls.research = WorkCategory.objects.create(name="Research", max_percentage=30)
+        cls.papers = [
+            cls.research.requirements.create(name=f"Paper {i}", max_percentage_increase=10) for i in range(2)
+        ]
+        cls.course = WorkCategory.objects.create(name="Course", max_percentage=20).requirements.create(
+            name="Syllabus", max_percentage_increase=5
+        )
+
+    def setUp(self):
+        self.client.force_login(self.professor)
+
+    def tearDown(self):
+        shutil.rmtree(f"{SCRATCH_DIR}/media", ignore_errors=True)
+
+    def submit(self, *requirements, extra=None):
+        data = {"category_id": self.research.pk, **(extra or {})}
+        for requirement in requirements:
+            data[f"requirement_{requirement.pk}"] = SimpleUploadedFile(
+                f"{requirement.name}.pdf", requirement.name.encode()
+            )
+        return self.client.post(reverse("users:process_submission"), data)
+
+    def test_visitors_are_sent_to_log_in(self):
+        self.client.logout()
+        response = self.submit(self.papers[0])
+        self.assertRedirects(
+            response, f"{reverse('users:login')}?next={reverse('users:process_submission')}", fetch_redirect_response=False
+        )
+        self.assertFalse(ProfessorWorkSubmission.objects.exists())
+
+    def test_stores_every_file_and_requirement(self):
+        response = self.submit(*self.papers)
+        self.assertRedirects(response, reverse("users:work_categories"), fetch_redirect_response=False)
+        submission = ProfessorWorkSubmission.objects.get()
+        self.assertEqual(
+            (submission.professor, submission.work_category, submission.status), (self.professor, self.research, "PR")
+        )
+        self.assertCountEqual(submission.requirements.all(), self.papers)
+        files = {file.requirement: file for file in submission.file_submissions.all()}
+        self.assertCountEqual(files, self.papers)
+        for requirement, file in files.items():
+            self.assertEqual(file.original_filename, f"{requirement.name}.pdf")
+            with file.proof_file.open("rb") as proof:
+                self.assertEqual(proof.read(), requirement.name.encode())
+        self.assertCountEqual(
+            Job.objects.values_list("task", flat=True), ["build_bundle", "build_previews"]
+        )
+
+    def test_rejects_requirements_of_other_categories(self):
+        self.assertEqual(self.submit(self.papers[0], self.course).status_code, 400)
+        bad_id = {"requirement_x": SimpleUploadedFile("x.pdf", b"x")}
+        self.assertEqual(self.submit(self.papers[0], extra=bad_id).status_code, 400)
+        self.assertFalse(ProfessorWorkSubmission.objects.exists())
+        self.assertFalse(FileSubmission.objects.exists())
+
+    def test_nothing_is_kept_when_a_write_fails(self):
+        through = ProfessorWorkSubmission.requirements.through
+        with patch.object(through.objects, "bulk_create", side_effect=OperationalError("disk full")):
+            with self.assertRaises(OperationalError):
+                self.submit(*self.papers)
+        self.assertFalse(ProfessorWorkSubmission.objects.exists())
+        self.assertFalse(FileSubmission.objects.exists())
+
+
+def async_urlconf():
+    """A root URLconf routing users.urls as loaded with ``ASYNC_VIEWS`` on."""
+    with override_settings(ASYNC_VIEWS=True):
+        spec = importlib.util.spec_from_file_location("users.async_urls", users_urls.__file__)
+        users_async_urls = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(users_async_urls)
+    urlconf = types.ModuleType("async_root_urls")
+    urlconf.urlpatterns = [path("", include(users_async_urls))]
+    return urlconf
+
+
+@override_settings(
+    ROOT_URLCONF=async_urlconf(),
+    MEDIA_ROOT=f"{SCRATCH_DIR}/media",
+    SUBMISSION_BUNDLE_ROOT=f"{SCRATCH_DIR}/bundles",
+)
+class AsyncViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = UniversityUser.objects.create_superuser("admin", password="pass", phone_number="100", role="SA")
+        cls.professor = UniversityUser.objects.create_user("prof", password="pass", phone_number="200", role="DU")
+        category = WorkCategory.objects.create(name="Research", max_percentage=30)
+        requirement = category.requirements.create(name="Paper", max_percentage_increase=10)
+        cls.pending, cls.approved = (
+            ProfessorWorkSubmission.objects.create(professor=cls.professor, work_category=category, status=status)
+            for status in ("PR", "DA")
+        )
+        FileSubmission.objects.create(
+            proof_file=ContentFile(b"proof", name="proof.pdf"),
+            original_filename="Maqola.pdf",
+            requirement=requirement,
+            work_submission=cls.pending,
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(f"{SCRATCH_DIR}/media", ignore_errors=True)
+
+    def tearDown(self):
+        shutil.rmtree(f"{SCRATCH_DIR}/bundles", ignore_errors=True)
+
+    async def test_routed_to_the_async_views(self):
+        for name in ("list_processing_submissions", "approved_submissions", "my_submissions_list"):
+            with self.subTest(name):
+                self.assertTrue(iscoroutinefunction(resolve(reverse(f"users:{name}")).func))
+
+    async def test_listings(self):
+        await self.async_client.aforce_login(self.admin)
+        for name, shown, hidden in (
+            ("list_processing_submissions", self.pending, self.approved),
+            ("approved_submissions", self.approved, self.pending),
+            ("all_submissions_list", self.pending, None),
+        ):
+            with self.subTest(name):
+                response = await self.async_client.get(reverse(f"users:{name}"))
+                self.assertContains(response, reverse("users:download_submission", args=[shown.pk]))
+                if hidden is not None:
+                    self.assertNotContains(response, reverse("users:download_submission", args=[hidden.pk]))
+
+    async def test_listings_load_the_user_once(self):
+        await self.async_client.aforce_login(self.professor)
+        for name in ("list_processing_submissions", "approved_submissions", "my_submissions_list"):
+            with self.subTest(name):
+                url = reverse(f"users:{name}")
+                response = await self.async_client.get(url)
+                queries = int(re.search(r'desc="(\d+) queries"', response["Server-Timing"])[1])
+                self.assertLessEqual(queries, get_query_budget(resolve(url).func))
+
+    async def test_unchanged_listing_answers_304(self):
+        await self.async_client.aforce_login(self.admin)
+        url = reverse("users:list_processing_submissions")
+        await self.async_client.get(url)  # sets the CSRF cookie the ETag covers
+        etag = (await self.async_client.get(url))["ETag"]
+        self.assertEqual((await self.async_client.get(url, headers={"If-None-Match": etag})).status_code, 304)
+
+    async def test_own_submissions_need_a_login(self):
+        url = reverse("users:my_submissions_list")
+        self.assertEqual((await self.async_client.get(url)).status_code, 404)
+        response = await self.async_client.get(reverse("users:all_submissions_list"))
+        self.assertEqual(response.status_code, 302)
+        await self.async_client.aforce_login(self.professor)
+        self.assertEqual((await self.async_client.get(url)).status_code, 200)
+
+    async def test_download_needs_a_reader(self):
+        url = reverse("users:download_submission", args=[self.pending.pk])
+        self.assertEqual((await self.async_client.get(url)).status_code, 302)
+        stranger = await UniversityUser.objects.acreate(username="other", phone_number="201", role="DU")
+        await self.async_client.aforce_login(stranger)
+        self.assertEqual((await self.async_client.get(url)).status_code, 403)
+
+    async def test_download_streams_then_serves_the_bundle(self):
+        await self.async_client.aforce_login(self.professor)
+        url = reverse("users:download_submission", args=[self.pending.pk])
+        file = await self.pending.file_submissions.aget()
+        # The first download streams and caches the bundle, the second is served from it.
+        for cached in (False, True):
+            response = await self.async_client.get(url)
+            data = b"".join([chunk async for chunk in response.streaming_content])
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                self.assertEqual(archive.read(f"{file.pk}_Maqola.pdf"), b"proof")
+            self.assertEqual(response.get("Content-Length"), str(len(data)) if cached else None)
+
+
+class CatalogCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = WorkCategory.objects.create(name="Research", max_percentage=30)
+        cls.requirement = cls.category.requirements.create(name="Paper", max_percentage_increase=10)
+
+    def setUp(self):
+        cache.clear()
+        self.urls = [
+            reverse("users:work_categories"),
+            reverse("users:work_submission"),
+            reverse("users:workcategory_detail", args=[self.category.pk]),
+        ]
+
+    def test_warm_catalog_pages_run_no_queries(self):
+        for url in self.urls:
+            self.client.get(url)
+        for url in self.urls:
+            with self.subTest(url), self.assertNumQueries(0):
+                self.client.get(url)
+
+    def test_changes_bump_the_version(self):
+        for url in self.urls:
+            self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = "Teaching"
+            self.category.save()
+        for url in self.urls:
+            with self.subTest(url):
+                self.assertContains(self.client.get(url), "Teaching")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.requirement.name = "Monograph"
+            self.requirement.save()
+        self.assertContains(self.client.get(self.urls[0]), "Monograph")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.delete()
+        self.assertEqual(self.client.get(self.urls[2]).status_code, 404)
+
+    def test_bumps_reach_workers_through_the_shared_cache(self):
+        for url in self.urls:
+            self.client.get(url)
+        # Another worker's connection to the same cache makes the change.
+        with patch("users.utils.cache", caches.create_connection(DEFAULT_CACHE_ALIAS)):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.category.name = "Teaching"
+                self.category.save()
+        for url in self.urls:
+            with self.subTest(url):
+                self.assertContains(self.client.get(url), "Teaching")
+
+    def test_process_local_caches_are_refused(self):
+        with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}):
+            [error] = check_shared_cache(None)
+        self.assertEqual(error.id, "users.E001")
+        with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache"}}):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class SubmissionSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        physics = Department.objects.create(name="Physics", code="PHY")
+        chemistry = Department.objects.create(name="Chemistry", code="CHE")
+        research = WorkCategory.objects.create(name="Research")
+        cls.ali = UniversityUser.objects.create_user(
+            "ali", first_name="Ali", last_name="Valiyev", phone_number="200", role="DU"
+        )
+        cls.olim = UniversityUser.objects.create_user(
+            "olim", first_name="Olim", last_name="Karimov", phone_number="300", role="DU"
+        )
+        DepartmentUserProfile.objects.create(user=cls.ali, department=physics)
+        DepartmentUserProfile.objects.create(user=cls.olim, department=chemistry)
+        cls.paper = ProfessorWorkSubmission.objects.create(
+            professor=cls.ali, work_category=research, submission_description="Quantum optics paper"
+        )
+        cls.course = ProfessorWorkSubmission.objects.create(
+            professor=cls.olim, work_category=research, submission_description="Organic synthesis course"
+        )
+
+    def setUp(self):
+        self.client.force_login(self.ali)
+
+    def search(self, text, page=1):
+        response = self.client.get(reverse("users:submission_search"), {"q": text, "page": page})
+        return response.context["page"]
+
+    def test_matches_names_departments_and_descriptions(self):
+        self.assertEqual(self.search("valiyev").object_list, [self.paper])
+        self.assertEqual(self.search("chemistry").object_list, [self.course])
+        self.assertEqual(self.search("ali physics").object_list, [self.paper])
+        self.assertEqual(self.search("synthesis").object_list, [self.course])
+        self.assertEqual(self.search("research").object_list, [self.course, self.paper])
+        self.assertEqual(self.search("ali chemistry").object_list, [])
+        self.assertEqual(self.search("  ").object_list, [])
+
+    def test_pages(self):
+        results = search_submissions(ProfessorWorkSubmission.objects.all(), "research")
+        first = numbered_paginate(results, RequestFactory().get("/"), page_size=1)
+        second = numbered_paginate(results, RequestFactory().get("/?page=2"), page_size=1)
+        self.assertEqual((first.object_list, first.has_next), ([self.course], True))
+        self.assertEqual((second.object_list, second.has_next), ([self.paper], False))
+        self.assertTrue(second.has_previous)
+
+
+class SearchBackendTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = WorkCategory.objects.create(name="Research")
+        cls.ali = UniversityUser.objects.create_user(
+            "ali", first_name="Ali", last_name="Valiyev", phone_number="200", role="DU"
+        )
+        cls.title = cls.submit(submission_description="Kvant optikasi maqolasi")
+        cls.mention = cls.submit(submission_description="Laboratoriya hisoboti", action_description="kvant tajribasi")
+        cls.other = cls.submit(submission_description="Organik sintez kursi")
+
+    @classmethod
+    def submit(cls, professor=None, **descriptions):
+        return ProfessorWorkSubmission.objects.create(
+            professor=professor or cls.ali, work_category=cls.category, **descriptions
+        )
+
+    def search(self, text):
+        return list(search_submissions(ProfessorWorkSubmission.objects.all(), text))
+
+    @skipUnless(connection.vendor == "postgresql", "Full-text search runs on PostgreSQL.")
+    def test_descriptions_rank_above_actions(self):
+        self.assertEqual(self.search("kvant"), [self.title, self.mention])
+        self.assertEqual(self.search("kvant optikasi"), [self.title])
+        self.assertEqual(self.search("kvant -optikasi"), [self.mention])
+
+    @skipUnless(connection.vendor == "postgresql", "Full-text search runs on PostgreSQL.")
+    def test_vectors_follow_edits(self):
+        self.assertEqual(self.search("sintez"), [self.other])
+        self.other.submission_description = "Polimer kimyosi"
+        self.other.save(update_fields=["submission_description"])
+        self.assertEqual(self.search("sintez"), [])
+        self.assertEqual(self.search("polimer"), [self.other])
+
+    @skipUnless(connection.vendor == "postgresql", "Trigram similarity runs on PostgreSQL.")
+    def test_closer_names_rank_first(self):
+        valiyeva = UniversityUser.objects.create_user(
+            "vali", first_name="Vali", last_name="Valiyeva", phone_number="201", role="DU"
+        )
+        newer = self.submit(valiyeva, submission_description="Kurs ishi")
+        results = self.search("valiyev")
+        self.assertEqual(results[-1], newer)
+        self.assertEqual(len(results), 4)
+        self.assertGreater(results[0].rank, results[-1].rank)
+
+    @skipUnless(connection.vendor != "postgresql", "Other databases fall back to icontains.")
+    def test_fallback_matches_every_term_newest_first(self):
+        self.assertEqual(self.search("kvant"), [self.mention, self.title])
+        self.assertEqual(self.search("KVANT optikasi"), [self.title])
+        self.assertEqual(self.search("tajribasi valiyev"), [self.mention])
+        self.assertEqual(self.search("kvant sintez"), [])
+        self.assertEqual(self.search("research"), [self.other, self.mention, self.title])
+
+
+def image_bytes(format, size=(2000, 1000)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "navy").save(buffer, format)
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=f"{SCRATCH_DIR}/previews")
+class PreviewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor = UniversityUser.objects.create_user("prof", phone_number="200", role="DU")
+        category = WorkCategory.objects.create(name="Research", max_percentage=30)
+        cls.requirement = category.requirements.create(name="Paper", max_percentage_increase=10)
+        cls.submission = ProfessorWorkSubmission.objects.create(professor=cls.professor, work_category=category)
+
+    def setUp(self):
+        self.client.force_login(self.professor)
+
+    def add_file(self, name, data):
+        return FileSubmission.objects.create(
+            proof_file=ContentFile(data, name=name),
+            requirement=self.requirement,
+            work_submission=self.submission,
+        )
+
+    def test_serves_cached_previews(self):
+        file = self.add_file("scan.png", image_bytes("PNG"))
+        response = self.client.get(file.preview_url)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertIn("immutable", response["Cache-Control"])
+        with Image.open(io.BytesIO(b"".join(response.streaming_content))) as preview:
+            self.assertEqual(preview.size, (1024, 512))
+
+        response = self.client.get(file.preview_url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(reverse("users:preview_file", args=[file.pk]))
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+
+    def test_legacy_files_are_versioned_by_their_contents(self):
+        name = f"submissions/{self.submission.pk}/scan.png"
+        path = os.path.join(settings.MEDIA_ROOT, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as legacy:
+            legacy.write(image_bytes("PNG"))
+        file = FileSubmission.objects.create(proof_file=name, requirement=self.requirement, work_submission=self.submission)
+        url = file.preview_url
+        self.assertIn("immutable", self.client.get(url)["Cache-Control"])
+
+        # Replaced in place under the same name.
+        with open(path, "wb") as legacy:
+            legacy.write(image_bytes("PNG", size=(500, 1000)))
+        os.utime(path, ns=(0, 0))
+        self.assertNotEqual(file.preview_url, url)
+        response = self.client.get(file.preview_url)
+        with Image.open(io.BytesIO(b"".join(response.streaming_content))) as preview:
+            self.assertEqual(preview.size, (500, 1000))
+
+    def test_job_renders_pdf_first_page(self):
+        file = self.add_file("paper.pdf", image_bytes("PDF", size=(600, 800)))
+        jobs.TASKS["build_previews"][0](submission_id=self.submission.pk)
+        with Image.open(previews.preview_path(file.proof_file.name)) as preview:
+            self.assertEqual(max(preview.size), 1024)
+
+    def test_files_without_previews(self):
+        docx = self.add_file("notes.docx", b"not an image")
+        broken = self.add_file("scan.jpg", b"not an image either")
+        self.assertIsNone(docx.preview_url)
+        self.assertEqual(self.client.get(reverse("users:preview_file", args=[docx.pk])).status_code, 404)
+        self.assertEqual(self.client.get(broken.preview_url).status_code, 404)
+
+    def test_other_professors_are_forbidden(self):
+        file = self.add_file("scan.png", image_bytes("PNG"))
+        other = UniversityUser.objects.create_user("other", phone_number="201", role="DU")
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(file.preview_url).status_code, 403)
+        self.assertFalse(os.path.exists(previews.preview_path(file.proof_file.name)))
+
+
+calls = []
+
+
+def record_call(**payload):
+    calls.append(payload)
+
+
+def fail(**payload):
+    raise RuntimeError("boom")
+
+
+def record_pid(path):
+    with open(path, "w") as f:
+        f.write(str(os.getpid()))
+
+
+@patch.dict(jobs.TASKS, {"record": (record_call, 5), "fail": (fail, 2), "record_pid": (record_pid, 1)})
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_runs_queued_jobs_once(self):
+        job = jobs.enqueue("record", value=1)
+        jobs.enqueue("record", value=2, run_at=job.run_at + timedelta(hours=1))
+
+        jobs.Worker(processes=0).run(burst=True)
+
+        self.assertEqual(calls, [{"value": 1}])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("DO", 1))
+        self.assertEqual(jobs.claim_jobs("other", 10), [])
+
+    def test_runs_jobs_in_spawned_processes(self):
+        path = os.path.join(SCRATCH_DIR, "job.pid")
+        job = jobs.enqueue("record_pid", path=path)
+
+        jobs.Worker(processes=1).run(burst=True)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.last_error), ("DO", ""))
+        with open(path) as f:
+            self.assertNotEqual(int(f.read()), os.getpid())
+
+    def test_retries_with_backoff_then_fails(self):
+        job = jobs.enqueue("fail")
+        [claimed] = jobs.claim_jobs("worker", 10)
+        jobs.finish_job(claimed, jobs.execute(claimed.task, claimed.payload))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, "QU")
+        self.assertIn("RuntimeError: boom", job.last_error)
+        self.assertGreater(job.run_at, claimed.started_at)
+
+        Job.objects.filter(pk=job.pk).update(run_at=claimed.started_at)
+        [claimed] = jobs.claim_jobs("worker", 10)
+        jobs.finish_job(claimed, jobs.execute(claimed.task, claimed.payload))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("FA", 2))
+
+    @override_settings(JOB_TIMEOUT_SECONDS=60)
+    def test_reclaims_jobs_of_dead_workers(self):
+        job = jobs.enqueue("record")
+        [first] = jobs.claim_jobs("dead", 10)
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=first.started_at - timedelta(minutes=5))
+
+        [second] = jobs.claim_jobs("alive", 10)
+        # The dead worker's late result no longer counts.
+        jobs.finish_job(first, "lost")
+        second.refresh_from_db()
+        self.assertEqual((second.status, second.attempts), ("RU", 2))
+
+    @override_settings(JOB_TIMEOUT_SECONDS=60)
+    def test_jobs_that_keep_killing_their_worker_fail(self):
+        job = jobs.enqueue("record")
+        Job.objects.filter(pk=job.pk).update(max_attempts=2)
+        for attempt in (1, 2):
+            [claimed] = jobs.claim_jobs(f"dead{attempt}", 10)
+            Job.objects.filter(pk=job.pk).update(heartbeat_at=claimed.started_at - timedelta(minutes=5))
+
+        with self.assertLogs("users.jobs", "ERROR"):
+            self.assertEqual(jobs.claim_jobs("alive", 10), [])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("FA", 2))
+        self.assertIn("stopped responding", job.last_error)
+
+    @override_settings(JOB_TIMEOUT_SECONDS=60)
+    def test_heartbeats_keep_long_jobs_claimed(self):
+        worker = jobs.Worker(processes=0)
+        job = jobs.enqueue("record")
+        [claimed] = jobs.claim_jobs(worker.name, 10)
+        Job.objects.filter(pk=job.pk).update(
+            started_at=claimed.started_at - timedelta(minutes=5),
+            heartbeat_at=claimed.started_at - timedelta(minutes=5),
+        )
+
+        self.assertEqual(worker.heartbeat(), 1)
+        self.assertEqual(jobs.claim_jobs("other", 10), [])
+        jobs.finish_job(claimed)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("DO", 1))
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor = UniversityUser.objects.create_user("prof", phone_number="200", role="DU")
+        cls.category = WorkCategory.objects.create(name="Research", max_percentage=30)
+        cls.old_approved = cls.submit("SA", years_ago=2)
+        cls.old_pending = cls.submit("PR", years_ago=2)
+        cls.current = cls.submit("SA")
+
+    @classmethod
+    def submit(cls, status, years_ago=0):
+        submission = ProfessorWorkSubmission.objects.create(
+            professor=cls.professor, work_category=cls.category, status=status
+        )
+        created_at = timezone.now() - timedelta(days=365 * years_ago)
+        ProfessorWorkSubmission.objects.filter(pk=submission.pk).update(created_at=created_at)
+        return submission
+
+    def test_academic_years(self):
+        self.assertEqual(academic_year(datetime(2024, 8, 31, 12, tzinfo=dt_timezone.utc)), 2023)
+        self.assertEqual(academic_year(datetime(2024, 9, 1, 12, tzinfo=dt_timezone.utc)), 2024)
+        start, end = academic_year_bounds(2024)
+        self.assertEqual((start.date(), end.date()), (date(2024, 9, 1), date(2025, 9, 1)))
+
+    def test_archives_finalized_past_years(self):
+        self.assertEqual(archive_submissions(), 1)
+        self.assertEqual(archive_submissions(), 0)
+
+        self.assertEqual(
+            set(ProfessorWorkSubmission.objects.active()), {self.old_pending, self.current}
+        )
+        self.client.force_login(self.professor)
+        response = self.client.get(reverse("users:my_submissions_list"))
+        self.assertEqual(len(response.context["submissions"]), 3)
+
+    def test_requirement_links_keep_the_requirement_foreign_key(self):
+        requirement = self.category.requirements.create(name="Paper", max_percentage_increase=10)
+        table = SubmissionRequirement._meta.db_table
+        # The link to the partitioned submissions table is not enforced by the database.
+        SubmissionRequirement.objects.create(professorworksubmission_id=10**9, requirement=requirement)
+        connection.check_constraints(table_names=[table])
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            SubmissionRequirement.objects.create(professorworksubmission=self.current, requirement_id=10**9)
+            connection.check_constraints(table_names=[table])
+
+    @skipUnless(connection.vendor == "postgresql", "partitioning is PostgreSQL only")
+    def test_archived_rows_live_in_year_partitions(self):
+        archive_submissions()
+        year = academic_year(ProfessorWorkSubmission.objects.get(pk=self.old_approved.pk).created_at)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT tableoid::regclass::text FROM users_professorworksubmission WHERE id = %s",
+                [self.old_approved.pk],
+            )
+            self.assertEqual(cursor.fetchone()[0], f"users_professorworksubmission_archive_{year}")
+
+
+@override_settings(
+    MEDIA_ROOT=f"{SCRATCH_DIR}/tiers/hot",
+    COLD_STORAGE_ROOT=f"{SCRATCH_DIR}/tiers/cold",
+    COLD_CACHE_ROOT=f"{SCRATCH_DIR}/tiers/cache",
+    COLD_STORAGE_AFTER_DAYS=30,
+)
+class ColdStorageTests(TestCase):
+    def setUp(self):
+        professor = UniversityUser.objects.create_user("prof", phone_number="200", role="DU")
+        category = WorkCategory.objects.create(name="Research", max_percentage=30)
+        requirement = category.requirements.create(name="Paper", max_percentage_increase=10)
+        self.files = {}
+        for status, data in (("SA", b"approved " * 1000), ("DN", b"shared"), ("PR", b"shared")):
+            submission = ProfessorWorkSubmission.objects.create(
+                professor=professor, work_category=category, status=status
+            )
+            self.files[status] = FileSubmission.objects.create(
+                proof_file=ContentFile(data, name="proof.txt"),
+                requirement=requirement,
+                work_submission=submission,
+            )
+        ProfessorWorkSubmission.objects.update(updated_at=timezone.now() - timedelta(days=60))
+
+    def tearDown(self):
+        shutil.rmtree(f"{SCRATCH_DIR}/tiers", ignore_errors=True)
+
+    def test_freezes_files_only_finalized_submissions_use(self):
+        self.assertEqual(freeze_proof_files(), 1)
+        approved = FileSubmission.objects.get(pk=self.files["SA"].pk).proof_file
+        storage = approved.storage
+        self.assertFalse(storage.is_hot(approved.name))
+        self.assertTrue(storage.is_hot(self.files["PR"].proof_file.name))
+
+        self.assertEqual(approved.size, 9000)
+        with approved.open("rb") as file:
+            self.assertEqual(file.read(), b"approved " * 1000)
+        self.assertTrue(os.path.exists(storage.cache_path(approved.name)))
+        self.assertLess(os.path.getsize(storage.cold_path(approved.name)), 9000)
+
+        storage.delete(approved.name)
+        self.assertFalse(storage.exists(approved.name))
+        self.assertFalse(os.path.exists(storage.cache_path(approved.name)))
+
+    def test_saving_a_frozen_blob_again_reuses_the_cold_copy(self):
+        freeze_proof_files()
+        name = self.files["SA"].proof_file.name
+        storage = self.files["SA"].proof_file.storage
+        cold_path = storage.cold_path(name)
+        os.utime(cold_path, (0, 0))
+
+        self.assertEqual(storage.save("again.txt", ContentFile(b"approved " * 1000)), name)
+        self.assertFalse(storage.is_hot(name))
+        self.assertGreater(os.path.getmtime(cold_path), 0)
+        with storage.open(name) as file:
+            self.assertEqual(file.read(), b"approved " * 1000)
+
+    @override_settings(COLD_CACHE_MAX_BYTES=10)
+    def test_thawed_copies_are_evicted(self):
+        freeze_proof_files()
+        approved = FileSubmission.objects.get(pk=self.files["SA"].pk).proof_file
+        path = approved.storage.local_path(approved.name)
+        self.assertTrue(os.path.exists(path))
+        evict_thawed_blobs()
+        self.assertFalse(os.path.exists(path))
+
+
+@override_settings(MEDIA_ROOT=f"{SCRATCH_DIR}/media")
+class ProofBlobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        professor = UniversityUser.objects.create_user("prof", phone_number="200", role="DU")
+        category = WorkCategory.objects.create(name="Research", max_percentage=30)
+        cls.requirement = category.requirements.create(name="Paper", max_percentage_increase=10)
+        cls.submission = ProfessorWorkSubmission.objects.create(professor=professor, work_category=category)
+
+    def tearDown(self):
+        shutil.rmtree(f"{SCRATCH_DIR}/media", ignore_errors=True)
+
+    def upload(self, data, name="proof.pdf"):
+        return FileSubmission.objects.create(
+            proof_file=ContentFile(data, name=name),
+            original_filename=name,
+            requirement=self.requirement,
+            work_submission=self.submission,
+        )
+
+    def test_identical_uploads_share_a_blob(self):
+        first, second, other = self.upload(b"scan"), self.upload(b"scan", "Copy.PDF"), self.upload(b"other")
+        self.assertEqual(first.proof_file.name, second.proof_file.name)
+        self.assertRegex(first.proof_file.name, r"^blobs/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.pdf$")
+        self.assertNotEqual(first.proof_file.name, other.proof_file.name)
+        blobs = [name for _, _, names in os.walk(f"{SCRATCH_DIR}/media") for name in names]
+        self.assertEqual(len(blobs), 2)
+        self.assertEqual(second.display_name, "Copy.PDF")
+
+    def test_blob_goes_with_its_last_reference(self):
+        first, second = self.upload(b"scan"), self.upload(b"scan")
+        storage = first.proof_file.storage
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(storage.exists(second.proof_file.name))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(storage.exists(second.proof_file.name))
+
+    def test_reference_committed_before_the_deletion_keeps_the_blob(self):
+        first = self.upload(b"scan")
+        with self.captureOnCommitCallbacks() as callbacks:
+            first.delete()
+        second = self.upload(b"scan")
+        for callback in callbacks:
+            callback()
+        self.assertTrue(second.proof_file.storage.exists(second.proof_file.name))
+
+
+@skipUnless(connection.vendor == "postgresql", "Blob locks are PostgreSQL advisory locks.")
+@override_settings(MEDIA_ROOT=f"{SCRATCH_DIR}/media")
+class ProofBlobRaceTests(TransactionTestCase):
+    def setUp(self):
+        professor = UniversityUser.objects.create_user("prof", phone_number="200", role="DU")
+        category = WorkCategory.objects.create(name="Research", max_percentage=30)
+        self.requirement = category.requirements.create(name="Paper", max_percentage_increase=10)
+        self.submission = ProfessorWorkSubmission.objects.create(professor=professor, work_category=category)
+        self.addCleanup(shutil.rmtree, f"{SCRATCH_DIR}/media", ignore_errors=True)
+
+    def upload(self):
+        return FileSubmission.objects.create(
+            proof_file=ContentFile(b"scan", name="proof.pdf"),
+            requirement=self.requirement,
+            work_submission=self.submission,
+        )
+
+    def test_deletion_waits_for_transactions_reusing_the_blob(self):
+        first = self.upload()
+        saved, release = threading.Event(), threading.Event()
+
+        def reuse():
+            try:
+                with transaction.atomic():
+                    hold_blobs()
+                    self.upload()
+                    saved.set()
+                    release.wait(5)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=reuse)
+        thread.start()
+        saved.wait(5)
+        # The deletion commits at once and its cleanup blocks on the lock.
+        threading.Timer(0.2, release.set).start()
+        first.delete()
+        thread.join()
+        self.assertTrue(first.proof_file.storage.exists(first.proof_file.name))
+        self.assertEqual(FileSubmission.objects.count(), 1)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class ProfessorImportTests(TestCase):
+    HEADER = "username,password,first_name,last_name,phone_number,department,birthdate,base_salary\n"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.physics = Department.objects.create(name="Physics", code="PHY")
+        UniversityUser.objects.create_user("taken", phone_number="999", role="DU")
+
+    def test_creates_users_and_profiles(self):
+        rows = read_rows(
+            io.StringIO(
+                self.HEADER
+                + "ali,secret1,Ali,Valiyev,100,PHY,1980-05-01,1500.00\n"
+                + "olim,secret2,Olim,Karimov,101,PHY,,\n"
+            )
+        )
+        self.assertEqual(import_professors(rows), 2)
+
+        ali = UniversityUser.objects.select_related("regular_user_profile").get(username="ali")
+        self.assertEqual(ali.role, "DU")
+        self.assertTrue(ali.check_password("secret1"))
+        self.assertEqual(ali.regular_user_profile.department, self.physics)
+        self.assertEqual(ali.regular_user_profile.base_salary, Decimal("1500.00"))
+        self.assertEqual(self.physics.members.count(), 2)
+
+    def test_rejects_the_whole_file(self):
+        rows = [
+            {"username": "ali", "password": "x", "first_name": "Ali", "last_name": "V", "phone_number": "100", "department": "PHY"},
+            {"username": "taken", "password": "x", "first_name": "T", "last_name": "T", "phone_number": "101", "department": "PHY"},
+            {"username": "ali", "password": "x", "first_name": "Ali", "last_name": "V", "phone_number": "999", "department": "NOPE"},
+            {"username": "bad name!", "password": "", "first_name": "B", "last_name": "B", "phone_number": "102", "department": "PHY"},
+        ]
+        with self.assertRaises(ProfessorImportError) as raised:
+            import_professors(rows)
+
+        self.assertEqual([line for line, _ in raised.exception.errors], [2, 3, 3, 3, 4, 4])
+        self.assertFalse(UniversityUser.objects.filter(username="ali").exists())
+
+    # Spawned workers load the settings module afresh, without the class's override.
+    @override_settings(PASSWORD_HASHERS=global_settings.PASSWORD_HASHERS)
+    @patch("users.bulk_import.POOL_THRESHOLD", 0)
+    def test_hashes_in_a_process_pool(self):
+        pools = []
+
+        def start_pool(*args, **kwargs):
+            pools.append(ProcessPoolExecutor(*args, **kwargs))
+            return pools[-1]
+
+        with patch("users.bulk_import.ProcessPoolExecutor", side_effect=start_pool) as pool:
+            hashes = hash_passwords(["one", "two", "three"], workers=2)
+            hash_passwords(["four"] * 3)
+        # Each import starts its own pool and shuts it down when done.
+        self.assertEqual(len(pools), 2)
+        self.assertTrue(all(started._shutdown_thread for started in pools))
+        self.assertEqual(pool.call_args_list[0].kwargs["max_workers"], 2)
+        self.assertEqual(pool.call_args.kwargs["mp_context"].get_start_method(), "spawn")
+        self.assertEqual(len(set(hashes)), 3)
+        self.assertTrue(check_password("two", hashes[1]))
+
+    def test_malformed_csv_is_a_form_error(self):
+        admin = UniversityUser.objects.create_superuser("admin", password="pass", phone_number="100", role="SA")
+        self.client.force_login(admin)
+        data = (self.HEADER + "ali,secret," + "A" * 200_000 + ",V,100,PHY\n").encode()
+        response = self.client.post(
+            reverse("users:import_department_users"), {"file": SimpleUploadedFile("staff.csv", data)}
+        )
+        self.assertContains(response, "field larger than field limit", status_code=400)
+        self.assertFalse(UniversityUser.objects.filter(username="ali").exists())
+
+
+@override_settings(
+    MEDIA_ROOT=f"{SCRATCH_DIR}/load/media",
+    SUBMISSION_BUNDLE_ROOT=f"{SCRATCH_DIR}/load/bundles",
+    CHUNKED_UPLOAD_ROOT=f"{SCRATCH_DIR}/load/uploads",
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class LoadTestTests(LiveServerTestCase):
+    def test_every_url_has_a_scenario(self):
+        names = {
+            pattern.name
+            for pattern in get_resolver("users.urls").url_patterns
+            if isinstance(pattern, URLPattern)
+        }
+        self.assertEqual(names, set(SCENARIOS))
+
+    def test_seed_and_benchmark_every_route(self):
+        counts = seed_dataset(
+            departments=2,
+            professors_per_department=2,
+            categories=2,
+            requirements_per_category=2,
+            submissions_per_professor=3,
+            mean_file_size=2048,
+        )
+        self.assertEqual(counts["submissions"], 12)
+        self.assertEqual(FileSubmission.objects.count(), counts["proof_files"])
+        self.assertEqual(SubmissionCounter.objects.aggregate(total=Sum("count"))["total"], 12)
+        seeded = dict(ProfessorWorkSubmission.objects.values_list("pk", "status"))
+        self.assertTrue({"SA", "DN"} & set(seeded.values()))
+
+        rows = lambda: [model.objects.count() for model in (ProfessorWorkSubmission, FileSubmission, UploadSession, Job)]
+        before = rows()
+
+        # One client: LiveServerTestCase shares a single SQLite connection across
+        # its request threads.
+        report = run_benchmark(self.live_server_url, requests=2, concurrency=1)
+
+        self.assertEqual(set(report["routes"]), set(SCENARIOS))
+        for name, result in report["routes"].items():
+            with self.subTest(name):
+                self.assertEqual(result["errors"], 0, result["statuses"])
+                self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+        statuses = ProfessorWorkSubmission.objects.filter(pk__in=seeded).values_list("pk", "status")
+        self.assertEqual(dict(statuses), seeded)
+        # Whatever the run added is gone, so the next run measures the same data.
+        self.assertEqual(rows(), before)
+        self.assertEqual(SubmissionCounter.objects.aggregate(total=Sum("count"))["total"], 12)
+
+
+@skipUnless(len(settings.DATABASES) > 1, "needs a second database alias to act as the replica")
+class ReplicaRouterTests(TransactionTestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        self.replica = next(alias for alias in settings.DATABASES if alias != "default")
+        replicas = override_settings(DATABASE_REPLICAS=[self.replica])
+        replicas.enable()
+        self.addCleanup(replicas.disable)
+        self.addCleanup(routers._down_until.clear)
+        # Committed rows are visible through the mirror, so route to it as to a real replica.
+        self.mirrors = patch("users.routers._mirrors_primary", return_value=False)
+        self.mirrors.start()
+        self.addCleanup(self.mirrors.stop)
+
+        admin = UniversityUser.objects.create_superuser("admin", password="pass", phone_number="100", role="SA")
+        self.category = WorkCategory.objects.create(name="Research")
+        self.submission = ProfessorWorkSubmission.objects.create(professor=admin, work_category=self.category)
+        self.client.force_login(admin)
+
+    def get(self, url, method="get"):
+        with CaptureQueriesContext(connections["default"]) as primary:
+            with CaptureQueriesContext(connections[self.replica]) as replica:
+                response = getattr(self.client, method)(url)
+        self.assertLess(response.status_code, 400)
+        return response, len(primary), len(replica)
+
+    def test_listing_reads_go_to_the_replica(self):
+        _, primary, replica = self.get(reverse("users:all_submissions_list"))
+        self.assertEqual(primary, 2)  # session and user
+        self.assertGreater(replica, 0)
+
+    def test_one_replica_per_request(self):
+        with patch("users.routers._healthy_replica", return_value=self.replica) as healthy_replica:
+            _, _, replica = self.get(reverse("users:all_submissions_list"))
+            self.assertGreater(replica, 1)
+            self.assertEqual(healthy_replica.call_count, 1)
+
+            self.get(reverse("users:all_submissions_list"))
+            self.assertEqual(healthy_replica.call_count, 2)
+
+    def test_test_mirrors_are_read_as_the_primary(self):
+        self.mirrors.stop()
+        self.assertTrue(routers._mirrors_primary(self.replica))
+        _, _, replica = self.get(reverse("users:all_submissions_list"))
+        self.assertEqual(replica, 0)
+
+    def test_writes_pin_reads_to_the_primary(self):
+        response, _, _ = self.get(reverse("users:approve_submission", args=[self.submission.pk]), "post")
+        self.assertEqual(response.cookies[routers.PIN_COOKIE]["max-age"], settings.REPLICA_STICKY_SECONDS)
+
+        _, _, replica = self.get(reverse("users:all_submissions_list"))
+        self.assertEqual(replica, 0)
+
+        del self.client.cookies[routers.PIN_COOKIE]
+        _, _, replica = self.get(reverse("users:all_submissions_list"))
+        self.assertGreater(replica, 0)
+
+    def test_async_requests_read_from_the_replica_until_they_write(self):
+        @routers.replica_reads
+        async def view(request):
+            await WorkCategory.objects.acount()
+            if request.method == "POST":
+                await ProfessorWorkSubmission.objects.filter(pk=self.submission.pk).aupdate(status="DA")
+                await WorkCategory.objects.acount()
+            return HttpResponse()
+
+        middleware = routers.ReplicaRoutingMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        for method, replica_reads in (("get", 1), ("post", 1)):
+            with self.subTest(method):
+                with CaptureQueriesContext(connections[self.replica]) as replica:
+                    response = async_to_sync(middleware)(getattr(RequestFactory(), method)("/"))
+                self.assertEqual(len(replica), replica_reads)
+                self.assertEqual(routers.PIN_COOKIE in response.cookies, method == "post")
+        self.assertIsNone(routers._routing.get())
+
+    def test_unavailable_replica_fails_over_to_the_primary(self):
+        with patch.object(
+            connections[self.replica], "ensure_connection", side_effect=OperationalError("replica down")
+        ) as ensure_connection:
+            for _ in range(2):
+                with CaptureQueriesContext(connections["default"]) as primary:
+                    response = self.client.get(reverse("users:all_submissions_list"))
+                self.assertContains(response, self.category.name)
+                self.assertGreater(len(primary), 2)
+        # The replica is skipped for REPLICA_RETRY_SECONDS after failing once.
+        self.assertEqual(ensure_connection.call_count, 1)
+
+
+class PayrollTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name="Physics", code="PHY")
+        cls.professor = UniversityUser.objects.create_user(
+            "prof", password="pass", phone_number="200", role="DU"
+        )
+        DepartmentUserProfile.objects.create(
+            user=cls.professor, department=department, base_salary=Decimal("1000.00")
+        )
+        research = WorkCategory.objects.create(name="Research", max_percentage=15)
+        teaching = WorkCategory.objects.create(name="Teaching", max_percentage=20)
+        cls.papers = [
+            Requirement.objects.create(work_category=research, name=f"Paper {i}", max_percentage_increase=10)
+            for i in range(2)
+        ]
+        cls.course = Requirement.objects.create(work_category=teaching, name="Course", max_percentage_increase=5)
+        cls.research, cls.teaching = research, teaching
+
+    def submit(self, category, requirements, status="SA"):
+        submission = ProfessorWorkSubmission.objects.create(
+            professor=self.professor, work_category=category, status=status
+        )
+        submission.requirements.set(requirements)
+
+    def test_categories_are_capped_separately(self):
+        self.submit(self.research, self.papers)
+        self.submit(self.teaching, [self.course])
+        self.submit(self.teaching, [self.course], status="DA")
+
+        today = date.today()
+        [row] = compute_salary_increases(today.replace(month=1, day=1), today)
+
+        self.assertEqual(row.increase_percentage, 20)
+        self.assertEqual(row.increase_amount, Decimal("200.00"))
+        self.assertEqual(row.new_salary, Decimal("1200.00"))
+
+    def test_window_excludes_other_dates(self):
+        self.submit(self.teaching, [self.course])
+        self.assertEqual(compute_salary_increases(date(2000, 1, 1), date(2000, 12, 31)), [])
+
+    def test_csv_keeps_formulas_as_text(self):
+        UniversityUser.objects.filter(pk=self.professor.pk).update(first_name="=HYPERLINK(\"http://x\")", last_name="-1")
+        self.submit(self.research, self.papers)
+        today = date.today()
+        file = io.StringIO()
+        write_payroll_csv(compute_salary_increases(today.replace(month=1, day=1), today), file)
+        [header, row] = csv.reader(io.StringIO(file.getvalue()))
+        row = dict(zip(header, row))
+        self.assertEqual(row["first_name"], "'=HYPERLINK(\"http://x\")")
+        self.assertEqual(row["last_name"], "'-1")
+        self.assertEqual(row["username"], "prof")
+        self.assertEqual(row["new_salary"], "1150.00")
+
+
+class ExportTests(TestCase):
+    WINDOW = {"start": "2024-03-01", "end": "2024-03-31"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = UniversityUser.objects.create_superuser("admin", password="pass", phone_number="100", role="SA")
+        department = Department.objects.create(name="Physics", code="PHY")
+        cls.professor = UniversityUser.objects.create_user(
+            "prof", password="pass", phone_number="200", role="DU",
+            first_name='=HYPERLINK("http://example.com")', last_name="Valiyev",
+        )
+        DepartmentUserProfile.objects.create(user=cls.professor, department=department)
+        cls.category = WorkCategory.objects.create(name="Research", max_percentage=15)
+        cls.papers = [
+            Requirement.objects.create(work_category=cls.category, name=f"Paper {i}", max_percentage_increase=5)
+            for i in range(2)
+        ]
+        cls.submissions = [cls.submit(datetime(2024, 3, day, 12, tzinfo=dt_timezone.utc)) for day in (9, 2, 5)]
+        cls.submit(datetime(2024, 4, 2, 12, tzinfo=dt_timezone.utc))
+        cls.submissions.sort(key=lambda submission: submission.created_at)
+
+    @classmethod
+    def submit(cls, created_at):
+        submission = ProfessorWorkSubmission.objects.create(
+            professor=cls.professor, work_category=cls.category, status="SA",
+            submission_description="-1+2", action_description="ok",
+        )
+        submission.requirements.set(cls.papers)
+        ProfessorWorkSubmission.objects.filter(pk=submission.pk).update(created_at=created_at)
+        submission.created_at = created_at
+        return submission
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def assertRows(self, rows):
+        rows = [list(row) for row in rows]
+        self.assertEqual(rows[0], list(EXPORT_COLUMNS))
+        self.assertEqual([int(row[0]) for row in rows[1:]], [s.pk for s in self.submissions])
+        self.assertEqual(
+            rows[1][3:],
+            [
+                """'=HYPERLINK("http://example.com") Valiyev""",
+                "prof", "Physics", "Research", "Paper 0; Paper 1", "Super Approved", "'-1+2", "ok",
+            ],
+        )
+
+    def test_csv(self):
+        response = self.client.get(reverse("users:export_submissions"), self.WINDOW)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        body = b"".join(response.streaming_content).decode()
+        self.assertRows(csv.reader(io.StringIO(body)))
+
+    def test_xlsx(self):
+        response = self.client.get(reverse("users:export_submissions"), {**self.WINDOW, "format": "xlsx"})
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="submissions-2024-03-01-2024-03-31.xlsx"')
+        workbook = openpyxl.load_workbook(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertRows(workbook["Submissions"].iter_rows(values_only=True))
+
+    def test_xlsx_writer_keeps_formulas_as_text(self):
+        file = io.BytesIO()
+        write_xlsx([(1, "=1+1", "@SUM(A1)", "plain")], file)
+        file.seek(0)
+        sheet = openpyxl.load_workbook(file)["Submissions"]
+        self.assertEqual(list(sheet.iter_rows(min_row=2, max_col=4, values_only=True)), [(1, "'=1+1", "'@SUM(A1)", "plain")])
+
+    def test_streams_in_chunks(self):
+        rows = submission_rows(date(2024, 3, 1), date(2024, 3, 31), chunk_size=2)
+        # One query for the submissions, one requirements prefetch per chunk.
+        with self.assertNumQueries(3):
+            self.assertEqual([row[0] for row in rows], [s.pk for s in self.submissions])
+
+    def test_command(self):
+        stdout = io.StringIO()
+        with patch("sys.stdout", stdout):
+            call_command("export_submissions", start="2024-03-01", end="2024-03-31")
+        self.assertRows(csv.reader(io.StringIO(stdout.getvalue())))
+
+        output = f"{SCRATCH_DIR}/export.xlsx"
+        call_command("export_submissions", start="2024-03-01", end="2024-03-31", format="xlsx", output=output)
+        self.assertRows(openpyxl.load_workbook(output)["Submissions"].iter_rows(values_only=True))
+        os.remove(output)
+
+        with self.assertRaises(CommandError):
+            call_command("export_submissions", format="xlsx")
+
+
+class AccessTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.head = UniversityUser.objects.create_user("head", password="pass", phone_number="100", role="DA")
+        cls.other_head = UniversityUser.objects.create_user("head2", password="pass", phone_number="101", role="DA")
+        cls.physics = Department.objects.create(name="Physics", code="PHY", department_admin=cls.head)
+        cls.chemistry = Department.objects.create(name="Chemistry", code="CHM")
+        cls.professor = UniversityUser.objects.create_user("prof", password="pass", phone_number="200", role="DU")
+        cls.profile = DepartmentUserProfile.objects.create(user=cls.professor, department=cls.physics)
+
+    def setUp(self):
+        cache.clear()
+
+    def dashboard(self, department):
+        return self.client.get(reverse("users:department_admin_dashboard", args=[department.pk]))
+
+    def test_login_redirects_by_role(self):
+        for username, url in (
+            ("head", reverse("users:department_admin_dashboard", args=[self.physics.pk])),
+            ("prof", reverse("users:work_categories")),
+        ):
+            with self.subTest(username):
+                response = self.client.post(reverse("users:login"), {"username": username, "password": "pass"})
+                self.assertRedirects(response, url, fetch_redirect_response=False)
+
+    def test_department_scoping_is_cached(self):
+        self.client.force_login(self.head)
+        self.assertEqual(self.dashboard(self.physics).status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.dashboard(self.physics)
+        self.assertContains(response, "Physics")
+        self.assertFalse([q for q in queries if '"users_department' in q["sql"]])
+        self.assertEqual(self.dashboard(self.chemistry).status_code, 403)
+
+    def test_async_requests_await_their_access(self):
+        async def view(request):
+            access = await request.aaccess()
+            return HttpResponse(access.department_name)
+
+        async def auser():
+            return self.head
+
+        middleware = AccessMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        request = RequestFactory().get("/")
+        request.auser = auser
+        self.assertEqual(async_to_sync(middleware)(request).content, b"Physics")
+
+    def test_changes_are_picked_up(self):
+        self.client.force_login(self.head)
+        self.dashboard(self.physics)
+        self.physics.department_admin = self.other_head
+        self.physics.save()
+        self.assertEqual(self.dashboard(self.physics).status_code, 403)
+        self.client.force_login(self.other_head)
+        self.assertEqual(self.dashboard(self.physics).status_code, 200)
+
+        self.client.force_login(self.professor)
+        self.assertEqual(self.client.get(reverse("users:work_categories")).wsgi_request.department, self.physics)
+        self.profile.department = self.chemistry
+        self.profile.save()
+        self.assertEqual(self.client.get(reverse("users:work_categories")).wsgi_request.department, self.chemistry)
+
+    def test_revoked_rights_reach_workers_through_the_shared_cache(self):
+        self.client.force_login(self.head)
+        self.assertEqual(self.dashboard(self.physics).status_code, 200)
+        # Another worker's connection to the same cache handles the change.
+        with patch("users.access.cache", caches.create_connection(DEFAULT_CACHE_ALIAS)):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.physics.department_admin = self.other_head
+                self.physics.save()
+        self.assertEqual(self.dashboard(self.physics).status_code, 403)
+
+
+@override_settings(STATIC_ROOT=f"{SCRATCH_DIR}/static", STATICFILES_DIRS=[f"{SCRATCH_DIR}/assets"])
+class StaticAssetTests(TestCase):
+    def setUp(self):
+        os.makedirs(f"{SCRATCH_DIR}/assets/css", exist_ok=True)
+        with open(f"{SCRATCH_DIR}/assets/css/site.css", "w") as css:
+            css.write("body { color: #123456; }\n" * 200)
+        call_command("collectstatic", interactive=False, verbosity=0)
+
+    def tearDown(self):
+        shutil.rmtree(f"{SCRATCH_DIR}/static", ignore_errors=True)
+        shutil.rmtree(f"{SCRATCH_DIR}/assets", ignore_errors=True)
+
+    def test_hashed_files_are_precompressed_and_immutable(self):
+        url = static("css/site.css")
+        self.assertNotEqual(url, "/static/css/site.css")
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        body = gzip.decompress(b"".join(response.streaming_content))
+        self.assertEqual(body, b"body { color: #123456; }\n" * 200)
+
+        response = self.client.get(url)
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_unhashed_names_revalidate(self):
+        response = self.client.get("/static/css/site.css", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Cache-Control"], "public, max-age=0, must-revalidate")
+        response.close()
+        response = self.client.get("/static/css/site.css", HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(MEDIA_ROOT=f"{SCRATCH_DIR}/media")
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = UniversityUser.objects.create_superuser("admin", password="pass", phone_number="100", role="SA")
+        cls.professor = UniversityUser.objects.create_user("prof", password="pass", phone_number="200", role="DU")
+        cls.category = WorkCategory.objects.create(name="Research", max_percentage=30)
+        cls.requirement = Requirement.objects.create(
+            work_category=cls.category, name="Paper", max_percentage_increase=10
+        )
+        cls.submission = ProfessorWorkSubmission.objects.create(professor=cls.professor, work_category=cls.category)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def revalidate(self, url):
+        etag = self.client.get(url)["ETag"]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        return response, len(queries)
+
+    def test_unchanged_listing_is_not_rendered(self):
+        url = reverse("users:list_processing_submissions")
+        response = self.client.get(url)
+        self.assertContains(response, "Research")
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        response, queries = self.revalidate(url)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertLessEqual(queries, 3)
+
+    def test_changes_move_the_etag(self):
+        for url, change in (
+            (
+                reverse("users:list_processing_submissions"),
+                lambda: ProfessorWorkSubmission.transition([self.submission.pk], "PR", "DA"),
+            ),
+            (
+                reverse("users:approved_submissions"),
+                lambda: ProfessorWorkSubmission.transition([self.submission.pk], "DA", "SA"),
+            ),
+            (
+                reverse("users:my_submissions_list"),
+                lambda: FileSubmission.objects.create(
+                    proof_file=ContentFile(b"proof", name="proof.pdf"),
+                    requirement=self.requirement,
+                    work_submission=self.submission,
+                ),
+            ),
+            (reverse("users:work_categories"), lambda: self.category.requirements.create(name="Book", max_percentage_increase=5)),
+        ):
+            with self.subTest(url):
+                if "my-list" in url:
+                    self.client.force_login(self.professor)
+                etag = self.client.get(url)["ETag"]
+                change()
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response["ETag"], etag)
+
+    def test_related_rows_move_the_listing_etag(self):
+        physics = Department.objects.create(name="Physics", code="PHY")
+        profile = DepartmentUserProfile.objects.create(user=self.professor, department=physics)
+        url = reverse("users:list_processing_submissions")
+
+        def rename_professor():
+            self.professor.first_name = "Olim"
+            self.professor.save()
+
+        def rename_department():
+            physics.name = "Physics and Astronomy"
+            physics.save()
+
+        def rename_category():
+            self.category.name = "Research papers"
+            self.category.save()
+
+        for change in (rename_professor, rename_department, profile.delete, rename_category):
+            with self.subTest(change.__name__):
+                etag = self.client.get(url)["ETag"]
+                change()
+                self.assertNotEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        etag = self.client.get(url)["ETag"]
+        self.client.login(username="prof", password="pass")
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_versions_bumped_by_another_worker_move_the_etag(self):
+        physics = Department.objects.create(name="Physics", code="PHY")
+        DepartmentUserProfile.objects.create(user=self.professor, department=physics)
+        url = reverse("users:list_processing_submissions")
+
+        def rename_department():
+            physics.name = "Physics and Astronomy"
+            physics.save()
+
+        def rename_category():
+            self.category.name = "Research papers"
+            self.category.save()
+
+        for change, name in ((rename_department, "Physics and Astronomy"), (rename_category, "Research papers")):
+            with self.subTest(change.__name__):
+                etag = self.client.get(url)["ETag"]
+                # The edit is handled by a worker with its own connection to the cache.
+                with patch("users.utils.cache", caches.create_connection(DEFAULT_CACHE_ALIAS)):
+                    with self.captureOnCommitCallbacks(execute=True):
+                        change()
+                self.assertContains(self.client.get(url, HTTP_IF_NONE_MATCH=etag), name)
+
+    def test_etag_is_per_user(self):
+        url = reverse("users:work_categories")
+        etag = self.client.get(url)["ETag"]
+        self.client.force_login(self.professor)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(MEDIA_ROOT=f"{SCRATCH_DIR}/media", SUBMISSION_BUNDLE_ROOT=f"{SCRATCH_DIR}/bundles")
+class FileDownloadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        physics = Department.objects.create(name="Physics", code="PHY")
+        cls.head = UniversityUser.objects.create_user("head", password="pass", phone_number="100", role="DA")
+        physics.department_admin = cls.head
+        physics.save()
+        cls.other_head = UniversityUser.objects.create_user("head2", password="pass", phone_number="101", role="DA")
+        Department.objects.create(name="Chemistry", code="CHM", department_admin=cls.other_head)
+        cls.professor = UniversityUser.objects.create_user("prof", password="pass", phone_number="200", role="DU")
+        DepartmentUserProfile.objects.create(user=cls.professor, department=physics)
+        cls.stranger = UniversityUser.objects.create_user("other", password="pass", phone_number="201", role="DU")
+        category = WorkCategory.objects.create(name="Research", max_percentage=30)
+        cls.requirement = Requirement.objects.create(work_category=category, name="Paper", max_percentage_increase=10)
+        cls.submission = ProfessorWorkSubmission.objects.create(professor=cls.professor, work_category=category)
+
+    def setUp(self):
+        cache.clear()
+        self.file = FileSubmission.objects.create(
+            proof_file=ContentFile(b"0123456789", name="scan.pdf"),
+            original_filename="Maqola.pdf",
+            requirement=self.requirement,
+            work_submission=self.submission,
+        )
+        self.url = reverse("users:download_file", args=[self.file.pk])
+        self.client.force_login(self.professor)
+
+    def tearDown(self):
+        shutil.rmtree(f"{SCRATCH_DIR}/media", ignore_errors=True)
+        shutil.rmtree(f"{SCRATCH_DIR}/bundles", ignore_errors=True)
+
+    def test_whole_file(self):
+        response = self.client.get(self.url)
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="Maqola.pdf"')
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+    def test_ranges(self):
+        for header, status, body in (
+            ("bytes=2-5", 206, b"2345"),
+            ("bytes=7-", 206, b"789"),
+            ("bytes=-3", 206, b"789"),
+            ("bytes=8-100", 206, b"89"),
+            ("bytes=0-1,4-5", 200, b"0123456789"),
+        ):
+            with self.subTest(header):
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, status)
+                self.assertEqual(b"".join(response.streaming_content), body)
+                self.assertEqual(response["Content-Length"], str(len(body)))
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=2-5")
+        self.assertEqual(response["Content-Range"], "bytes 2-5/10")
+        b"".join(response.streaming_content)
+        response = self.client.get(self.url, HTTP_RANGE="bytes=10-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */10")
+        response = self.client.get(self.url, HTTP_RANGE="bytes=2-5", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+
+    def test_access(self):
+        bundle_url = reverse("users:download_submission", args=[self.submission.pk])
+        for user, status in ((self.head, 200), (self.other_head, 403), (self.stranger, 403)):
+            with self.subTest(user.username):
+                self.client.force_login(user)
+                for url in (self.url, bundle_url):
+                    response = self.client.get(url)
+                    self.assertEqual(response.status_code, status, url)
+                    if response.streaming:
+                        b"".join(response.streaming_content)
+        self.client.logout()
+        self.assertRedirects(
+            self.client.get(bundle_url), f"{reverse('users:login')}?next={bundle_url}", fetch_redirect_response=False
+        )
+
+    @override_settings(SENDFILE_BACKEND="x-accel-redirect", SENDFILE_LOCATIONS={f"{SCRATCH_DIR}/media": "/internal/media/"})
+    def test_web_server_sends_the_bytes(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["X-Accel-Redirect"], "/internal/media/" + self.file.proof_file.name)
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="Maqola.pdf"')
+
+
+class SubmissionCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.physics = Department.objects.create(name="Physics", code="PHY")
+        cls.professor = UniversityUser.objects.create_user("prof", password="pass", phone_number="200", role="DU")
+        DepartmentUserProfile.objects.create(user=cls.professor, department=cls.physics)
+        cls.research = WorkCategory.objects.create(name="Research", max_percentage=30)
+        cls.teaching = WorkCategory.objects.create(name="Teaching", max_percentage=20)
+
+    def submit(self, category=None, status="PR"):
+        return ProfessorWorkSubmission.objects.create(
+            professor=self.professor, work_category=category or self.research, status=status
+        )
+
+    def counts(self, category=None):
+        return dict(
+            SubmissionCounter.objects.filter(work_category=category or self.research).values_list("status", "count")
+        )
+
+    def test_create_transition_and_delete(self):
+        first, second = self.submit(), self.submit()
+        self.assertEqual(self.counts(), {"PR": 2, "DA": 0, "SA": 0, "DN": 0})
+
+        ProfessorWorkSubmission.transition([first.pk], "PR", "DA")
+        second.status = "DN"
+        second.save()
+        self.assertEqual(self.counts(), {"PR": 0, "DA": 1, "SA": 0, "DN": 1})
+
+        second.delete()
+        self.assertEqual(self.counts(), {"PR": 0, "DA": 1, "SA": 0, "DN": 0})
+        self.assertEqual(SubmissionCounter.totals(self.physics)["pending"], 1)
+
+    def test_deleting_the_category_drops_its_counters(self):
+        self.submit(self.research)
+        self.submit(self.teaching)
+        self.research.delete()
+        self.assertFalse(SubmissionCounter.objects.filter(work_category_id=self.research.pk).exists())
+        self.assertEqual(self.counts(self.teaching)["PR"], 1)
+
+    def test_deleting_the_professor_uncounts_their_submissions(self):
+        self.submit()
+        self.submit(status="DA")
+        self.professor.delete()
+        self.assertEqual(SubmissionCounter.totals(), {"pending": 0, "department_approved": 0, "approved": 0, "denied": 0})
+
+    def test_rebuild_creates_every_status_row(self):
+        submission = self.submit()
+        self.submit(status="DA")
+        SubmissionCounter.objects.update(count=7)
+        SubmissionCounter.rebuild()
+        self.assertEqual(self.counts(), {"PR": 1, "DA": 1, "SA": 0, "DN": 0})
+        with CaptureQueriesContext(connection) as queries:
+            ProfessorWorkSubmission.transition([submission.pk], "PR", "SA")
+        self.assertFalse([q for q in queries if q["sql"].startswith("INSERT")])
+        self.assertEqual(self.counts(), {"PR": 0, "DA": 1, "SA": 1, "DN": 0})
+
+
+    def test_batches_across_departments_take_one_update(self):
+        chemistry = Department.objects.create(name="Chemistry", code="CHE")
+        chemist = UniversityUser.objects.create_user("chem", password="pass", phone_number="201", role="DU")
+        DepartmentUserProfile.objects.create(user=chemist, department=chemistry)
+        submissions = [self.submit(), self.submit(self.teaching), self.submit()]
+        submissions += [
+            ProfessorWorkSubmission.objects.create(professor=chemist, work_category=category)
+            for category in (self.research, self.teaching)
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            ProfessorWorkSubmission.transition([s.pk for s in submissions], "PR", "DA")
+        counter_writes = [q for q in queries if "users_submissioncounter" in q["sql"]]
+        self.assertEqual(len(counter_writes), 1)
+
+        self.assertEqual(
+            set(SubmissionCounter.objects.filter(count__gt=0).values_list("department", "work_category", "status", "count")),
+            {
+                (self.physics.pk, self.research.pk, "DA", 2),
+                (self.physics.pk, self.teaching.pk, "DA", 1),
+                (chemistry.pk, self.research.pk, "DA", 1),
+                (chemistry.pk, self.teaching.pk, "DA", 1),
+            },
+        )
+
+    def test_transition_creates_missing_counter_rows(self):
+        first, second = self.submit(), self.submit(self.teaching)
+        SubmissionCounter.objects.filter(work_category=self.teaching).delete()
+        ProfessorWorkSubmission.transition([first.pk, second.pk], "PR", "SA")
+        self.assertEqual(self.counts(), {"PR": 0, "DA": 0, "SA": 1, "DN": 0})
+        self.assertEqual(self.counts(self.teaching), {"PR": -1, "DA": 0, "SA": 1, "DN": 0})
+
+    def test_moving_the_professor_moves_their_counts(self):
+        chemistry = Department.objects.create(name="Chemistry", code="CHE")
+        submission = self.submit()
+        profile = DepartmentUserProfile.objects.get(user=self.professor)
+        profile.department = chemistry
+        profile.save()
+        ProfessorWorkSubmission.transition([submission.pk], "PR", "DA")
+
+        self.assertEqual(
+            set(SubmissionCounter.objects.exclude(count=0).values_list("department", "status", "count")),
+            {(chemistry.pk, "DA", 1)},
+        )
+        self.assertEqual(SubmissionCounter.totals(self.physics)["pending"], 0)
+
+    def test_transitions_after_a_partial_backfill(self):
+        first, second = self.submit(), self.submit(self.teaching)
+        # Counters backfilled before every status got a row only have the
+        # statuses that had submissions.
+        SubmissionCounter.objects.filter(count=0).delete()
+        ProfessorWorkSubmission.transition([first.pk, second.pk], "PR", "DA")
+        self.assertEqual(self.counts(), {"PR": 0, "DA": 1, "SA": 0, "DN": 0})
+        self.assertEqual(self.counts(self.teaching), {"PR": 0, "DA": 1, "SA": 0, "DN": 0})
+        self.assertEqual(SubmissionCounter.totals(self.physics)["department_approved"], 2)
+
+    def test_backfill_creates_every_status_row(self):
+        self.submit()
+        self.submit(self.teaching, status="DA")
+        SubmissionCounter.objects.all().delete()
+        spec = importlib.util.spec_from_file_location(
+            "users.migrations.counters",
+            os.path.join(os.path.dirname(__file__), "migrations", "0006_submission_counters.py"),
+        )
+        migration = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(migration)
+        migration.count_existing_submissions(django_apps, None)
+        self.assertEqual(self.counts(), {"PR": 1, "DA": 0, "SA": 0, "DN": 0})
+        self.assertEqual(self.counts(self.teaching), {"PR": 0, "DA": 1, "SA": 0, "DN": 0})
+
+
+@override_settings(MEDIA_ROOT=f"{SCRATCH_DIR}/media", CHUNKED_UPLOAD_ROOT=f"{SCRATCH_DIR}/uploads")
+class ChunkedUploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor = UniversityUser.objects.create_user("prof", password="pass", phone_number="200", role="DU")
+        research = WorkCategory.objects.create(name="Research", max_percentage=30)
+        teaching = WorkCategory.objects.create(name="Teaching", max_percentage=20)
+        cls.paper = Requirement.objects.create(work_category=research, name="Paper", max_percentage_increase=10)
+        cls.course = Requirement.objects.create(work_category=teaching, name="Course", max_percentage_increase=5)
+        cls.submission = ProfessorWorkSubmission.objects.create(professor=cls.professor, work_category=research)
+
+    def setUp(self):
+        self.client.force_login(self.professor)
+
+    def tearDown(self):
+        shutil.rmtree(f"{SCRATCH_DIR}/media", ignore_errors=True)
+        shutil.rmtree(f"{SCRATCH_DIR}/uploads", ignore_errors=True)
+
+    def open_session(self, requirement=None, size=10):
+        return self.client.post(
+            reverse("users:create_upload_session"),
+            {
+                "submission_id": self.submission.pk,
+                "requirement_id": (requirement or self.paper).pk,
+                "filename": "scan.pdf",
+                "size": size,
+            },
+        )
+
+    def put(self, session_id, offset, data):
+        return self.client.put(
+            reverse("users:upload_session", args=[session_id]) + f"?offset={offset}",
+            data,
+            content_type="application/octet-stream",
+        )
+
+    def finalize(self, session_id):
+        return self.client.post(reverse("users:finalize_upload_session", args=[session_id]))
+
+    def test_chunks_in_any_order(self):
+        session_id = self.open_session().json()["id"]
+        self.assertEqual(self.put(session_id, 6, b"6789").json()["received"], [[6, 10]])
+        self.assertEqual(self.finalize(session_id).status_code, 409)
+        status = self.put(session_id, 0, b"012345").json()
+        self.assertEqual(status["received"], [[0, 10]])
+        self.assertTrue(status["complete"])
+
+        self.assertEqual(self.finalize(session_id).status_code, 201)
+        file_submission = self.submission.file_submissions.get()
+        self.assertEqual(file_submission.proof_file.read(), b"0123456789")
+        self.assertFalse(os.path.exists(f"{SCRATCH_DIR}/uploads/{session_id}.part"))
+
+    def test_rejects_requirements_of_other_categories_and_oversized_files(self):
+        self.assertEqual(self.open_session(self.course).status_code, 404)
+        with override_settings(PROOF_FILE_MAX_BYTES=5):
+            self.assertEqual(self.open_session().status_code, 400)
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_only_submissions_under_review_take_files(self):
+        session_id = self.open_session().json()["id"]
+        self.put(session_id, 0, b"0123456789")
+        ProfessorWorkSubmission.transition([self.submission.pk], "PR", "DA")
+
+        self.assertEqual(self.finalize(session_id).status_code, 409)
+        self.assertEqual(self.open_session().status_code, 404)
+        self.assertFalse(self.submission.file_submissions.exists())
+        self.assertFalse(self.submission.requirements.exists())
+
+    def test_abandoned_sessions_are_purged(self):
+        session_id = self.open_session().json()["id"]
+        UploadSession.objects.update(created_at=timezone.now() - timedelta(days=3))
+        call_command("purge_upload_sessions", stdout=io.StringIO())
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(os.path.exists(f"{SCRATCH_DIR}/uploads/{session_id}.part"))
+
+
+class TransitionPermissionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = UniversityUser.objects.create_superuser("admin", password="pass", phone_number="1", role="SA")
+        cls.head = UniversityUser.objects.create_user("head", password="pass", phone_number="100", role="DA")
+        physics = Department.objects.create(name="Physics", code="PHY", department_admin=cls.head)
+        chemistry = Department.objects.create(name="Chemistry", code="CHM")
+        cls.professor = UniversityUser.objects.create_user("prof", password="pass", phone_number="200", role="DU")
+        DepartmentUserProfile.objects.create(user=cls.professor, department=physics)
+        chemist = UniversityUser.objects.create_user("chemist", password="pass", phone_number="201", role="DU")
+        DepartmentUserProfile.objects.create(user=chemist, department=chemistry)
+        category = WorkCategory.objects.create(name="Research", max_percentage=30)
+        cls.own = ProfessorWorkSubmission.objects.create(professor=cls.professor, work_category=category)
+        cls.approved = ProfessorWorkSubmission.objects.create(
+            professor=cls.professor, work_category=category, status="DA"
+        )
+        cls.foreign = ProfessorWorkSubmission.objects.create(professor=chemist, work_category=category)
+
+    def setUp(self):
+        cache.clear()
+
+    def bulk(self, transition, *submissions):
+        return self.client.post(
+            reverse("users:bulk_transition"),
+            {"transition": transition, "ids": [s.pk for s in submissions] + ["junk"]},
+        )
+
+    def statuses(self):
+        return dict(ProfessorWorkSubmission.objects.values_list("pk", "status"))
+
+    def test_superadmin_moves_submissions_still_in_the_from_status(self):
+        self.client.force_login(self.admin)
+        response = self.bulk("approve", self.own, self.approved, self.foreign)
+        self.assertEqual(response.json(), {
+            "moved": sorted([self.own.pk, self.foreign.pk]),
+            "skipped": [self.approved.pk],
+        })
+        self.assertEqual(self.statuses(), {self.own.pk: "DA", self.approved.pk: "DA", self.foreign.pk: "DA"})
+        self.assertEqual(self.bulk("approve", self.own).json(), {"moved": [], "skipped": [self.own.pk]})
+        self.assertEqual(self.bulk("approve_da", self.approved).json(), {"moved": [self.approved.pk], "skipped": []})
+
+    def test_department_admin_only_moves_their_department(self):
+        self.client.force_login(self.head)
+        response = self.bulk("decline", self.own, self.foreign)
+        self.assertEqual(response.json(), {"moved": [self.own.pk], "skipped": [self.foreign.pk]})
+        self.assertEqual(self.statuses()[self.foreign.pk], "PR")
+
+        self.client.post(reverse("users:approve_submission", args=[self.foreign.pk]))
+        self.assertEqual(self.statuses()[self.foreign.pk], "PR")
+
+    def test_only_superadmins_pass_the_department_stage(self):
+        self.client.force_login(self.head)
+        self.assertEqual(self.bulk("approve_da", self.approved).status_code, 403)
+        self.assertEqual(
+            self.client.post(reverse("users:approve_submission_da", args=[self.approved.pk])).status_code, 403
+        )
+        self.assertEqual(self.statuses()[self.approved.pk], "DA")
+
+    def test_single_transitions_need_a_post(self):
+        self.client.force_login(self.admin)
+        for name, submission in (
+            ("users:approve_submission", self.own),
+            ("users:decline_submission", self.own),
+            ("users:approve_submission_da", self.approved),
+            ("users:decline_submission_da", self.approved),
+        ):
+            with self.subTest(name):
+                url = reverse(name, args=[submission.pk])
+                self.assertEqual(self.client.get(url).status_code, 405)
+        self.assertEqual(self.statuses(), {self.own.pk: "PR", self.approved.pk: "DA", self.foreign.pk: "PR"})
+        self.client.post(reverse("users:approve_submission", args=[self.own.pk]))
+        self.assertEqual(self.statuses()[self.own.pk], "DA")
+
+    def test_professors_and_visitors_are_refused(self):
+        self.client.force_login(self.professor)
+        self.assertEqual(self.bulk("approve", self.own).status_code, 403)
+        self.assertEqual(self.client.post(reverse("users:approve_submission", args=[self.own.pk])).status_code, 403)
+        self.client.logout()
+        self.assertEqual(self.bulk("approve", self.own).status_code, 302)
+        self.assertEqual(self.statuses()[self.own.pk], "PR")
@@ -0,0 +1,87 @@
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+
+from .models import UploadSession
+
+UPLOAD_READ_SIZE = 64 * 1024
+
+
+class AssembledUpload(File):
+    """
+    A finished upload session's part file. Exposing ``temporary_file_path``
+    lets FileSystemStorage move it into place instead of copying it.
+    """
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def part_path(session):
+    return os.path.join(settings.CHUNKED_UPLOAD_ROOT, f"{session.pk}.part")
+
+
+def allocate_part(session):
+    """Create the session's part file at its final (sparse) size."""
+    if session.size > settings.PROOF_FILE_MAX_BYTES:
+        raise ValueError(f"Proof files are limited to {settings.PROOF_FILE_MAX_BYTES} bytes.")
+    os.makedirs(settings.CHUNKED_UPLOAD_ROOT, exist_ok=True)
+    with open(part_path(session), "wb") as part:
+        part.truncate(session.size)
+
+
+def write_chunk(session, offset, stream, length):
+    """
+    Copy ``length`` bytes from ``stream`` into the session's part file at
+    ``offset`` and return how many bytes were written. Chunks may arrive in
+    any order, so each writer opens the file on its own and seeks.
+    """
+    fd = os.open(part_path(session), os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+    written = 0
+    with os.fdopen(fd, "r+b") as part:
+        part.seek(offset)
+        while written < length:
+            data = stream.read(min(UPLOAD_READ_SIZE, length - written))
+            if not data:
+                break
+            part.write(data)
+            written += len(data)
+    return written
+
+
+def received_ranges(session):
+    """Merge the session's chunks into sorted, non-overlapping ``[start, end)`` ranges."""
+    ranges = []
+    for offset, length in session.chunks.order_by("offset").values_list("offset", "length"):
+        end = offset + length
+        if ranges and offset <= ranges[-1][1]:
+            ranges[-1][1] = max(ranges[-1][1], end)
+        else:
+            ranges.append([offset, end])
+    return ranges
+
+
+def is_complete(session, ranges=None):
+    if ranges is None:
+        ranges = received_ranges(session)
+    if session.size == 0:
+        return True
+    return len(ranges) == 1 and ranges[0] == [0, session.size]
+
+
+def discard_part(session):
+    try:
+        os.unlink(part_path(session))
+    except FileNotFoundError:
+        pass
+
+
+def purge_stale_sessions():
+    """Delete upload sessions older than ``UPLOAD_SESSION_MAX_AGE_HOURS``, with their part files. Returns how many."""
+    cutoff = timezone.now() - timedelta(hours=settings.UPLOAD_SESSION_MAX_AGE_HOURS)
+    # Queryset deletes still send post_delete, which removes each part file.
+    _, deleted = UploadSession.objects.filter(created_at__lt=cutoff).delete()
+    return deleted.get(UploadSession._meta.label, 0)
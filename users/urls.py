@@ -1,6 +1,10 @@
+from django.conf import settings
 from django.urls import path
 from django.contrib.auth import views as auth_views
-from . import views
+from . import async_views, views
+
+# Listings and downloads run as async views under the ASGI profile.
+submission_views = async_views if settings.ASYNC_VIEWS else views
 
 app_name = "users"
 
@@ -11,6 +15,11 @@ urlpatterns = [
         views.create_department_user,
         name="create_department_user",
     ),
+    path(
+        "create_department_user/import/",
+        views.import_department_users,
+        name="import_department_users",
+    ),
     path("departments/", views.department_list, name="department_list"),
     path("create_workcategory/", views.create_work_category, name="create_work_category"),
     path("work_categories/", views.get_workcategories, name="work_categories"),
@@ -19,15 +28,29 @@ urlpatterns = [
          name='workcategory_edit'),
     path("work_submission/", views.submission_form_view, name="work_submission"),
     path("process_submission/", views.process_submission, name="process_submission"),
-    path("processing_submissions/", views.list_processing_submissions, name="list_processing_submissions"),
-    path('submission/<int:pk>/download/', views.download_submission, name='download_submission'),
+    path("uploads/", views.create_upload_session, name="create_upload_session"),
+    path("uploads/<uuid:session_id>/", views.upload_session, name="upload_session"),
+    path(
+        "uploads/<uuid:session_id>/finalize/",
+        views.finalize_upload_session,
+        name="finalize_upload_session",
+    ),
+    path("processing_submissions/", submission_views.list_processing_submissions, name="list_processing_submissions"),
+    path('submission/<int:pk>/download/', submission_views.download_submission, name='download_submission'),
+    path('files/<int:pk>/download/', views.download_file, name='download_file'),
+    path('files/<int:pk>/preview/', views.preview_file, name='preview_file'),
     path('submission/<int:pk>/approve/', views.approve_submission, name='approve_submission'),
     path('submission/<int:pk>/decline/', views.decline_submission, name='decline_submission'), 
-    path('submissions/approved/', views.department_approved_submissions, name='approved_submissions'),
+    path('submissions/approved/', submission_views.department_approved_submissions, name='approved_submissions'),
     path('submissions/approved/<int:pk>/approve/', views.approve_submission_da, name='approve_submission_da'),
     path('submissions/approved/<int:pk>/decline/', views.decline_submission_da, name='decline_submission_da'),
-    path('all_submissions/', views.all_submissions_list, name='all_submissions_list'),
-    path('submissions/my-list/', views.my_submissions_list, name='my_submissions_list'),
+    path('submissions/transition/', views.bulk_transition_submissions, name='bulk_transition'),
+    path('submissions/search/', views.submission_search, name='submission_search'),
+    path('submissions/export/', views.export_submissions, name='export_submissions'),
+    path('payroll/export/', views.payroll_export, name='payroll_export'),
+    path('jobs/', views.job_queue, name='job_queue'),
+    path('all_submissions/', submission_views.all_submissions_list, name='all_submissions_list'),
+    path('submissions/my-list/', submission_views.my_submissions_list, name='my_submissions_list'),
 
     path('', views.admin_dashboard, name='admin_dashboard'),
     path('departments/<int:department_id>/', views.department_admin_dashboard, name='department_admin_dashboard'),
@@ -1,5 +1,15 @@
 import os
 import uuid
+from datetime import date, datetime, time, timedelta
+from time import time_ns
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
 
 def generate_unique_filename(filename):
     ext = os.path.splitext(filename)[1]
@@ -8,4 +18,128 @@ def generate_unique_filename(filename):
 
 
 def submission_file_path(instance, filename):
-    return f'submissions/{instance.work_submission.pk}/{filename}'
\ No newline at end of file
+    return f'submissions/{instance.work_submission.pk}/{filename}'
+
+
+def read_file_chunks(path, chunk_size=64 * 1024):
+    with open(path, 'rb') as file:
+        yield from iter(lambda: file.read(chunk_size), b'')
+
+
+def mark_used(path):
+    """
+    Bump the mtime of the cached file at ``path``, which is what
+    ``evict_least_recently_used`` orders by. False if it is not cached.
+    """
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def evict_least_recently_used(paths, max_bytes, keep=None):
+    """Delete the least recently used of ``paths`` until the rest fit in ``max_bytes``, sparing ``keep``."""
+    entries = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+async def aiter_in_thread(iterator):
+    """
+    Drive a blocking iterator from async code, one item per hop to a worker
+    thread, so slow disk reads never stall the event loop.
+    """
+    iterator = iter(iterator)
+    sentinel = object()
+    try:
+        while True:
+            item = await sync_to_async(next, thread_sensitive=False)(iterator, sentinel)
+            if item is sentinel:
+                break
+            yield item
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            await sync_to_async(close, thread_sensitive=False)()
+
+
+def parse_window(start=None, end=None):
+    """
+    Parse an inclusive ``YYYY-MM-DD`` date window, defaulting to the current
+    calendar year up to today. Raises ``ValueError`` on malformed dates.
+    """
+    today = timezone.localdate()
+    start = parse_date(start) if start else today.replace(month=1, day=1)
+    end = parse_date(end) if end else today
+    if start is None or end is None:
+        raise ValueError("Dates must be given as YYYY-MM-DD.")
+    if start > end:
+        raise ValueError("The window starts after it ends.")
+    return start, end
+
+
+def window_bounds(start, end):
+    """Turn an inclusive date window into an aware ``[start, end)`` datetime range."""
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start, time.min), tz),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz),
+    )
+
+
+def academic_year(moment=None):
+    """The academic year ``moment`` (default: now) falls in, named by the year it starts in."""
+    day = timezone.localdate(moment)
+    return day.year if day.month >= settings.ACADEMIC_YEAR_START_MONTH else day.year - 1
+
+
+def academic_year_bounds(year):
+    """Aware ``[start, end)`` datetimes of an academic year."""
+    month = settings.ACADEMIC_YEAR_START_MONTH
+    return window_bounds(date(year, month, 1), date(year + 1, month, 1) - timedelta(days=1))
+
+
+def cache_version(key):
+    """
+    Current value of the version counter at ``key``. It starts from the clock,
+    so a counter lost to eviction never comes back as a number whose entries
+    are still cached.
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_cache_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time_ns(), None)
+
+
+def bump_cache_version(key):
+    """
+    Move the version counter at ``key`` now and once more on commit, so a
+    reader that cached the old rows in between is not served afterwards.
+    """
+    _bump_cache_version(key)
+    transaction.on_commit(lambda: _bump_cache_version(key))
@@ -1,15 +1,31 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import Http404, HttpResponse
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseNotAllowed,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.contrib.auth.views import LoginView
 from django.contrib.auth.decorators import user_passes_test
 from django.contrib.auth.hashers import make_password
 from django.views.generic import UpdateView
 from django.urls import reverse_lazy
 from django.forms.models import inlineformset_factory
+from django.utils.cache import get_conditional_response
+from django.utils.http import url_has_allowed_host_and_scheme
 from django.utils.text import slugify
-from io import BytesIO
-from zipfile import ZipFile
+from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.db.models import F
 
 from .models import (
     Department,
@@ -18,7 +34,11 @@ from .models import (
     WorkCategory,
     Requirement,
     ProfessorWorkSubmission,
-    FileSubmission
+    FileSubmission,
+    SubmissionCounter,
+    SubmissionRequirement,
+    UploadSession,
+    UploadChunk,
 )
 from .forms import (
     DepartmentAdminCreationForm,
@@ -27,7 +47,39 @@ from .forms import (
     RequirementCreationForm,
     WorkCategoryEditForm, 
     RequirementEditFormset,
+    ProfessorImportForm,
+)
+from .access import can_read
+from . import bulk_import
+from .bulk_import import ProfessorImportError, import_professors, read_rows
+from .bundles import cached_bundle, stream_and_cache_bundle
+from .catalog import get_catalog, get_catalog_category
+from .conditional import (
+    catalog_etag,
+    conditional_page,
+    department_approved_etag,
+    my_submissions_etag,
+    processing_etag,
 )
+from .downloads import sendfile
+from .exports import stream_csv, submission_rows, write_xlsx
+from .jobs import enqueue, queue_stats
+from .pagination import keyset_paginate, numbered_paginate
+from .payroll import compute_salary_increases, write_payroll_csv
+from .previews import build_preview, preview_version
+from .querybudget import extend_query_budget, query_budget
+from .routers import replica_reads
+from .search import search_submissions
+from .storage import hold_blobs, proof_file_storage
+from .uploads import (
+    AssembledUpload,
+    allocate_part,
+    is_complete,
+    part_path,
+    received_ranges,
+    write_chunk,
+)
+from .utils import parse_window
 
 
 def is_superadmin(user):
@@ -38,6 +90,19 @@ def is_department_admin(user):
     return user.role == "DA"
 
 
+def reviewable_department(request, from_status):
+    """
+    Which submissions the user may move out of ``from_status``: every one
+    for superadmins (None), their own department's for department admins
+    at the first review stage. Anyone else is refused.
+    """
+    if request.user.is_superuser:
+        return None
+    if from_status == "PR" and is_department_admin(request.user) and request.access.department_id is not None:
+        return request.access.department_id
+    raise PermissionDenied
+
+
 RequirementFormset = inlineformset_factory(
     WorkCategory,
     Requirement,
@@ -46,6 +111,7 @@ RequirementFormset = inlineformset_factory(
 )
 
 
+@query_budget(9)
 @user_passes_test(is_superadmin)
 def create_department_admin(request):
     if request.method == "POST":
@@ -76,14 +142,16 @@ def create_department_admin(request):
     return render(request, "users/create_department.html", {"form": form})
 
 
+@query_budget(3)
 @user_passes_test(is_superadmin)
 def department_list(request):
-    departments = Department.objects.all()
+    departments = Department.objects.select_related('department_admin')
     context = {"departments": departments}
     return render(request, "users/department_list.html", context)
 
 
 # @user_passes_test(is_department_admin)
+@query_budget(5)
 def create_department_user(request):
     if request.method == "POST":
         form = DepartmentUserCreationForm(request.POST)
@@ -105,7 +173,35 @@ def create_department_user(request):
     return render(request, "users/create_department_user.html", {"form": form})
 
 
+@query_budget(10)
+@user_passes_test(is_superadmin)
+def import_department_users(request):
+    errors = []
+    created = None
+    if request.method == "POST":
+        form = ProfessorImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data["file"]
+            try:
+                rows = read_rows(upload, upload.name)
+                batch_size = bulk_import.IMPORT_BATCH_SIZE
+                extend_query_budget(
+                    request, bulk_import.QUERIES_PER_BATCH * ((len(rows) - 1) // batch_size)
+                )
+                created = import_professors(rows, batch_size)
+            except ProfessorImportError as exc:
+                errors = exc.errors
+            except (UnicodeDecodeError, ValueError) as exc:
+                errors = [(0, str(exc))]
+    else:
+        form = ProfessorImportForm()
+    context = {"form": form, "errors": errors, "created": created}
+    status = 400 if errors else 200
+    return render(request, "users/import_department_users.html", context, status=status)
+
+
 # @user_passes_test(is_superadmin)
+@query_budget(2)
 def create_work_category(request):
     if request.method == "POST":
         category_form = WorkCategoryCreationForm(request.POST)
@@ -113,6 +209,7 @@ def create_work_category(request):
             request.POST, instance=category_form.instance
         )
         print(requirement_formset)
+        extend_query_budget(request, requirement_formset.total_form_count())
         if category_form.is_valid() and requirement_formset.is_valid():
             print("FORM IS VALID")
             category_form.save()
@@ -128,19 +225,34 @@ def create_work_category(request):
     )
 
 
+@query_budget(4)
+@conditional_page(catalog_etag)
 def get_workcategories(request):
-    work_categories = WorkCategory.objects.prefetch_related('requirements')
-    context = {'work_categories': work_categories}
+    catalog_version, work_categories = get_catalog()
+    context = {
+        'work_categories': work_categories,
+        'catalog_version': catalog_version,
+        'catalog_timeout': settings.CATALOG_CACHE_TIMEOUT,
+    }
     return render(request, 'users/get_workcategories.html', context)
 
 
+@query_budget(4)
+@conditional_page(catalog_etag)
 def get_workcategory_detail(request, pk):
-    work_category = get_object_or_404(WorkCategory, pk=pk)
-    context = {'work_category': work_category}
+    catalog_version, work_category = get_catalog_category(pk)
+    if work_category is None:
+        raise Http404("Work category not found.")
+    context = {
+        'work_category': work_category,
+        'catalog_version': catalog_version,
+        'catalog_timeout': settings.CATALOG_CACHE_TIMEOUT,
+    }
 
     return render(request, 'users/workcategory_detail.html', context)
 
 
+@query_budget(8)
 class WorkCategoryEditView(UpdateView):
     model = WorkCategory
     template_name = 'users/workcategory_edit.html'
@@ -158,6 +270,7 @@ class WorkCategoryEditView(UpdateView):
     def form_valid(self, form):
         ctx = self.get_context_data()
         formset = ctx['requirement_formset']
+        extend_query_budget(self.request, formset.total_form_count())
         if form.is_valid() and formset.is_valid():
             self.object = form.save()
             formset.save()
@@ -166,144 +279,473 @@ class WorkCategoryEditView(UpdateView):
             return self.render_to_response(self.get_context_data(form=form))
         
     
+@query_budget(4)
+@conditional_page(catalog_etag)
 def submission_form_view(request):
-    categories = WorkCategory.objects.all()
-    context = {'categories': categories}
+    catalog_version, categories = get_catalog()
+    context = {
+        'categories': categories,
+        'catalog_version': catalog_version,
+        'catalog_timeout': settings.CATALOG_CACHE_TIMEOUT,
+    }
     return render(request, 'users/work_submission.html', context)
 
 
+@query_budget(15)
+@login_required
+@require_POST
 def process_submission(request):
-     if request.method == 'POST':
-        category_id = request.POST.get('category_id')  
-
-        if not category_id:
-            raise Http404("Category ID not found.")
-
-        category = get_object_or_404(WorkCategory, pk=category_id)
-        professor = request.user
-
+    category_id = request.POST.get('category_id')  
+
+    if not category_id:
+        raise Http404("Category ID not found.")
+
+    category = get_object_or_404(WorkCategory, pk=category_id)
+    professor = request.user
+
+    files = {}
+    for key, file in request.FILES.items():
+        if key.startswith('requirement_'):
+            requirement_id = key.split('_')[1]
+            if not requirement_id.isdigit():
+                return HttpResponseBadRequest("Invalid requirement id.")
+            if file.size > settings.PROOF_FILE_MAX_BYTES:
+                return HttpResponseBadRequest(f"Proof files are limited to {settings.PROOF_FILE_MAX_BYTES} bytes.")
+            files[int(requirement_id)] = file
+
+    requirements = category.requirements.in_bulk(files)
+    if len(requirements) != len(files):
+        return HttpResponseBadRequest("Requirement does not belong to the chosen category.")
+
+    with transaction.atomic():
+        hold_blobs()
         submission = ProfessorWorkSubmission.objects.create(
             professor=professor,
             work_category=category 
         )
+        FileSubmission.objects.bulk_create(
+            FileSubmission(
+                proof_file=file,
+                original_filename=file.name,
+                requirement=requirements[requirement_id],
+                work_submission=submission,
+            )
+            for requirement_id, file in files.items()
+        )
+        SubmissionRequirement.objects.bulk_create(
+            SubmissionRequirement(
+                professorworksubmission_id=submission.pk,
+                requirement_id=requirement_id,
+            )
+            for requirement_id in requirements
+        )
+        enqueue("build_bundle", submission_id=submission.pk)
+        enqueue("build_previews", submission_id=submission.pk)
+
+    return redirect('users:work_categories')
+
+
+def _upload_status(session, ranges=None):
+    if ranges is None:
+        ranges = received_ranges(session)
+    return {
+        'id': str(session.pk),
+        'size': session.size,
+        'received': ranges,
+        'complete': is_complete(session, ranges),
+    }
+
+
+@query_budget(5)
+@login_required
+@require_POST
+def create_upload_session(request):
+    submission_id = request.POST.get('submission_id', '')
+    requirement_id = request.POST.get('requirement_id', '')
+    filename = os.path.basename(request.POST.get('filename', ''))
+    size = request.POST.get('size', '')
+    if not (submission_id.isdigit() and requirement_id.isdigit() and filename and size.isdigit()):
+        return HttpResponseBadRequest("submission_id, requirement_id, filename and size are required.")
+
+    if int(size) > settings.PROOF_FILE_MAX_BYTES:
+        return HttpResponseBadRequest(f"Proof files are limited to {settings.PROOF_FILE_MAX_BYTES} bytes.")
+
+    # Files can only be added while the submission is still under review.
+    submission = get_object_or_404(
+        ProfessorWorkSubmission.objects.active(), pk=submission_id, professor=request.user, status="PR"
+    )
+    requirement = get_object_or_404(Requirement, pk=requirement_id, work_category_id=submission.work_category_id)
+
+    session = UploadSession.objects.create(
+        professor=request.user,
+        work_submission=submission,
+        requirement=requirement,
+        filename=filename,
+        size=int(size),
+    )
+    allocate_part(session)
+    return JsonResponse(_upload_status(session, ranges=[]), status=201)
 
-        for key, file in request.FILES.items():
-            print(f"Key: {key}", file)
-            if key.startswith('requirement_'):
-                requirement_id = key.split('_')[1]
-                try:
-                    requirement = Requirement.objects.get(id=requirement_id)
-                    FileSubmission.objects.create(
-                        proof_file=file,
-                        requirement=requirement,
-                        work_submission=submission 
-                    ).save()
-                    submission.requirements.add(requirement)
-                except Requirement.DoesNotExist:
-                    print("-----------------Requirement.DoesNotExist------------------")
-
-        submission.save()
-        return redirect('users:work_categories')
-     
 
+@query_budget(10)
+@login_required
+def upload_session(request, session_id):
+    session = get_object_or_404(UploadSession, pk=session_id, professor=request.user)
+    if request.method == 'GET':
+        return JsonResponse(_upload_status(session))
+    if request.method != 'PUT':
+        return HttpResponseNotAllowed(['GET', 'PUT'])
+
+    offset = request.GET.get('offset', '')
+    length = request.META.get('CONTENT_LENGTH', '')
+    if not (offset.isdigit() and length.isdigit()):
+        return HttpResponseBadRequest("An offset and a Content-Length are required.")
+    offset, length = int(offset), int(length)
+    if length == 0 or offset + length > session.size:
+        return HttpResponseBadRequest("Chunk lies outside the file.")
+
+    if write_chunk(session, offset, request, length) != length:
+        return HttpResponseBadRequest("Chunk was truncated.")
+    UploadChunk.objects.update_or_create(session=session, offset=offset, defaults={'length': length})
+    return JsonResponse(_upload_status(session))
+
+
+@query_budget(14)
+@login_required
+@require_POST
+def finalize_upload_session(request, session_id):
+    session = get_object_or_404(
+        UploadSession.objects.select_related('work_submission', 'requirement'),
+        pk=session_id,
+        professor=request.user,
+    )
+    ranges = received_ranges(session)
+    if not is_complete(session, ranges):
+        return JsonResponse(_upload_status(session, ranges), status=409)
+
+    with transaction.atomic():
+        # A reviewer may have decided the submission since the session opened.
+        still_open = (
+            ProfessorWorkSubmission.objects.active()
+            .select_for_update()
+            .filter(pk=session.work_submission_id, status="PR")
+            .exists()
+        )
+        if not still_open:
+            return HttpResponse("The submission is no longer under review.", status=409)
+        hold_blobs()
+        with open(part_path(session), 'rb') as part:
+            file_submission = FileSubmission.objects.create(
+                proof_file=AssembledUpload(part, name=session.filename),
+                original_filename=session.filename,
+                requirement=session.requirement,
+                work_submission=session.work_submission,
+            )
+        # What requirements.add() does, minus the lookup of existing links
+        # it runs for explicit through models.
+        SubmissionRequirement.objects.bulk_create(
+            [SubmissionRequirement(professorworksubmission_id=session.work_submission_id, requirement=session.requirement)],
+            ignore_conflicts=True,
+        )
+        session.delete()
+        enqueue("build_previews", submission_id=session.work_submission_id)
+    return JsonResponse({'file_submission_id': file_submission.pk}, status=201)
+
+
+@query_budget(6)
+@replica_reads
+@conditional_page(processing_etag)
 def list_processing_submissions(request):
-    processing_submissions = ProfessorWorkSubmission.objects.filter(status="PR").select_related('professor', 'work_category')
+    processing_submissions = (
+        ProfessorWorkSubmission.objects.active().filter(status="PR").for_listing().prefetch_related("file_submissions")
+    )
+    page = keyset_paginate(processing_submissions, request)
 
     context = {
-        'submissions': processing_submissions,
+        'submissions': page.object_list,
+        'page': page,
     }
     return render(request, 'users/processing_submissions_list.html', context)
 
 
+@query_budget(5)
+@login_required
 def download_submission(request, pk):
-    submission = get_object_or_404(ProfessorWorkSubmission, pk=pk)
+    submission = _readable_submission(request, pk)
+
+    file_submissions = list(submission.file_submissions.all())
 
-    response = HttpResponse(content_type='application/zip')
+    bundle = cached_bundle(submission.pk, file_submissions)
+    if bundle is not None:
+        response = FileResponse(open(bundle, 'rb'), content_type='application/zip')
+    else:
+        response = StreamingHttpResponse(
+            stream_and_cache_bundle(submission.pk, file_submissions),
+            content_type='application/zip',
+        )
     zip_filename = f"{slugify(submission)}-files.zip"  
     response['Content-Disposition'] = f'attachment; filename="{zip_filename}"' 
+    return response
+
+
+def _readable_file(request, pk, *fields):
+    """
+    ``fields`` of FileSubmission ``pk``, if the user may read it: its
+    professor, or a reviewer of their submissions.
+    """
+    row = (
+        FileSubmission.objects.filter(pk=pk)
+        .values_list(
+            *fields,
+            'work_submission__professor_id',
+            'work_submission__professor__regular_user_profile__department_id',
+        )
+        .first()
+    )
+    if row is None:
+        raise Http404("File not found.")
+    *values, professor_id, department_id = row
+    if not can_read(request.user, request.access, professor_id, department_id):
+        raise PermissionDenied
+    return values
+
+
+def _readable_submission(request, pk):
+    """Submission ``pk`` with its professor, if the user may read its files."""
+    submission = get_object_or_404(
+        ProfessorWorkSubmission.objects.select_related('professor').annotate(
+            department_id=F('professor__regular_user_profile__department_id')
+        ),
+        pk=pk,
+    )
+    if not can_read(request.user, request.access, submission.professor_id, submission.department_id):
+        raise PermissionDenied
+    return submission
+
+
+@query_budget(4)
+@login_required
+def download_file(request, pk):
+    name, original_filename = _readable_file(request, pk, 'proof_file', 'original_filename')
+    # Blobs are named by their digest, so the name versions the bytes.
+    etag = f'"{os.path.splitext(os.path.basename(name))[0]}"'
+    filename = original_filename or os.path.basename(name)
+    return sendfile(request, proof_file_storage.local_path(name), filename, etag)
 
-    with ZipFile(response, 'w') as zip_file:
-        for file_submission in submission.file_submissions.all():
-            print(file_submission.proof_file.path)
-            with file_submission.proof_file.open('rb') as file:
-                zip_file.writestr(file_submission.proof_file.name, file.read())
 
+@query_budget(4)
+@login_required
+def preview_file(request, pk):
+    [name] = _readable_file(request, pk, 'proof_file')
+
+    etag = f'"{preview_version(name)}"'
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+
+    # Normally built by the build_previews job; render it now if that has
+    # not run yet.
+    path = build_preview(name)
+    if path is None:
+        raise Http404("This file has no preview.")
+    response = FileResponse(open(path, 'rb'), content_type='image/jpeg')
+    response['ETag'] = etag
+    if request.GET.get('v') == preview_version(name):
+        response['Cache-Control'] = f'private, max-age={settings.PREVIEW_CACHE_SECONDS}, immutable'
+    else:
+        response['Cache-Control'] = 'private, no-cache'
     return response
 
 
+@query_budget(8)
+@login_required
+@require_POST
 def approve_submission(request, pk):
-    submission = get_object_or_404(ProfessorWorkSubmission, pk=pk)
-    if submission.status == "PR":
-        submission.status = "DA"
-        submission.save()
+    department_id = reviewable_department(request, "PR")
+    ProfessorWorkSubmission.transition([pk], "PR", "DA", department_id)
     return redirect("users:list_processing_submissions")
 
 
+@query_budget(8)
+@login_required
+@require_POST
 def decline_submission(request, pk):
-    submission = get_object_or_404(ProfessorWorkSubmission, pk=pk)
-    if submission.status == "PR":
-        submission.status = "DN" 
-        submission.save()
+    department_id = reviewable_department(request, "PR")
+    ProfessorWorkSubmission.transition([pk], "PR", "DN", department_id)
     return redirect("users:list_processing_submissions")
 
 
+@query_budget(5)
+@replica_reads
+@conditional_page(department_approved_etag)
 def department_approved_submissions(request):
-    approved_submissions = ProfessorWorkSubmission.objects.filter(status="DA")
-    context = {'submissions': approved_submissions}
+    approved_submissions = ProfessorWorkSubmission.objects.active().filter(status="DA").for_listing()
+    page = keyset_paginate(approved_submissions, request)
+    context = {'submissions': page.object_list, 'page': page}
     return render(request, 'users/department_approved_submissions.html', context)
 
 
+@query_budget(8)
+@login_required
+@require_POST
 def approve_submission_da(request, pk):
-    submission = get_object_or_404(ProfessorWorkSubmission, pk=pk)
-    if submission.status == "DA":
-        submission.status = "SA"
-        submission.save()
+    department_id = reviewable_department(request, "DA")
+    ProfessorWorkSubmission.transition([pk], "DA", "SA", department_id)
     return redirect("users:approved_submissions")
 
 
+@query_budget(8)
+@login_required
+@require_POST
 def decline_submission_da(request, pk):
-    submission = get_object_or_404(ProfessorWorkSubmission, pk=pk)
-    if submission.status == "DA":
-        submission.status = "PR"
-        submission.save()
+    department_id = reviewable_department(request, "DA")
+    ProfessorWorkSubmission.transition([pk], "DA", "PR", department_id)
     return redirect("users:approved_submissions")
 
 
+@query_budget(8)
+@login_required
+@require_POST
+def bulk_transition_submissions(request):
+    transition = request.POST.get("transition")
+    if transition not in ProfessorWorkSubmission.TRANSITIONS:
+        return HttpResponseBadRequest("Unknown transition.")
+
+    ids = {int(pk) for pk in request.POST.getlist("ids") if pk.isdigit()}
+    from_status, to_status = ProfessorWorkSubmission.TRANSITIONS[transition]
+    department_id = reviewable_department(request, from_status)
+    moved = ProfessorWorkSubmission.transition(ids, from_status, to_status, department_id)
+
+    next_url = request.POST.get("next")
+    if next_url and url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        return redirect(next_url)
+    return JsonResponse({"moved": sorted(moved), "skipped": sorted(ids.difference(moved))})
+
+
+@query_budget(4)
 @login_required  
+@replica_reads
 def all_submissions_list(request):
-    submissions = ProfessorWorkSubmission.objects.all().select_related('professor', 'work_category').order_by('-created_at')
+    submissions = ProfessorWorkSubmission.objects.for_listing()
+    page = keyset_paginate(submissions, request)
     context = {
-        'submissions': submissions
+        'submissions': page.object_list,
+        'page': page,
     }
     return render(request, 'users/all_submissions_list.html', context)
 
 
+@query_budget(4)
+@login_required
+@replica_reads
+def submission_search(request):
+    query = request.GET.get('q', '').strip()
+    submissions = search_submissions(ProfessorWorkSubmission.objects.for_listing(), query)
+    page = numbered_paginate(submissions, request)
+    context = {
+        'query': query,
+        'submissions': page.object_list,
+        'page': page,
+    }
+    return render(request, 'users/submission_search.html', context)
+
+
+@query_budget(10)
 class MyLoginView(LoginView):
     def get_success_url(self):
-        if self.request.user.is_superuser:
-            return reverse_lazy('users:admin_dashboard') 
-        elif self.request.user.role == "DA":
-            print("We are here")
-            department = self.request.user.admin_of_department 
-            print(department.pk)
-            return redirect('users:department_admin_dashboard', department_id=int(4))
+        redirect_url = self.get_redirect_url()
+        if redirect_url:
+            return redirect_url
+        user = self.request.user
+        if user.is_superuser:
+            return reverse_lazy('users:admin_dashboard')
+        department = self.request.department
+        if user.role == "DA" and department:
+            return reverse_lazy('users:department_admin_dashboard', args=[department.pk])
+        return reverse_lazy('users:work_categories')
+
+
+@query_budget(4)
+@user_passes_test(is_superadmin)
+@replica_reads
+def export_submissions(request):
+    try:
+        start, end = parse_window(request.GET.get('start'), request.GET.get('end'))
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    # The CSV streams after the view returns, so pick the replica now.
+    rows = submission_rows(start, end, using=ProfessorWorkSubmission.objects.db)
+    filename = f"submissions-{start}-{end}"
+    export_format = request.GET.get('format', 'csv')
+    if export_format == 'xlsx':
+        file = tempfile.TemporaryFile()
+        write_xlsx(rows, file)
+        file.seek(0)
+        return FileResponse(
+            file,
+            as_attachment=True,
+            filename=f"{filename}.xlsx",
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+    if export_format != 'csv':
+        return HttpResponseBadRequest("Unknown export format.")
+
+    response = StreamingHttpResponse(stream_csv(rows), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
 
+
+@query_budget(3)
+@user_passes_test(is_superadmin)
+@replica_reads
+def payroll_export(request):
+    try:
+        start, end = parse_window(request.GET.get('start'), request.GET.get('end'))
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    response = HttpResponse(content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="payroll-{start}-{end}.csv"'
+    write_payroll_csv(compute_salary_increases(start, end), response)
+    return response
+
+
+@query_budget(5)
+@user_passes_test(is_superadmin)
+def job_queue(request):
+    return render(request, 'users/job_queue.html', {'stats': queue_stats()})
+
+
+@query_budget(3)
 @login_required
 def admin_dashboard(request):
-    context = {"is_admin": True}
+    context = {"is_admin": True, "counts": SubmissionCounter.totals()}
     return render(request, 'users/admin_dashboard.html', context)
 
 
+@query_budget(4)
+@login_required
 def department_admin_dashboard(request, department_id):
-    department = get_object_or_404(Department, pk=department_id)
+    if request.user.is_superuser:
+        department = get_object_or_404(Department, pk=department_id)
+    elif is_department_admin(request.user) and request.access.department_id == department_id:
+        department = request.department
+    else:
+        raise PermissionDenied
     context = {
         'department': department,
+        'counts': SubmissionCounter.totals(department),
     }
-    return render(request, 'department_admin_dashboard.html', context)
+    return render(request, 'users/department_admin_dashboard.html', context)
 
 
+@query_budget(6)
+@replica_reads
+@conditional_page(my_submissions_etag)
 def my_submissions_list(request):
     user = get_object_or_404(UniversityUser, pk=request.user.pk)
-    submissions = ProfessorWorkSubmission.objects.filter(professor=user).order_by('-created_at')
-    context = {'submissions': submissions}
+    submissions = ProfessorWorkSubmission.objects.filter(professor=user).for_listing()
+    page = keyset_paginate(submissions, request)
+    context = {'submissions': page.object_list, 'page': page}
     return render(request, 'users/my_submissions_list.html', context)
@@ -0,0 +1,70 @@
+import os
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile, ZipInfo
+
+from django.utils import timezone
+
+ZIP_CHUNK_SIZE = 64 * 1024
+
+# Formats that are already compressed; deflating them again only burns CPU.
+STORED_EXTENSIONS = {".pdf", ".jpg", ".jpeg", ".png", ".zip", ".gz", ".docx", ".xlsx"}
+
+
+class _ZipBuffer:
+    """
+    Write-only sink for ``ZipFile``. It has ``tell`` but no ``seek``, so
+    zipfile writes data descriptors instead of going back to patch headers,
+    and whatever was written can be drained and handed to the client.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def compress_type_for(filename):
+    ext = os.path.splitext(filename)[1].lower()
+    return ZIP_STORED if ext in STORED_EXTENSIONS else ZIP_DEFLATED
+
+
+def stream_proof_files_zip(file_submissions, chunk_size=ZIP_CHUNK_SIZE):
+    """
+    Yield a ZIP64 archive of the proof files of ``file_submissions``, reading each
+    file ``chunk_size`` bytes at a time so memory stays bounded by the chunk
+    size rather than the archive size.
+    """
+    buffer = _ZipBuffer()
+    with ZipFile(buffer, "w") as zip_file:
+        for file_submission in file_submissions:
+            proof_file = file_submission.proof_file
+            zinfo = ZipInfo(
+                f"{file_submission.pk}_{file_submission.display_name}",
+                date_time=timezone.localtime(file_submission.updated_at).timetuple()[:6],
+            )
+            zinfo.compress_type = compress_type_for(file_submission.display_name)
+            with proof_file.open("rb") as source, zip_file.open(
+                zinfo, "w", force_zip64=True
+            ) as entry:
+                for chunk in iter(lambda: source.read(chunk_size), b""):
+                    entry.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+    data = buffer.drain()
+    if data:
+        yield data
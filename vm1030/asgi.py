@@ -11,6 +11,6 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vm1030.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vm1030.settings.asgi')
 
 application = get_asgi_application()
@@ -0,0 +1,11 @@
+"""
+ASGI deployment profile, e.g.
+
+    DJANGO_SETTINGS_MODULE=vm1030.settings.asgi uvicorn vm1030.asgi:application --workers 4
+
+Submission listings and ZIP downloads run as async views, so a slow download
+waits on the event loop instead of holding a worker thread.
+"""
+from .local import *
+
+ASYNC_VIEWS = True
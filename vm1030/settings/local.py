@@ -20,3 +20,27 @@ DATABASES = {
         # "PORT": os.environ["PORT"],
     }
 }
+
+# One cache shared by every worker process, e.g.
+# REDIS_URL=redis://cache.internal:6379/0. Catalog versions are bumped and
+# access entries dropped in it, so a process-local cache would leave other
+# workers serving stale pages and revoked department rights; the users.E001
+# check refuses one.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ.get("REDIS_URL", "redis://127.0.0.1:6379/0"),
+    }
+}
+
+# Read replicas, e.g. DB_REPLICA_HOSTS=replica1.internal,replica2.internal.
+# Pointing one at the primary's own host gives two local aliases to exercise
+# the router with.
+for number, host in enumerate(filter(None, os.environ.get("DB_REPLICA_HOSTS", "").split(",")), start=1):
+    DATABASES[f"replica_{number}"] = {
+        **DATABASES["default"],
+        "HOST": host.strip(),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
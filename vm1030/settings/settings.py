@@ -20,11 +20,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "users.querybudget.QueryBudgetMiddleware",
+    "users.routers.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "users.access.AccessMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -51,6 +54,17 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "vm1030.wsgi.application"
 
+ASGI_APPLICATION = "vm1030.asgi.application"
+
+# Serve the submission listings and downloads with the async views in
+# users/async_views.py. Only worth it under an ASGI server; see settings/asgi.py.
+ASYNC_VIEWS = False
+
+# Views declare how many queries a request may run (users.querybudget). Going
+# over is logged, and flagged in a Query-Budget-Exceeded header under DEBUG.
+# With QUERY_BUDGET_ENFORCE it raises instead; the test settings turn it on.
+QUERY_BUDGET_ENFORCE = False
+
 
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
@@ -98,6 +112,17 @@ STATICFILES_DIRS = (
     os.path.join(BASE_DIR, "static"),
 )
 
+# collectstatic writes content-hashed names, a manifest, and gzip/brotli
+# copies (users.assets); hashed files are served as immutable for
+# STATIC_CACHE_SECONDS, by Django too when nothing sits in front of it.
+
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "users.assets.CompressedManifestStaticFilesStorage"},
+}
+
+STATIC_CACHE_SECONDS = 365 * 24 * 60 * 60
+
 MEDIA_URL = "/media/"
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -109,4 +134,123 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 AUTH_USER_MODEL = "users.UniversityUser"
 
 LOGIN_URL = 'users:login'
-LOGOUT_REDIRECT_URL = 'users:admin_dashboard'
\ No newline at end of file
+LOGOUT_REDIRECT_URL = 'users:admin_dashboard'
+
+# Pre-built submission ZIP bundles, evicted least recently used first once
+# the directory grows past the budget.
+
+SUBMISSION_BUNDLE_ROOT = os.path.join(BASE_DIR, "bundle_cache")
+
+SUBMISSION_BUNDLE_MAX_BYTES = 2 * 1024 ** 3
+
+
+# Part files of in-progress resumable uploads. Sessions not finalized within
+# UPLOAD_SESSION_MAX_AGE_HOURS are deleted with their part files by the job
+# worker's housekeeping or `manage.py purge_upload_sessions`. No proof file,
+# uploaded whole or in chunks, may exceed PROOF_FILE_MAX_BYTES.
+
+CHUNKED_UPLOAD_ROOT = os.path.join(BASE_DIR, "upload_sessions")
+
+UPLOAD_SESSION_MAX_AGE_HOURS = 48
+
+PROOF_FILE_MAX_BYTES = 200 * 1024 ** 2
+
+
+# Work categories and requirements are cached, together with the pages
+# rendered from them, under a version number bumped on every catalog change.
+# The version lives in the default cache, so every worker process must share
+# one cache backend for the bumps to reach all of them: local.py configures
+# Redis, and the users.E001 check rejects a process-local cache.
+
+CATALOG_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+# Read replicas. Listing, search and export reads go to one of these aliases
+# (see users.routers); writes, and reads by anyone who wrote in the last
+# REPLICA_STICKY_SECONDS, stay on the primary. A replica that refuses
+# connections is skipped for REPLICA_RETRY_SECONDS.
+
+DATABASE_ROUTERS = ["users.routers.ReplicaRouter"]
+
+DATABASE_REPLICAS = []
+
+REPLICA_STICKY_SECONDS = 10
+
+REPLICA_RETRY_SECONDS = 30
+
+
+# Background jobs (users.jobs), stored in the database and run by
+# `manage.py run_jobs`. Workers send a heartbeat for their running jobs a few
+# times per JOB_TIMEOUT_SECONDS; a job without one for that long is assumed
+# lost with its worker and claimed again. Failed attempts retry after
+# JOB_RETRY_BASE_SECONDS, doubling up to JOB_RETRY_MAX_SECONDS. Finished jobs
+# are deleted after JOB_RETENTION_DAYS.
+
+JOB_POLL_SECONDS = 1
+
+JOB_TIMEOUT_SECONDS = 600
+
+JOB_RETRY_BASE_SECONDS = 10
+
+JOB_RETRY_MAX_SECONDS = 3600
+
+JOB_RETENTION_DAYS = 7
+
+
+# Reviewer previews of proof files: images downscaled to fit
+# PREVIEW_MAX_SIZE pixels, PDFs rendered from their first page. Each preview
+# is stored next to its blob and served versioned by content, so browsers
+# keep it for PREVIEW_CACHE_SECONDS.
+
+PREVIEW_MAX_SIZE = 1024
+
+PREVIEW_QUALITY = 80
+
+PREVIEW_CACHE_SECONDS = 365 * 24 * 60 * 60
+
+
+# Academic years start on the first of this month. Finalized submissions of
+# past academic years are moved to per-year archive partitions by
+# `manage.py archive_submissions`.
+
+ACADEMIC_YEAR_START_MONTH = 9
+
+
+# Cold storage for proof files. `manage.py freeze_proof_files` compresses
+# the files of submissions finalized more than COLD_STORAGE_AFTER_DAYS ago
+# into COLD_STORAGE_ROOT and removes them from MEDIA_ROOT. Reads decompress
+# into COLD_CACHE_ROOT, evicted least recently read first past
+# COLD_CACHE_MAX_BYTES.
+
+COLD_STORAGE_ROOT = os.path.join(BASE_DIR, "cold_storage")
+
+COLD_CACHE_ROOT = os.path.join(BASE_DIR, "cold_cache")
+
+COLD_CACHE_MAX_BYTES = 1024 ** 3
+
+COLD_STORAGE_AFTER_DAYS = 30
+
+COLD_STORAGE_LEVEL = 10
+
+
+# Each user's department and professor profile, resolved once and cached by
+# users.access for ACCESS_CACHE_TIMEOUT. Changes made through the ORM drop
+# the entry at once, in every worker as they share the default cache (see
+# the catalog above); the timeout bounds how long queryset.update() and raw
+# SQL changes can go unnoticed.
+
+ACCESS_CACHE_TIMEOUT = 60 * 60
+
+
+# Single proof-file downloads (users.downloads). With SENDFILE_BACKEND set to
+# "x-accel-redirect" (nginx) or "x-sendfile" (Apache, lighttpd), Django only
+# checks access and the web server sends the bytes. For nginx,
+# SENDFILE_LOCATIONS maps each directory files are read from to an internal
+# location aliased to it. Left at None, Django streams the file itself.
+
+SENDFILE_BACKEND = None
+
+SENDFILE_LOCATIONS = {
+    MEDIA_ROOT: "/internal/media/",
+    COLD_CACHE_ROOT: "/internal/cold/",
+}
@@ -1,11 +1,16 @@
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from users.assets import serve_static
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", include("users.urls")),
-] + static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+    re_path(r"^%s(?P<path>.*)$" % re.escape(settings.STATIC_URL.lstrip("/")), serve_static),
+]
 
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# MEDIA_ROOT holds proof files and their previews, which only the access-checked
+# views in users.views may serve, so it is deliberately not mounted here.